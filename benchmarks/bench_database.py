@@ -0,0 +1,116 @@
+# benchmarks/bench_database.py
+"""
+Compare l'ancien moteur (NullPool, journal SQLite par défaut) et le nouveau
+(pool de connexions + WAL et pragmas) sur deux chemins chauds :
+- GET /orders/processed (lecture),
+- insertion d'un MessageLog (écriture concurrente, comme le webhook).
+
+Usage : python -m benchmarks.bench_database [--requests 2000] [--concurrency 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database import Base, create_engine_from_url, get_async_session
+from models import Client, MessageLog, ProcessedOrder
+from models.user import User
+from routers import processed_orders
+from routers.auth import get_current_user
+
+
+async def seed(session_factory, n_orders: int = 200) -> None:
+    async with session_factory() as session:
+        session.add(User(id=1, email="bench@example.com", hashed_password="x"))
+        session.add(Client(id=1, name="Restaurant Le Soleil", phone="+33612345678", owner_id=1))
+        now = datetime.utcnow()
+        for i in range(n_orders):
+            session.add(ProcessedOrder(
+                client_id=1,
+                owner_id=1,
+                delivery_date=now + timedelta(days=i % 30),
+                items='[{"name": "Baguette", "quantity": 10}]',
+                status="envoyé",
+            ))
+        await session.commit()
+
+
+async def run_concurrently(total: int, concurrency: int, job) -> float:
+    """Exécute `job` `total` fois avec `concurrency` tâches en parallèle, retourne les req/s."""
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            await job()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - start)
+
+
+async def bench_engine(label: str, pooled: bool, tuned: bool, total: int, concurrency: int) -> None:
+    workdir = tempfile.mkdtemp(prefix="bench_db_")
+    url = f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+    engine = create_engine_from_url(url, pooled=pooled, tuned=tuned)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(session_factory)
+
+    app = FastAPI()
+    app.include_router(processed_orders.router, prefix="/orders")
+
+    async def override_session():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = override_session
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, email="bench@example.com")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def read_job():
+            response = await client.get("/orders/orders/processed")
+            response.raise_for_status()
+
+        read_rps = await run_concurrently(total, concurrency, read_job)
+
+    async def write_job():
+        async with session_factory() as session:
+            session.add(MessageLog(
+                sender_number="+33612345678",
+                message_text="12 baguettes pour demain",
+                status="commande détectée",
+                client_id=1,
+            ))
+            await session.commit()
+
+    write_rps = await run_concurrently(total, concurrency, write_job)
+    await engine.dispose()
+
+    print(f"{label:<28} GET /orders/processed : {read_rps:8.1f} req/s | insert MessageLog : {write_rps:8.1f} req/s")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    await bench_engine("ancien (NullPool, DELETE)", pooled=False, tuned=False, total=args.requests, concurrency=args.concurrency)
+    await bench_engine("nouveau (pool, WAL)", pooled=True, tuned=True, total=args.requests, concurrency=args.concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+# benchmarks/bench_json_extraction.py
+"""
+Microbenchmark de l'extraction du JSON des réponses GPT, sur un corpus de réponses
+réalistes et mal formées (bloc de code, texte avant/après, accolades dans le commentaire,
+virgule finale, anciennes clés, réponse tronquée...) :
+- ancien chemin : json.loads, puis regex gloutonne \\{.*\\} (DOTALL) et second json.loads,
+  puis contrôle ad hoc de is_order,
+- nouveau chemin : utils/llm_json.parse_order_reply (un parcours + schéma Pydantic compilé).
+
+Pour chaque chemin : temps moyen par réponse, réponses acceptées, et réponses acceptées
+à tort ou rejetées à tort par rapport au résultat attendu.
+
+Usage : python -m benchmarks.bench_json_extraction [--repeat 2000]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.llm_json import LLMReplyError, parse_order_reply
+
+ORDER = '{"is_order": true, "delivery_date": "2026-10-20", "items": [{"name": "Baguette tradition", "quantity": 12}, {"name": "Croissant", "quantity": 6}]}'
+NOT_ORDER = '{"is_order": false}'
+
+# (réponse, valide attendue)
+CORPUS = [
+    (ORDER, True),
+    (NOT_ORDER, True),
+    ("```json\n" + ORDER + "\n```", True),
+    ("Voici la commande extraite :\n" + ORDER, True),
+    (ORDER + "\n\nN'hésitez pas si vous avez besoin d'autre chose !", True),
+    ("```json\n" + ORDER + "\n```\nRemarque : le format {nom, quantité} est respecté.", True),
+    ("Analyse : {client pro}\n" + ORDER, True),
+    (ORDER.replace("}]}", "},]}"), True),                                            # virgule finale
+    ('{"is_order": true, "delivery_date": null, "order_details": [{"product": "Pain", "quantity": 3}]}', True),
+    ('{"is_order": true, "items": [{"name": "Pain {complet}", "quantity": 2}], "delivery_date": "2026-10-21"}', True),
+    ('{"is_order": true, "delivery_date": "2026-10-20", "items": [{"name": "Baguette", "quantity": 1', False),  # tronquée
+    ('{"is_order": true, "delivery_date": "2026-10-20", "items": []}', False),      # commande vide
+    ('{"is_order": true, "delivery_date": "demain", "items": [{"name": "Pain", "quantity": 2}]}', False),
+    ('{"is_order": true, "items": [{"name": "Pain", "quantity": -2}]}', False),
+    ('{"commande": "oui"}', False),
+    ("Je ne suis pas sûr de comprendre le message.", False),
+    (ORDER + "\nAutre option : " + NOT_ORDER, True),                                  # deux objets : le premier compte
+]
+
+
+def legacy_extract(answer: str):
+    """Ancien chemin de routers/messages.py + contrôle de services/message_handler.py."""
+    try:
+        parsed = json.loads(answer)
+    except Exception:
+        m = re.search(r"(\{.*\})", answer, re.DOTALL)
+        if not m:
+            return None
+        try:
+            parsed = json.loads(m.group(1))
+        except Exception:
+            return None
+    if not isinstance(parsed, dict) or "is_order" not in parsed:
+        return None
+    return parsed
+
+
+def new_extract(answer: str):
+    try:
+        return parse_order_reply(answer)
+    except LLMReplyError:
+        return None
+
+
+def run(label: str, extract, repeat: int) -> None:
+    wrong_accept = wrong_reject = accepted = 0
+    for answer, expected in CORPUS:
+        result = extract(answer)
+        accepted += result is not None
+        wrong_accept += result is not None and not expected
+        wrong_reject += result is None and expected
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for answer, _ in CORPUS:
+            extract(answer)
+    per_reply = (time.perf_counter() - start) / (repeat * len(CORPUS)) * 1e6
+    print(f"{label:<30} {per_reply:8.2f} µs/réponse   acceptées {accepted:2d}/{len(CORPUS)}   "
+          f"acceptées à tort {wrong_accept:2d}   rejetées à tort {wrong_reject:2d}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    print(f"{len(CORPUS)} réponses types, {args.repeat} passes\n")
+    run("ancien (json.loads + regex)", legacy_extract, args.repeat)
+    run("nouveau (parcours + Pydantic)", new_extract, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_pagination.py
+"""
+Mesure le coût de listing des commandes d'un boulanger avec 100k commandes :
+- ancien chemin : tout l'historique chargé via .all(),
+- pagination par curseur : première page, puis une page profonde (90 % de l'historique).
+
+Usage : python -m benchmarks.bench_pagination [--orders 100000] [--limit 50]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database import Base, create_engine_from_url
+from models import Client
+from models.order import Order
+from models.user import User
+from utils.pagination import apply_keyset, encode_cursor, split_page
+
+
+async def seed(engine, n_orders: int) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [{"id": 1, "email": "bench@example.com", "hashed_password": "x"}])
+        await conn.execute(insert(Client), [{"id": 1, "name": "Restaurant Le Soleil", "owner_id": 1}])
+        start = datetime(2023, 1, 1, 6, 0)
+        batch = []
+        for i in range(n_orders):
+            batch.append({
+                "content": "10 baguettes, 5 croissants",
+                "delivery_date": start + timedelta(minutes=10 * i),
+                "status": "en_attente",
+                "client_id": 1,
+                "owner_id": 1,
+            })
+            if len(batch) == 10_000:
+                await conn.execute(insert(Order), batch)
+                batch = []
+        if batch:
+            await conn.execute(insert(Order), batch)
+
+
+async def timed(label: str, session_factory, coro_factory, repeat: int = 5) -> None:
+    best = float("inf")
+    rows = 0
+    for _ in range(repeat):
+        async with session_factory() as session:
+            start = time.perf_counter()
+            rows = await coro_factory(session)
+            best = min(best, time.perf_counter() - start)
+    print(f"{label:<42} {best * 1000:9.2f} ms  ({rows} lignes)")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_pagination_")
+    engine = create_engine_from_url(f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}")
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(engine, args.orders)
+    print(f"{args.orders} commandes insérées, page de {args.limit}\n")
+
+    async def full_history(session):
+        result = await session.scalars(
+            select(Order).where(Order.owner_id == 1).order_by(Order.delivery_date.desc())
+        )
+        return len(result.all())
+
+    async def keyset_page(session, cursor=None):
+        stmt = apply_keyset(select(Order).where(Order.owner_id == 1), Order.delivery_date, Order.id, cursor, args.limit)
+        result = await session.scalars(stmt)
+        items, _ = split_page(result.all(), args.limit, key=lambda o: (o.delivery_date, o.id))
+        return len(items)
+
+    # Curseur positionné à 90 % de l'historique (ordre décroissant)
+    async with session_factory() as session:
+        deep = (await session.execute(
+            select(Order.delivery_date, Order.id).where(Order.owner_id == 1)
+            .order_by(Order.delivery_date.desc(), Order.id.desc())
+            .offset(int(args.orders * 0.9)).limit(1)
+        )).one()
+    deep_cursor = encode_cursor(deep.delivery_date, deep.id)
+
+    await timed("ancien : historique complet (.all())", session_factory, full_history, repeat=3)
+    await timed("curseur : première page", session_factory, keyset_page)
+    await timed("curseur : page profonde (90 %)", session_factory, lambda s: keyset_page(s, deep_cursor))
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
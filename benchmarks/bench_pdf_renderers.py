@@ -0,0 +1,93 @@
+# benchmarks/bench_pdf_renderers.py
+"""
+Comparaison des moteurs de bon de commande (services/pdf_renderers.py) selon la taille
+de la commande : latence de rendu (p50 / p95), pic de mémoire résidente et taille du PDF.
+
+Chaque couple (moteur, nombre d'articles) tourne dans un processus neuf (spawn), comme
+un worker du pool de rendu : import et warm() du moteur, puis --repeat rendus en mémoire
+(render(), sans le stockage partagé). RSS de base = pic après warm() ; pic = pic final
+(ru_maxrss). Un moteur non installé (WeasyPrint sans Pango...) est signalé et ignoré.
+
+Usage : python -m benchmarks.bench_pdf_renderers [--items 5 25 100 400] [--repeat 30]
+        [--renderers reportlab weasyprint]
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _rss_mb() -> float:
+    # ru_maxrss : Kio sous Linux, octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(renderer_name: str, items: int, repeat: int) -> dict:
+    """Exécuté dans un processus neuf : un moteur, une taille de commande."""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from services.pdf_renderers import OrderDocument, get_renderer
+
+    renderer = get_renderer(renderer_name)
+    try:
+        renderer.warm()
+    except (ImportError, OSError) as e:
+        return {"error": str(e)}
+    base_rss = _rss_mb()
+
+    order = OrderDocument(
+        client_name="Restaurant Le Soleil",
+        items=[{"name": f"Produit {i} tradition", "quantity": i % 12 + 1} for i in range(items)],
+        delivery_date="2026-10-20",
+    )
+    start = time.perf_counter()
+    size = len(renderer.render(order))
+    first_ms = (time.perf_counter() - start) * 1000
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        renderer.render(order)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "first_ms": first_ms,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))],
+        "size_kb": size / 1024,
+        "base_rss_mb": base_rss,
+        "peak_rss_mb": _rss_mb(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, nargs="+", default=[5, 25, 100, 400])
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--renderers", nargs="+", default=None, help="défaut : tous les moteurs")
+    args = parser.parse_args()
+
+    from services.pdf_renderers import RENDERERS
+    names = args.renderers or list(RENDERERS)
+
+    print(f"{'moteur':<11} {'articles':>8} {'1er rendu':>10} {'p50':>9} {'p95':>9} {'PDF':>8} {'RSS base':>9} {'RSS pic':>9}")
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        for items in args.items:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_case, name, items, args.repeat).result()
+            if "error" in result:
+                print(f"{name:<11} indisponible : {result['error']}")
+                break
+            print(f"{name:<11} {items:>8} {result['first_ms']:>8.1f}ms {result['p50_ms']:>7.1f}ms {result['p95_ms']:>7.1f}ms "
+                  f"{result['size_kb']:>6.1f}Ko {result['base_rss_mb']:>7.1f}Mo {result['peak_rss_mb']:>7.1f}Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/bench_pdf_service.py
+"""
+Latence de l'API pendant des rafales de commandes, rendu PDF :
+- inline : generate_order_pdf appelé directement dans la requête (ancien comportement),
+- pool   : services/pdf_service.PDFRenderService (pool de processus chauds).
+
+Une petite app FastAPI expose POST /order (rendu d'un bon de commande) et GET /ping
+(requête légère, comme la liste des commandes du tableau de bord). Chaque rafale envoie
+--burst commandes simultanées pendant qu'un ping part toutes les 5 ms ; on mesure
+p50 / p99 des deux routes via httpx (transport ASGI, sans réseau). Les latences partent
+de l'heure d'arrivée prévue de la requête (début de rafale, créneau du ping) et non du
+moment où la boucle a pu la prendre en charge, sinon un rendu bloquant serait invisible.
+
+Usage : python -m benchmarks.bench_pdf_service [--bursts 10] [--burst 20] [--items 25] [--workers 2]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+
+from services.make_order_pdf import generate_order_pdf
+from services.pdf_service import OrderDocument, PDFRenderService
+
+
+def build_app(service: PDFRenderService = None) -> FastAPI:
+    app = FastAPI()
+    counter = iter(range(1, 10 ** 9))
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.post("/order")
+    async def order(payload: dict):
+        # Client différent à chaque commande : pas de réutilisation par le stockage partagé des PDF
+        order_id = next(counter)
+        document = OrderDocument(f"Restaurant {order_id}", payload["items"], "2026-10-20", order_id)
+        if service is None:
+            path = generate_order_pdf(document.client_name, document.items, document.delivery_date, document.order_id)
+        else:
+            path = await service.render(document)
+        return {"pdf_path": path}
+
+    return app
+
+
+def percentile(values, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+async def run(label: str, app: FastAPI, args) -> None:
+    items = [{"name": f"Produit {i}", "quantity": i % 7 + 1} for i in range(args.items)]
+    order_latencies, ping_latencies = [], []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def timed(call, arrival: float, sink):
+            response = await call()
+            response.raise_for_status()
+            sink.append((time.perf_counter() - arrival) * 1000)
+
+        async def pinger(stop: asyncio.Event):
+            first = time.perf_counter()
+            for slot in range(10 ** 9):
+                arrival = first + slot * 0.005
+                await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+                if stop.is_set():
+                    return
+                await timed(lambda: client.get("/ping"), arrival, ping_latencies)
+
+        start = time.perf_counter()
+        for _ in range(args.bursts):
+            stop = asyncio.Event()
+            ping_task = asyncio.create_task(pinger(stop))
+            await asyncio.sleep(0.01)
+            arrival = time.perf_counter()
+            await asyncio.gather(*(
+                timed(lambda: client.post("/order", json={"items": items}), arrival, order_latencies)
+                for _ in range(args.burst)
+            ))
+            stop.set()
+            await ping_task
+        elapsed = time.perf_counter() - start
+
+    total = args.bursts * args.burst
+    print(f"{label:<8} {total / elapsed:7.1f} PDF/s   "
+          f"/order p50 {statistics.median(order_latencies):7.1f} ms  p99 {percentile(order_latencies, 99):7.1f} ms   "
+          f"/ping p50 {statistics.median(ping_latencies):6.1f} ms  p99 {percentile(ping_latencies, 99):7.1f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bursts", type=int, default=10)
+    parser.add_argument("--burst", type=int, default=20, help="commandes simultanées par rafale")
+    parser.add_argument("--items", type=int, default=25, help="articles par commande")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    # Les PDF sont écrits dans generated_pdfs/ du répertoire courant (workers compris)
+    os.chdir(tempfile.mkdtemp(prefix="bench_pdf_service_"))
+    print(f"{args.bursts} rafales de {args.burst} commandes ({args.items} articles), {args.workers} workers\n")
+
+    await run("inline", build_app(), args)
+
+    service = PDFRenderService(workers=args.workers, max_pending=args.burst * 2)
+    await service.start()
+    try:
+        await run("pool", build_app(service), args)
+    finally:
+        await service.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
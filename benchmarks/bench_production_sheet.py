@@ -0,0 +1,125 @@
+# benchmarks/bench_production_sheet.py
+"""
+Fiche de production d'une journée (services/production_sheet.py) pour N commandes :
+- lecture des commandes du jour (base SQLite temporaire, lecture en flux),
+- rendu incrémental (_PageWriter : chaque section posée puis oubliée),
+- à titre de comparaison, le même document construit d'un bloc avec SimpleDocTemplate.build()
+  (liste de tous les éléments en mémoire).
+
+Pour chaque taille : temps de lecture, temps de rendu, pages, taille du PDF
+et pic de mémoire Python pendant le rendu (tracemalloc).
+
+Usage : python -m benchmarks.bench_production_sheet [--orders 100 250 500] [--clients 60]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Base temporaire : load_production_sheet lit via la session globale de database.py
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_sheet_'), 'bench.db')}"
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate
+from sqlalchemy import delete, insert
+
+from database import AsyncSessionLocal, Base, engine
+from models import Client, ProcessedOrder, User
+from services.production_sheet import MARGIN, load_production_sheet, sheet_flowables, write_production_sheet
+
+DAY = date(2026, 10, 20)
+PRODUCTS = ["Baguette tradition", "Croissant", "Pain au chocolat", "Pain de campagne", "Brioche", "Éclair café",
+            "Tarte aux pommes", "Ficelle", "Pain complet", "Chausson aux pommes", "Flan", "Cookie"]
+
+
+async def create_clients(clients: int):
+    async with AsyncSessionLocal() as session:
+        owner_id = await session.scalar(insert(User).values(email="bench@example.com", hashed_password="x").returning(User.id))
+        client_ids = [
+            await session.scalar(insert(Client).values(
+                name=f"Client {i:03d}", phone=f"+336{i:08d}", email="c@example.com", owner_id=owner_id,
+            ).returning(Client.id))
+            for i in range(clients)
+        ]
+        await session.commit()
+    return owner_id, client_ids
+
+
+async def populate(owner_id: int, client_ids, orders: int) -> None:
+    rng = random.Random(42)
+    clients = len(client_ids)
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(ProcessedOrder))
+        rows = []
+        for i in range(orders):
+            items = [{"name": name, "quantity": rng.randint(1, 40), "product_id": PRODUCTS.index(name) + 1}
+                     for name in rng.sample(PRODUCTS, rng.randint(2, 8))]
+            rows.append({"client_id": client_ids[i % clients], "owner_id": owner_id, "status": "envoyé",
+                         "items": json.dumps(items, ensure_ascii=False), "delivery_date": datetime(2026, 10, 20, 6)})
+        await session.execute(insert(ProcessedOrder), rows)
+        await session.commit()
+
+
+def build_all_at_once(sheet, stream) -> None:
+    """Comparaison : les mêmes éléments, tous en mémoire, puis SimpleDocTemplate.build()."""
+    doc = SimpleDocTemplate(stream, pagesize=A4, leftMargin=MARGIN, rightMargin=MARGIN, topMargin=MARGIN, bottomMargin=MARGIN)
+    doc.build(list(sheet_flowables(sheet)))
+
+
+def measure(render, sheet):
+    # Temps sans tracemalloc (qui ralentit fortement le rendu), puis pic mémoire sur un second rendu
+    stream = io.BytesIO()
+    start = time.perf_counter()
+    render(sheet, stream)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    render(sheet, io.BytesIO())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    data = stream.getvalue()
+    return elapsed, peak, data.count(b"/Type /Page\n") or data.count(b"/Type /Page"), len(data)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, nargs="+", default=[100, 250, 500])
+    parser.add_argument("--clients", type=int, default=60)
+    args = parser.parse_args()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    owner_id, client_ids = await create_clients(args.clients)
+    # Premier rendu hors mesure (polices, styles)
+    await populate(owner_id, client_ids, 10)
+    async with AsyncSessionLocal() as session:
+        warmup = await load_production_sheet(session, owner_id, DAY)
+    write_production_sheet(warmup, io.BytesIO())
+    build_all_at_once(warmup, io.BytesIO())
+
+    print(f"{'commandes':>9} {'lecture':>9} {'mode':<12} {'rendu':>9} {'pages':>6} {'PDF':>9} {'pic mémoire':>12}")
+    for count in args.orders:
+        await populate(owner_id, client_ids, count)
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as session:
+            sheet = await load_production_sheet(session, owner_id, DAY)
+        load_ms = (time.perf_counter() - start) * 1000
+        for label, render in (("incrémental", write_production_sheet), ("d'un bloc", build_all_at_once)):
+            elapsed, peak, pages, size = measure(render, sheet)
+            print(f"{len(sheet.orders):>9} {load_ms:>7.1f}ms {label:<12} {elapsed * 1000:>7.0f}ms {pages:>6} "
+                  f"{size / 1024:>7.0f}Ko {peak / 1024 / 1024:>10.1f}Mo")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
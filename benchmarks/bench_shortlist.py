@@ -0,0 +1,148 @@
+# benchmarks/bench_shortlist.py
+"""
+Compare le prompt GPT d'un client grossiste (catalogue synthétique de 500 produits)
+avec et sans présélection des produits par l'index de trigrammes :
+- taille du prompt système (tokens estimés, tiktoken si installé, sinon ~4 caractères/token),
+- latence de bout en bout de process_whatsapp_message (analyse locale désactivée).
+
+Sans --live, l'appel GPT est simulé avec une latence proportionnelle au nombre de
+tokens d'entrée (--base-ms + --ms-per-1k-tokens) ; avec --live, appel réel (OPENAI_API_KEY).
+
+Usage : python -m benchmarks.bench_shortlist [--products 500] [--messages 30] [--live]
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Base temporaire : le handler utilise la session globale de database.py
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_shortlist_'), 'bench.db')}"
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from sqlalchemy import insert
+
+import services.catalog_cache as catalog_cache_module
+import services.extraction_batcher as batcher_module
+import services.message_handler as handler_module
+from database import AsyncSessionLocal, Base, engine
+from models import Client, Product, User
+from services.catalog_cache import catalog_cache
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(_ENCODING.encode(text))
+except ImportError:
+    def count_tokens(text: str) -> int:
+        return max(1, len(text) // 4)
+
+BASES = ["Baguette", "Pain", "Croissant", "Brioche", "Tarte", "Éclair", "Flan", "Chausson", "Ficelle",
+         "Fougasse", "Cookie", "Madeleine", "Financier", "Sablé", "Quiche", "Sandwich", "Moelleux", "Cake"]
+VARIANTS = ["tradition", "complet", "aux céréales", "au chocolat", "aux amandes", "au beurre", "nature",
+            "aux pommes", "au citron", "aux noix", "de campagne", "au seigle", "aux olives", "framboise",
+            "vanille", "pistache", "caramel", "sans gluten", "bio", "au lait", "aux figues", "praliné",
+            "jambon beurre", "thon crudités", "poulet curry", "chèvre miel", "noisette", "myrtille"]
+SIZES = ["", " mini", " 250g", " 400g", " familial", " individuel"]
+
+
+def synthetic_catalog(n: int):
+    names = [f"{b} {v}{s}".strip() for s, b, v in itertools.product(SIZES, BASES, VARIANTS)]
+    random.Random(42).shuffle(names)
+    return names[:n]
+
+
+def synthetic_messages(catalog, n: int):
+    rng = random.Random(7)
+    messages = []
+    for i in range(n):
+        picked = rng.sample(catalog, rng.randint(1, 4))
+        lines = [f"{rng.randint(1, 30)} {name.lower()}" for name in picked]
+        messages.append((f"Bonjour, pour jeudi svp : {', '.join(lines)}. Merci ! (#{i})", picked))
+    return messages
+
+
+class SimulatedLLM:
+    """Latence simulée : base + coût par millier de tokens d'entrée."""
+
+    def __init__(self, base_ms: float, ms_per_1k: float):
+        self.base_ms = base_ms
+        self.ms_per_1k = ms_per_1k
+
+    async def chat(self, messages, model, **kwargs) -> str:
+        tokens = sum(count_tokens(m["content"]) for m in messages)
+        await asyncio.sleep((self.base_ms + self.ms_per_1k * tokens / 1000) / 1000)
+        return '{"is_order": true, "delivery_date": "2030-01-03", "items": []}'
+
+
+async def run(label: str, messages, use_index: bool, n_products: int) -> None:
+    catalog_cache_module.PROMPT_SHORTLIST_MIN_PRODUCTS = 0 if use_index else n_products + 1
+    catalog_cache.clear()
+    prompt_tokens, latencies, recalled = [], [], []
+    async with AsyncSessionLocal() as session:
+        client = await session.get(Client, 1)
+        entry = await catalog_cache.get(session, client)
+    for text, picked in messages:
+        products, prompt = entry.prompt_for(text)
+        prompt_tokens.append(count_tokens(prompt))
+        recalled.append(sum(name in products for name in picked) / len(picked))
+        start = time.perf_counter()
+        await handler_module.process_whatsapp_message("+33600000000", f"{text} [{label}]")
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(f"{label:<22} tokens prompt moy. {statistics.mean(prompt_tokens):8.0f}   "
+          f"latence p50 {latencies[len(latencies) // 2]:8.1f} ms   p95 {latencies[int(len(latencies) * 0.95) - 1]:8.1f} ms   "
+          f"produits cités présents {statistics.mean(recalled):6.1%}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=30)
+    parser.add_argument("--base-ms", type=float, default=300.0)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=150.0)
+    parser.add_argument("--live", action="store_true", help="appelle réellement l'API OpenAI")
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(args.products)
+    messages = synthetic_messages(catalog, args.messages)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [{"id": 1, "email": "bench@example.com", "hashed_password": "x"}])
+        await conn.execute(insert(Client), [{"id": 1, "name": "Grossiste Bench", "owner_id": 1, "phone": "+33600000000"}])
+        await conn.execute(insert(Product), [{"name": name, "client_id": 1} for name in catalog])
+
+    # Chaque message passe par GPT : pas d'analyse locale, pas d'attente de regroupement
+    handler_module.PARSER_MIN_CONFIDENCE = 2.0
+    batcher_module.extraction_batcher.window = 0
+    if not args.live:
+        simulated = SimulatedLLM(args.base_ms, args.ms_per_1k_tokens)
+        batcher_module.get_llm_client = lambda: simulated
+
+    print(f"{len(catalog)} produits, {len(messages)} messages{' (API réelle)' if args.live else ' (GPT simulé)'}\n")
+    await run("catalogue complet", messages, use_index=False, n_products=len(catalog))
+    await run("index de trigrammes", messages, use_index=True, n_products=len(catalog))
+
+    async with AsyncSessionLocal() as session:
+        client = await session.get(Client, 1)
+        entry = await catalog_cache.get(session, client)
+    start = time.perf_counter()
+    for text, _ in messages:
+        entry.index.shortlist(text)
+    print(f"\ncoût de la présélection : {(time.perf_counter() - start) * 1000 / len(messages):.2f} ms / message")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
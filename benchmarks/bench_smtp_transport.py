@@ -0,0 +1,177 @@
+# benchmarks/bench_smtp_transport.py
+"""
+Envoi de N bons de commande par email contre un serveur SMTP local de substitution
+(asyncio, dans un thread) qui compte connexions, EHLO, AUTH et messages reçus :
+- ancien chemin : une connexion + login par email, appel synchrone dans la boucle,
+- transport partagé (services/mail_transport.py) : pool de connexions authentifiées,
+  envois concurrents via `await`.
+
+Le serveur attend --handshake-ms avant son accueil pour simuler le coût TCP + TLS + AUTH
+d'un vrai relais (pas de TLS ici : STARTTLS désactivé des deux côtés). Pour chaque mode :
+durée totale, poignées de main, retard maximal de la boucle d'événements (tâche témoin
+toutes les 5 ms). Puis le serveur coupe les connexions inactives et un second lot vérifie
+que le transport se reconnecte.
+
+Usage : python -m benchmarks.bench_smtp_transport [--emails 50] [--pool-size 2] [--handshake-ms 40]
+"""
+
+import argparse
+import asyncio
+import os
+import smtplib
+import sys
+import threading
+import time
+from email.message import EmailMessage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.mail_transport import SMTPTransport
+
+
+class StandInSMTPServer:
+    """Serveur SMTP minimal (EHLO, AUTH PLAIN, MAIL, RCPT, DATA, NOOP, RSET, QUIT)."""
+
+    def __init__(self, handshake_ms: float):
+        self.handshake = handshake_ms / 1000
+        self.stats = {"connexions": 0, "ehlo": 0, "auth": 0, "messages": 0}
+        self.port = 0
+        self._writers = set()
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def stop(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def drop_all(self) -> None:
+        """Ferme toutes les connexions ouvertes, comme un relais après son délai d'inactivité."""
+        def _drop():
+            for writer in list(self._writers):
+                writer.close()
+        self._loop.call_soon_threadsafe(_drop)
+
+    async def _handle(self, reader, writer) -> None:
+        self._writers.add(writer)
+        self.stats["connexions"] += 1
+        try:
+            await asyncio.sleep(self.handshake)
+            writer.write(b"220 localhost ESMTP stand-in\r\n")
+            while line := await reader.readline():
+                command = line[:4].upper()
+                if command == b"EHLO":
+                    self.stats["ehlo"] += 1
+                    writer.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+                elif command == b"AUTH":
+                    self.stats["auth"] += 1
+                    writer.write(b"235 2.7.0 Authentication successful\r\n")
+                elif command == b"DATA":
+                    writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                    while (await reader.readline()) not in (b".\r\n", b""):
+                        pass
+                    self.stats["messages"] += 1
+                    writer.write(b"250 2.0.0 OK\r\n")
+                elif command == b"QUIT":
+                    writer.write(b"221 2.0.0 Bye\r\n")
+                    break
+                else:  # HELO, MAIL, RCPT, NOOP, RSET
+                    writer.write(b"250 OK\r\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def snapshot(self) -> dict:
+        return dict(self.stats)
+
+
+def make_message(i: int, attachment: bytes) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = f"Nouvelle commande - Client {i:03d} pour 2026-10-20"
+    msg["From"] = "commandes@example.com"
+    msg["To"] = "boulangerie@example.com"
+    msg.set_content("Bonjour,\n\nVeuillez trouver ci-joint le bon de commande.\n")
+    msg.add_attachment(attachment, maintype="application", subtype="pdf", filename=f"bon_commande_{i:03d}.pdf")
+    return msg
+
+
+def send_per_connection(port: int, msg: EmailMessage) -> None:
+    """Ancien chemin (services/send_email.py avant le pool), sans STARTTLS."""
+    with smtplib.SMTP("127.0.0.1", port) as server:
+        server.login("bench", "secret")
+        server.send_message(msg)
+
+
+async def watch_loop(stop: asyncio.Event) -> float:
+    """Retard maximal (ms) d'une tâche qui devrait se réveiller toutes les 5 ms."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        worst = max(worst, time.perf_counter() - start - 0.005)
+    return worst * 1000
+
+
+async def run_mode(label: str, server: StandInSMTPServer, send_all) -> None:
+    before = server.snapshot()
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await send_all()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lag_ms = await watcher
+    after = server.snapshot()
+    delta = {key: after[key] - before[key] for key in after}
+    print(f"{label:<28} {elapsed * 1000:>8.0f}ms {delta['connexions']:>10} {delta['auth']:>6} "
+          f"{delta['messages']:>9} {lag_ms:>9.0f}ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--emails", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--handshake-ms", type=float, default=40)
+    args = parser.parse_args()
+
+    server = StandInSMTPServer(args.handshake_ms)
+    server.start()
+    attachment = os.urandom(4 * 1024)
+    messages = [make_message(i, attachment) for i in range(args.emails)]
+    transport = SMTPTransport(host="127.0.0.1", port=server.port, username="bench", password="secret",
+                              starttls=False, pool_size=args.pool_size, max_idle=60, timeout=10)
+
+    async def old_path():
+        for msg in messages:
+            send_per_connection(server.port, msg)
+
+    async def pooled():
+        await asyncio.gather(*(transport.send(msg) for msg in messages))
+
+    print(f"{'mode':<28} {'durée':>10} {'connexions':>10} {'AUTH':>6} {'messages':>9} {'retard max':>11}")
+    await run_mode("connexion par email", server, old_path)
+    await run_mode(f"pool ({args.pool_size} connexions)", server, pooled)
+
+    # Connexions coupées côté serveur : le lot suivant doit se reconnecter sans erreur
+    server.drop_all()
+    await asyncio.sleep(0.1)
+    await run_mode("pool après coupure serveur", server, pooled)
+    await transport.close()
+    print(f"poignées de main du transport : {transport.handshakes}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+# benchmarks/bench_weasyprint_template.py
+"""
+Bon de commande WeasyPrint (services/pdf_generator.py), avant / après le gabarit compilé :
+- avant : HTML + CSS inline reconstruits en f-string, HTML(string=...).write_pdf()
+  (feuille de styles reparsée et polices résolues à chaque document),
+- après : gabarit Jinja compilé, CSS parsé une fois et FontConfiguration partagée.
+
+Mesure la construction du HTML seule, puis les PDF par seconde (si WeasyPrint
+et ses bibliothèques système, Pango notamment, sont installés).
+
+Usage : python -m benchmarks.bench_weasyprint_template [--orders 50] [--items 25]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.pdf_templates import render_order_html
+
+LEGACY_CSS = """
+            body { font-family: "Arial", sans-serif; margin: 40px; }
+            h1 { text-align: center; font-size: 2em; color: #444; }
+            .section { margin-bottom: 24px; }
+            .label { color: #666; font-size: 0.95em; }
+            .client-info { margin-bottom: 8px; }
+            table { width: 100%; border-collapse: collapse; margin-top: 16px; }
+            th, td { font-size: 1em; }
+            th { background-color: #f4f4f4; padding: 10px 8px; text-align: left; border-bottom: 2px solid #999; }
+"""
+
+
+def legacy_html(client_name, delivery_date, items) -> str:
+    """Ancienne construction du HTML (f-strings, CSS inline, noms non échappés)."""
+    table_rows = "\n".join(
+        f"""
+        <tr>
+            <td style="padding: 8px; border-bottom: 1px solid #ddd;">{item['name']}</td>
+            <td style="padding: 8px; border-bottom: 1px solid #ddd; text-align:center;">{item['quantity']}</td>
+        </tr>
+        """ for item in items
+    )
+    return f"""
+    <html>
+    <head><meta charset="utf-8"><style>{LEGACY_CSS}</style></head>
+    <body>
+        <h1>Bon de commande</h1>
+        <div class="section client-info">
+            <div><span class="label">Client :</span> <strong>{client_name}</strong></div>
+            <div><span class="label">Date de livraison :</span> <strong>{delivery_date}</strong></div>
+        </div>
+        <div class="section">
+            <table>
+                <thead><tr><th>Produit</th><th>Quantité</th></tr></thead>
+                <tbody>{table_rows}</tbody>
+            </table>
+        </div>
+    </body>
+    </html>
+    """
+
+
+def rate(label: str, fn, orders: int, unit: str) -> float:
+    fn(0)  # premier appel hors mesure (imports, compilation du gabarit)
+    start = time.perf_counter()
+    for i in range(orders):
+        fn(i)
+    per_second = orders / (time.perf_counter() - start)
+    print(f"{label:<34} {per_second:10.1f} {unit}/s")
+    return per_second
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=50)
+    parser.add_argument("--items", type=int, default=25)
+    args = parser.parse_args()
+
+    items = [{"name": f"Produit {i} & fils", "quantity": i % 7 + 1} for i in range(args.items)]
+    client = "Restaurant Le Soleil"
+    print(f"{args.orders} bons de commande de {args.items} articles\n")
+
+    rate("HTML avant (f-strings)", lambda i: legacy_html(client, "2026-10-20", items), args.orders * 100, "HTML")
+    rate("HTML après (Jinja compilé)", lambda i: render_order_html(client, "2026-10-20", items), args.orders * 100, "HTML")
+
+    try:
+        from weasyprint import HTML
+        from services.pdf_generator import generate_order_pdf
+    except (ImportError, OSError) as e:
+        print(f"\nWeasyPrint indisponible ({e}) : rendu PDF non mesuré")
+        return
+
+    before = rate("PDF avant (HTML(string) inline)", lambda i: HTML(string=legacy_html(client, "2026-10-20", items)).write_pdf(), args.orders, "PDF")
+    after = rate("PDF après (CSS + polices partagés)", lambda i: generate_order_pdf(client, "2026-10-20", items), args.orders, "PDF")
+    print(f"\nGain : x{after / before:.2f}")
+
+
+if __name__ == "__main__":
+    main()
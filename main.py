@@ -2,8 +2,15 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import Base, engine
-from routers import auth, clients, orders, messages, whatsapp, processed_orders
+from database import AsyncSessionLocal, Base, engine
+from migrations import run_migrations
+from routers import auth, clients, orders, messages, whatsapp, processed_orders, production_sheet, webhook
+from services.job_queue import JobWorkerPool, handle_whatsapp_jobs, record_whatsapp_failure
+from services.llm_client import close_llm_client
+from services.mail_transport import mail_transport
+from services.catalog_cache import catalog_cache
+from services.client_directory import client_directory
+from services.pdf_service import pdf_render_service
 
 # Création de l’application FastAPI
 app = FastAPI(
@@ -12,11 +19,29 @@ app = FastAPI(
     version="1.0.0",
 )
 
-# Création des tables avec moteur async au démarrage de l'app
+# Création des tables puis migrations de schéma (index, colonnes) au démarrage de l'app
 @app.on_event("startup")
 async def startup_event():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
+    # Annuaire des expéditeurs chargé d'avance : le premier message ne paie pas la requête
+    async with AsyncSessionLocal() as session:
+        await client_directory.load(session)
+    # Workers de traitement des messages WhatsApp mis en file par le webhook
+    app.state.job_workers = JobWorkerPool(handle_whatsapp_jobs, on_failure=record_whatsapp_failure)
+    app.state.job_workers.start()
+    # Workers de rendu PDF démarrés (polices et styles chargés) avant la première commande
+    await pdf_render_service.start()
+
+# Fermeture propre des connexions du pool à l'arrêt
+@app.on_event("shutdown")
+async def shutdown_event():
+    await app.state.job_workers.stop()
+    await pdf_render_service.stop()
+    await mail_transport.close()
+    await close_llm_client()
+    await engine.dispose()
 
 # Configuration CORS pour autoriser le frontend Render + local
 origins = [
@@ -36,12 +61,25 @@ app.add_middleware(
 # Inclusion des routes
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(clients.router, prefix="/clients", tags=["Clients"])
+# Commandes archivées et fiche de production avant /orders/{order_id}, sinon "processed" ou
+# "production-sheet" seraient lus comme un id
+app.include_router(processed_orders.router, prefix="/orders", tags=["Processed Orders"])
+app.include_router(production_sheet.router, prefix="/orders", tags=["Production"])
 app.include_router(orders.router, prefix="/orders", tags=["Orders"])
 app.include_router(messages.router, tags=["Messages"])
 app.include_router(whatsapp.router, tags=["WhatsApp"])
-app.include_router(processed_orders.router, prefix="/orders", tags=["Processed Orders"])
+app.include_router(webhook.router, tags=["Webhook"])
 
 # Route de test
 @app.get("/")
 def root():
     return {"message": "Bienvenue sur l'API Baguette & Bureau !"}
+
+# Supervision : compteurs des caches en mémoire (taux de hit, évictions) de ce processus
+@app.get("/health", tags=["Supervision"])
+def health():
+    return {
+        "status": "ok",
+        "catalog_cache": catalog_cache.stats(),
+        "client_directory": client_directory.stats(),
+    }
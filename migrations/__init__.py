@@ -0,0 +1,2 @@
+from .runner import run_migrations, applied_versions
+from .versions import MIGRATIONS
@@ -0,0 +1,56 @@
+# migrations/runner.py
+
+import logging
+from datetime import datetime, timezone
+from typing import List, Set
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, insert
+from sqlalchemy.engine import Connection
+
+from .versions import MIGRATIONS, Migration
+
+logger = logging.getLogger(__name__)
+
+# Table de suivi des versions de schéma, hors du Base des modèles
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def applied_versions(conn: Connection) -> Set[int]:
+    """Retourne les versions de schéma déjà appliquées sur cette base."""
+    if not inspect(conn).has_table(schema_migrations.name):
+        return set()
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def run_migrations(conn: Connection, migrations: List[Migration] = MIGRATIONS) -> List[int]:
+    """
+    Applique, dans l'ordre, les migrations pas encore enregistrées dans schema_migrations.
+    À appeler via `await conn.run_sync(run_migrations)` dans une transaction (engine.begin()).
+
+    Chaque migration est idempotente : sur une base neuve, create_all a déjà créé
+    colonnes et index, la migration ne fait alors qu'enregistrer sa version.
+
+    :return: Liste des versions appliquées lors de cet appel
+    """
+    _metadata.create_all(conn)
+    done = applied_versions(conn)
+    applied = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version in done:
+            continue
+        logger.info(f"Migration {migration.version} : {migration.name}")
+        migration.upgrade(conn)
+        conn.execute(insert(schema_migrations).values(
+            version=migration.version,
+            name=migration.name,
+            applied_at=datetime.now(timezone.utc),
+        ))
+        applied.append(migration.version)
+    return applied
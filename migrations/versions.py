@@ -0,0 +1,136 @@
+# migrations/versions.py
+
+from dataclasses import dataclass
+from typing import Callable, List
+
+from sqlalchemy import Column, Table, inspect, select, update, bindparam
+from sqlalchemy.engine import Connection
+
+
+@dataclass(frozen=True)
+class Migration:
+    """Une version de schéma : numéro croissant, description et fonction d'upgrade."""
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+# ------------------- HELPERS -------------------
+
+def add_column_if_missing(conn: Connection, table: Table, column_name: str) -> None:
+    """Ajoute à une base existante une colonne déclarée sur le modèle (ALTER TABLE)."""
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    if column_name in existing:
+        return
+    column: Column = table.c[column_name]
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column_name} {column_type}')
+
+
+def create_indexes(conn: Connection, table: Table, *index_names: str) -> None:
+    """Crée les index déclarés sur le modèle s'ils n'existent pas encore."""
+    indexes = {index.name: index for index in table.indexes}
+    for name in index_names:
+        indexes[name].create(conn, checkfirst=True)
+
+
+# ------------------- VERSIONS -------------------
+
+def _v1_composite_indexes(conn: Connection) -> None:
+    from models.client import Client
+    from models.message_log import MessageLog
+    from models.order import Order
+    from models.processed_order import ProcessedOrder
+
+    create_indexes(conn, Order.__table__, "ix_orders_owner_id_delivery_date")
+    create_indexes(conn, ProcessedOrder.__table__, "ix_processed_orders_owner_id_created_at")
+    create_indexes(conn, MessageLog.__table__, "ix_message_logs_client_id_created_at")
+    create_indexes(conn, Client.__table__, "ix_clients_owner_id_created_at")
+
+
+def backfill_phone_normalized(conn: Connection) -> None:
+    """Recalcule clients.phone_normalized depuis clients.phone avec la normalisation courante."""
+    from models.client import Client
+    from utils.phone import normalize_phone
+
+    clients = Client.__table__
+    rows = conn.execute(select(clients.c.id, clients.c.phone).where(clients.c.phone.is_not(None))).all()
+    if rows:
+        conn.execute(
+            update(clients).where(clients.c.id == bindparam("client_id")).values(phone_normalized=bindparam("normalized")),
+            [{"client_id": row.id, "normalized": normalize_phone(row.phone)} for row in rows],
+        )
+
+
+def _v2_client_phone_normalized(conn: Connection) -> None:
+    from models.client import Client
+
+    add_column_if_missing(conn, Client.__table__, "phone_normalized")
+    backfill_phone_normalized(conn)
+    create_indexes(conn, Client.__table__, "ix_clients_phone_normalized")
+
+
+def _v3_message_log_handled_by(conn: Connection) -> None:
+    from models.message_log import MessageLog
+
+    add_column_if_missing(conn, MessageLog.__table__, "handled_by")
+    create_indexes(conn, MessageLog.__table__, "ix_message_logs_handled_by")
+
+
+def _v4_webhook_job_dedup_key(conn: Connection) -> None:
+    from models.webhook_job import WebhookJob
+
+    add_column_if_missing(conn, WebhookJob.__table__, "dedup_key")
+    create_indexes(conn, WebhookJob.__table__, "ux_webhook_jobs_dedup_key")
+
+
+def _v5_client_phone_e164(conn: Connection) -> None:
+    backfill_phone_normalized(conn)
+
+
+def _v6_message_log_processed_order_id(conn: Connection) -> None:
+    from models.message_log import MessageLog
+
+    add_column_if_missing(conn, MessageLog.__table__, "processed_order_id")
+    create_indexes(conn, MessageLog.__table__, "ix_message_logs_processed_order_id")
+
+
+def _v7_message_log_model_routing(conn: Connection) -> None:
+    from models.message_log import MessageLog
+
+    for column_name in ("model", "latency_ms", "escalated", "escalation_reason"):
+        add_column_if_missing(conn, MessageLog.__table__, column_name)
+    create_indexes(conn, MessageLog.__table__, "ix_message_logs_model")
+
+
+def _v8_keyset_created_at_format(conn: Connection) -> None:
+    """
+    SQLite stocke les dates en texte : le défaut serveur écrit 'AAAA-MM-JJ HH:MM:SS', les valeurs
+    liées par SQLAlchemy (curseur de pagination, défaut Python) 'AAAA-MM-JJ HH:MM:SS.ffffff'.
+    Comparées comme chaînes, les deux formats cassent la pagination keyset sur created_at :
+    les lignes existantes sont réécrites au format des valeurs liées.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    for table in ("clients", "processed_orders"):
+        conn.exec_driver_sql(f"UPDATE {table} SET created_at = created_at || '.000000' WHERE length(created_at) = 19")
+
+
+def _v9_message_log_attempt_latency(conn: Connection) -> None:
+    from models.message_log import MessageLog
+
+    for column_name in ("fast_latency_ms", "strong_latency_ms"):
+        add_column_if_missing(conn, MessageLog.__table__, column_name)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "index composites (owner_id, date) et (client_id, created_at)", _v1_composite_indexes),
+    Migration(2, "colonne clients.phone_normalized indexée", _v2_client_phone_normalized),
+    Migration(3, "colonne message_logs.handled_by (parser / gpt)", _v3_message_log_handled_by),
+    Migration(4, "colonne webhook_jobs.dedup_key unique (idempotence du webhook)", _v4_webhook_job_dedup_key),
+    Migration(5, "clients.phone_normalized au format E.164", _v5_client_phone_e164),
+    Migration(6, "colonne message_logs.processed_order_id (messages regroupés)", _v6_message_log_processed_order_id),
+    Migration(7, "colonnes message_logs model / latency_ms / escalated (routage GPT)", _v7_message_log_model_routing),
+    Migration(8, "created_at de clients / processed_orders au format des curseurs (SQLite)", _v8_keyset_created_at_format),
+    Migration(9, "colonnes message_logs fast_latency_ms / strong_latency_ms (latence par modèle)", _v9_message_log_attempt_latency),
+]
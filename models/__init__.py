@@ -2,3 +2,7 @@ from .client import Client
 from .product import Product
 from .processed_order import ProcessedOrder
 from .message_log import MessageLog
+from .order import Order
+from .user import User
+from .webhook_job import WebhookJob
+from .llm_cache_entry import LLMCacheEntry
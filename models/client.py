@@ -1,8 +1,11 @@
 # models/client.py
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
-from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, func
+from sqlalchemy.orm import relationship, validates
 from database import Base
+from utils.phone import normalize_phone
 
 class Client(Base):
     """
@@ -10,17 +13,29 @@ class Client(Base):
     enregistré par un utilisateur (boulanger).
     """
     __tablename__ = "clients"
+    __table_args__ = (
+        # Listing paginé des clients d'un boulanger, trié par date de création
+        Index("ix_clients_owner_id_created_at", "owner_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String, nullable=False, index=True)   # nom du client, obligatoire
     email = Column(String, nullable=True)               # email du client, optionnel
     phone = Column(String, nullable=True)               # téléphone du client, optionnel
+    phone_normalized = Column(String, nullable=True, index=True)  # téléphone E.164, pour la recherche par expéditeur
     address = Column(String, nullable=True)             # adresse du client, optionnelle
-    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Défaut Python (microsecondes, format des valeurs liées) : clé de tri de la pagination keyset
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc), server_default=func.now())
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Relation ORM avec le propriétaire (boulanger)
     owner = relationship("User", backref="clients")
 
+    @validates("phone")
+    def _normalize_phone(self, key, value):
+        # Toute écriture ORM du téléphone tient la colonne normalisée à jour
+        self.phone_normalized = normalize_phone(value)
+        return value
+
     def __repr__(self):
         return f"<Client(id={self.id}, name='{self.name}', owner_id={self.owner_id})>"
\ No newline at end of file
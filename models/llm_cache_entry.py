@@ -0,0 +1,27 @@
+# models/llm_cache_entry.py
+
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, func
+from database import Base
+
+class LLMCacheEntry(Base):
+    """
+    Modèle SQLAlchemy du cache persistant des extractions GPT.
+
+    La clé est une empreinte du message normalisé, du catalogue du client et de la
+    version du prompt : un message identique (commande quotidienne répétée, relance
+    du webhook) réutilise la réponse au lieu de refaire un appel GPT.
+    """
+    __tablename__ = "llm_cache"
+
+    key = Column(String, primary_key=True, doc="SHA-256 (version du prompt, catalogue, message normalisé)")
+    client_id = Column(Integer, ForeignKey('clients.id', ondelete="CASCADE"), nullable=True, index=True)
+
+    payload = Column(Text, nullable=False, doc="Réponse JSON validée de GPT")
+    answered_on = Column(Date, nullable=False, doc="Jour de la réponse, référence pour recalculer les dates relatives")
+    hits = Column(Integer, nullable=False, default=0, doc="Nombre de réutilisations")
+
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True, doc="Dernier usage (éviction LRU)")
+
+    def __repr__(self):
+        return f"<LLMCacheEntry(key='{self.key[:12]}…', client_id={self.client_id}, hits={self.hits})>"
@@ -1,6 +1,6 @@
 # models/message_log.py
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, func
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -13,6 +13,10 @@ class MessageLog(Base):
     et établit une relation facultative vers le client identifié.
     """
     __tablename__ = "message_logs"
+    __table_args__ = (
+        # Historique des messages d'un client, du plus récent au plus ancien
+        Index("ix_message_logs_client_id_created_at", "client_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
@@ -20,18 +24,34 @@ class MessageLog(Base):
     message_text = Column(Text, nullable=False, doc="Contenu brut du message reçu")
     
     status = Column(String, nullable=False, doc=(
-        "Statut de l'analyse : 'commande détectée', 'pas une commande', 'erreur GPT', etc."
+        "Statut de l'analyse : 'commande détectée', 'date manquante', 'pas une commande', 'erreur GPT', etc."
     ))
     
     # Client lié, nullable si aucun client reconnu
     client_id = Column(Integer, ForeignKey('clients.id', ondelete="SET NULL"), nullable=True, index=True)
     
     processed_content = Column(Text, nullable=True, doc="Contenu structuré JSON ou texte, résultat de l'analyse GPT")
+
+    # Commande archivée issue de ce message (plusieurs messages d'une même conversation peuvent y mener)
+    processed_order_id = Column(Integer, ForeignKey('processed_orders.id', ondelete="SET NULL"), nullable=True, index=True)
+
+    handled_by = Column(String, nullable=True, index=True, doc=(
+        "Chemin d'analyse ayant traité le message : 'parser' (analyse locale), 'cache' (réponse GPT réutilisée) ou 'gpt'"
+    ))
+
+    # Routage des modèles GPT (services/model_router.py), pour suivre latence et taux d'escalade
+    model = Column(String, nullable=True, index=True, doc="Modèle dont la réponse a été retenue")
+    latency_ms = Column(Integer, nullable=True, doc="Temps total des appels GPT pour ce message (escalade comprise)")
+    escalated = Column(Boolean, nullable=True, doc="Réponse du modèle rapide rejetée, modèle fort appelé")
+    escalation_reason = Column(Text, nullable=True, doc="Motif du rejet de la réponse du modèle rapide")
+    fast_latency_ms = Column(Integer, nullable=True, doc="Latence de l'appel au modèle rapide")
+    strong_latency_ms = Column(Integer, nullable=True, doc="Latence de l'appel au modèle fort (coût de l'escalade), null sans escalade")
     
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), doc="Date/heure d'enregistrement")
 
     # Relation ORM vers le client (optionnelle)
     client = relationship("Client", backref="message_logs")
+    processed_order = relationship("ProcessedOrder", backref="message_logs")
 
     def __repr__(self):
         return f"<MessageLog(id={self.id}, sender_number='{self.sender_number}', status='{self.status}', created_at={self.created_at})>"
\ No newline at end of file
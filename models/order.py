@@ -1,6 +1,6 @@
 # models/order.py
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -18,6 +18,10 @@ class Order(Base):
     La commande est liée à un client et à l'utilisateur propriétaire (boulanger).
     """
     __tablename__ = "orders"
+    __table_args__ = (
+        # Listing paginé des commandes d'un boulanger, trié par date de livraison
+        Index("ix_orders_owner_id_delivery_date", "owner_id", "delivery_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     content = Column(String, nullable=False, doc="Contenu de la commande (désignation, quantités, etc.)")
@@ -1,6 +1,8 @@
 # models/processed_order.py
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, func
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, func
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -10,6 +12,10 @@ class ProcessedOrder(Base):
     Permet le suivi, la recherche et la gestion des PDF de commandes envoyées.
     """
     __tablename__ = "processed_orders"
+    __table_args__ = (
+        # Listing paginé des archives d'un boulanger, trié par date de création
+        Index("ix_processed_orders_owner_id_created_at", "owner_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
 
@@ -19,11 +25,21 @@ class ProcessedOrder(Base):
     owner_id = Column(Integer, ForeignKey('users.id', ondelete="SET NULL"), nullable=True, index=True)
 
     delivery_date = Column(DateTime(timezone=True), nullable=False, doc="Date de livraison demandée")
-    items = Column(Text, nullable=False, doc="Représentation JSON ou texte des produits commandés")
-    pdf_path = Column(String, nullable=True, doc="Chemin ou URL du PDF généré pour cette commande")
+    items = Column(Text, nullable=False, doc=(
+        "JSON des produits commandés : [{name, quantity, product_id}], "
+        "product_id null et unresolved=true si l'article ne correspond à aucun produit du client"
+    ))
+    pdf_path = Column(String, nullable=True, doc=(
+        "Chemin du PDF dans le stockage partagé (services/pdf_store.py) ; "
+        "null tant que personne ne l'a demandé, rendu alors à la première consultation"
+    ))
     status = Column(String, nullable=False, default="envoyé", doc="Statut de l'archive ('envoyé', 'erreur', 'en attente')")
 
-    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), doc="Date de création de l'archive")
+    # Défaut Python (microsecondes, format des valeurs liées) : clé de tri de la pagination keyset
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(), doc="Date de création de l'archive",
+    )
 
     # Relations ORM (optionnelles, utiles pour joints ou navigation)
     client = relationship("Client", backref="processed_orders")
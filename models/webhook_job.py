@@ -0,0 +1,38 @@
+# models/webhook_job.py
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, func
+from database import Base
+
+class WebhookJob(Base):
+    """
+    Modèle SQLAlchemy de la file de traitement des messages WhatsApp entrants.
+
+    Le webhook enregistre le message ici puis répond immédiatement ; des workers
+    asynchrones prennent les jobs en bail (lease), les traitent et les relancent
+    avec backoff en cas d'échec. Un job dont le bail expire (worker planté) est
+    automatiquement repris.
+    """
+    __tablename__ = "webhook_jobs"
+    __table_args__ = (
+        # Recherche du prochain job disponible par les workers
+        Index("ix_webhook_jobs_status_available_at", "status", "available_at"),
+        # Idempotence du webhook : une seule livraison par message (les retries du provider sont ignorés)
+        Index("ux_webhook_jobs_dedup_key", "dedup_key", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+
+    sender_number = Column(String, nullable=False, doc="Numéro WhatsApp de l'expéditeur")
+    message_text = Column(Text, nullable=False, doc="Contenu brut du message reçu")
+    dedup_key = Column(String, nullable=True, doc="Id du message chez le provider, ou empreinte expéditeur + texte + créneau horaire")
+
+    status = Column(String, nullable=False, default="pending", doc="Statut du job : 'pending', 'running', 'done', 'failed'")
+    attempts = Column(Integer, nullable=False, default=0, doc="Nombre de tentatives de traitement")
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), doc="Date à partir de laquelle le job peut être pris")
+    leased_until = Column(DateTime(timezone=True), nullable=True, doc="Fin du bail du worker qui traite le job")
+    last_error = Column(Text, nullable=True, doc="Dernière erreur rencontrée")
+
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), doc="Date de réception du message")
+
+    def __repr__(self):
+        return f"<WebhookJob(id={self.id}, sender_number='{self.sender_number}', status='{self.status}', attempts={self.attempts})>"
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
-from database import get_db
+from datetime import datetime
+from database import get_async_session
 from models.client import Client
 from models.user import User
+from schemas import Page
+from utils.phone import normalize_phone
+from services.client_directory import client_directory
+from services.catalog_cache import catalog_cache
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, apply_keyset, split_page
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from dotenv import load_dotenv
@@ -19,7 +26,7 @@ router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
 # Dépendance pour récupérer l'utilisateur courant
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_session)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Impossible de valider les identifiants.",
@@ -30,9 +37,9 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         user_id: int = int(payload.get("sub"))  # "sub" correspond à notre User.id
         if user_id is None:
             raise credentials_exception
-    except (JWTError, ValueError):
+    except (JWTError, ValueError, TypeError):
         raise credentials_exception
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise credentials_exception
     return user
@@ -55,49 +62,81 @@ class ClientUpdate(BaseModel):
 
 class ClientOut(ClientBase):
     id: int
-    created_at: str
+    created_at: datetime
 
     class Config:
         from_attributes = True  # Pydantic v2
 
 # === ROUTES CRUD ===
+# Chaque route fait un seul aller-retour SQL : contrôle du propriétaire dans le WHERE
+# et RETURNING au lieu de commit + refresh.
 @router.post("/clients/", response_model=ClientOut, status_code=status.HTTP_201_CREATED)
-def create_client(client: ClientCreate, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    db_client = Client(**client.dict(), owner_id=user.id)
-    db.add(db_client)
-    db.commit()
-    db.refresh(db_client)
+async def create_client(client: ClientCreate, db: AsyncSession = Depends(get_async_session), user: User = Depends(get_current_user)):
+    db_client = await db.scalar(
+        insert(Client)
+        .values(**client.dict(), phone_normalized=normalize_phone(client.phone), owner_id=user.id)
+        .returning(Client)
+    )
+    await db.commit()
+    # INSERT en masse : pas d'événement ORM, on tient l'annuaire des expéditeurs à jour à la main
+    client_directory.upsert(db_client.id, db_client.owner_id, db_client.name, db_client.phone_normalized)
     return db_client
 
-@router.get("/clients/", response_model=List[ClientOut])
-def get_clients(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    return db.query(Client).filter(Client.owner_id == user.id).order_by(Client.created_at.desc()).all()
+@router.get("/clients/", response_model=Page[ClientOut])
+async def get_clients(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Jeton next_cursor de la page précédente"),
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(get_current_user)
+):
+    try:
+        stmt = apply_keyset(select(Client).where(Client.owner_id == user.id), Client.created_at, Client.id, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result = await db.scalars(stmt)
+    items, next_cursor = split_page(result.all(), limit, key=lambda c: (c.created_at, c.id))
+    return {"items": items, "next_cursor": next_cursor}
 
 @router.put("/clients/{client_id}", response_model=ClientOut)
-def update_client(
+async def update_client(
     client_id: int = Path(..., gt=0),
     client: ClientUpdate = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user)
 ):
-    db_client = db.query(Client).filter(Client.id == client_id, Client.owner_id == user.id).first()
+    update_data = client.dict(exclude_unset=True)
+    if "phone" in update_data:
+        update_data["phone_normalized"] = normalize_phone(update_data["phone"])
+    if update_data:
+        stmt = (
+            update(Client)
+            .where(Client.id == client_id, Client.owner_id == user.id)
+            .values(**update_data)
+            .returning(Client)
+        )
+    else:
+        stmt = select(Client).where(Client.id == client_id, Client.owner_id == user.id)
+    db_client = await db.scalar(stmt)
     if db_client is None:
         raise HTTPException(status_code=404, detail="Client non trouvé")
-    for key, value in client.dict(exclude_unset=True).items():
-        setattr(db_client, key, value)
-    db.commit()
-    db.refresh(db_client)
+    await db.commit()
+    # UPDATE en masse : pas d'événement ORM, on invalide le catalogue (nom du client) à la main
+    catalog_cache.invalidate(client_id)
+    client_directory.upsert(db_client.id, db_client.owner_id, db_client.name, db_client.phone_normalized)
     return db_client
 
 @router.delete("/clients/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_client(
+async def delete_client(
     client_id: int = Path(..., gt=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user)
 ):
-    db_client = db.query(Client).filter(Client.id == client_id, Client.owner_id == user.id).first()
-    if db_client is None:
+    deleted_id = await db.scalar(
+        delete(Client).where(Client.id == client_id, Client.owner_id == user.id).returning(Client.id)
+    )
+    if deleted_id is None:
         raise HTTPException(status_code=404, detail="Client non trouvé")
-    db.delete(db_client)
-    db.commit()
+    await db.commit()
+    catalog_cache.invalidate(client_id)
+    client_directory.remove(client_id)
     return None
@@ -1,6 +1,5 @@
 # routers/messages.py
 
-import os
 from fastapi import APIRouter, HTTPException, Request, Depends
 from pydantic import BaseModel, constr
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,21 +7,19 @@ from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import NoResultFound
 from starlette.status import HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
-import openai
 from typing import List, Dict
 
 from database import get_async_session
 from models import Client, Product, ProcessedOrder, MessageLog
 
-from services.make_order_pdf import generate_order_pdf
+from services.pdf_service import OrderDocument, pdf_render_service
 from services.send_email import send_order_email
+from services.model_router import ExtractionError, route_extraction
+from services.catalog_cache import catalog_cache
+from services.client_directory import client_directory
+from services.message_handler import MISSING_DATE_STATUS, parse_delivery_date
 
 import json
-import re
-
-openai.api_key = os.getenv("OPENAI_API_KEY")
-if not openai.api_key:
-    raise RuntimeError("La clé OPENAI_API_KEY est requise dans .env")
 
 router = APIRouter(tags=["messages"])
 
@@ -30,125 +27,136 @@ class MessageProcessPayload(BaseModel):
     phone_number: constr(min_length=5)
     message: constr(min_length=1)
 
-def build_prompt(products: List[Product], user_message: str) -> str:
-    product_list_str = ", ".join(p.name for p in products)
-    prompt = (
-        "Tu es un assistant de commande pour une boulangerie.\n"
-        f"Les produits disponibles sont : {product_list_str}.\n"
-        "Analyse le message du client ci-dessous et dis :\n"
-        "- si c'est une commande ou pas,\n"
-        "- quels produits sont demandés et en quelle quantité,\n"
-        "- pour quelle date de livraison.\n\n"
-        f"Message du client : \"{user_message}\"\n\n"
-        "Réponds clairement selon ces points en JSON avec les clefs : is_order (bool), "
-        "order_details (liste d'objets {product, quantity}), delivery_date (date en ISO ou null).\n"
-    )
-    return prompt
-
 @router.post("/messages/process")
 async def process_message(payload: MessageProcessPayload, request: Request, session: AsyncSession = Depends(get_async_session)):
     phone = payload.phone_number.strip()
     msg = payload.message.strip()
 
     try:
-        query_client = await session.execute(
-            select(Client)
-            .where(Client.phone_number == phone)
-            .options(selectinload(Client.products))
-        )
-        client: Client = query_client.scalars().first()
+        # Expéditeur identifié par son numéro E.164, puis fiche complète par clé primaire
+        client_ref = await client_directory.resolve(session, phone)
+        client: Client = await session.get(Client, client_ref.id) if client_ref else None
         if not client:
             raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Client non trouvé")
+        # Produits du client depuis le cache de catalogue (requête seulement en cas de miss)
+        catalog = await catalog_cache.get(session, client)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erreur base de données: {e}")
 
-    products = client.products if client.products else []
-
-    prompt = build_prompt(products, msg)
+    # Gros catalogue : seuls les produits plausiblement cités vont dans le prompt
+    products, prompt = catalog.prompt_for(msg)
 
+    # Modèle rapide d'abord, modèle fort seulement si la réponse est invalide ou peu fiable
     try:
-        completion = await openai.ChatCompletion.acreate(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": msg}
-            ],
-            max_tokens=400,
-            temperature=0.2,
-        )
-        answer = completion.choices[0].message.content.strip()
+        routed = await route_extraction(catalog.client_name, products, prompt, msg, catalog)
+        response_json = routed.parsed
+        answer = json.dumps(response_json, ensure_ascii=False)
+    except ExtractionError as e:
+        routed = None
+        response_json = {"is_order": False}
+        answer = e.raw_reply
     except Exception as e:
         raise HTTPException(status_code=HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erreur GPT: {e}")
 
-    try:
-        response_json = json.loads(answer)
-    except Exception:
-        m = re.search(r"(\{.*\})", answer, re.DOTALL)
-        if not m:
-            response_json = {"is_order": False}
-        else:
-            try:
-                response_json = json.loads(m.group(1))
-            except Exception:
-                response_json = {"is_order": False}
-
+    # Contrat unique (schemas.OrderExtraction) : is_order, delivery_date, items [{name, quantity}]
     is_order = response_json.get("is_order", False)
-    order_details = response_json.get("order_details", [])
+    order_details = catalog.resolve_items(response_json.get("items", []))
     delivery_date = response_json.get("delivery_date", None)
+    delivery = parse_delivery_date(delivery_date)
+    routing_fields = {}
+    if routed is not None:
+        routing_fields = {
+            "handled_by": "gpt",
+            "model": routed.model,
+            "latency_ms": routed.latency_ms,
+            "fast_latency_ms": routed.fast_latency_ms,
+            "strong_latency_ms": routed.strong_latency_ms,
+            "escalated": routed.escalated,
+            "escalation_reason": "; ".join(routed.reasons) or None,
+        }
+
+    if is_order and delivery is None:
+        # Commande sans date exploitable : rien à archiver ni à envoyer, le message reste à compléter
+        try:
+            session.add(MessageLog(
+                client_id=client.id,
+                sender_number=phone,
+                message_text=msg,
+                status=MISSING_DATE_STATUS,
+                processed_content=answer,
+                **routing_fields,
+            ))
+            await session.commit()
+        except Exception:
+            await session.rollback()
+        return {"status": "date de livraison manquante"}
 
     if is_order:
+        if not client.email:
+            raise HTTPException(status_code=500, detail="Email du client non défini.")
+
+        # 1. La commande est enregistrée avant tout rendu : le PDF ne retarde plus le commit
         try:
             new_order = ProcessedOrder(
                 client_id=client.id,
-                products_ordered=json.dumps(order_details, ensure_ascii=False),
-                delivery_date=delivery_date,
-                original_message=msg,
+                owner_id=client.owner_id,
+                items=json.dumps(order_details, ensure_ascii=False),
+                delivery_date=delivery,
+                pdf_path=None,
+                status="en attente",
             )
             session.add(new_order)
-            await session.flush()  # pour récupérer l'ID
+            session.add(MessageLog(
+                client_id=client.id,
+                sender_number=phone,
+                message_text=msg,
+                status="commande détectée",
+                processed_content=answer,
+                processed_order=new_order,
+                **routing_fields,
+            ))
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            raise HTTPException(status_code=500, detail=f"Erreur traitement commande : {e}")
 
-            pdf_path = generate_order_pdf(
+        # 2. PDF (pool de processus, stockage partagé) puis envoi par email
+        try:
+            pdf_path = await pdf_render_service.render(OrderDocument(
                 client_name=client.name,
                 items=order_details,
                 delivery_date=delivery_date or "",
-                order_id=new_order.id
-            )
-
-            if not client.email:
-                raise HTTPException(status_code=500, detail="Email du client non défini.")
-
-            send_order_email(
+                order_id=new_order.id,
+            ))
+            await send_order_email(
                 to_email=client.email,
                 pdf_path=pdf_path,
                 client_name=client.name,
                 delivery_date=delivery_date or ""
             )
-
-            new_log = MessageLog(
-                client_id=client.id,
-                phone_number=phone,
-                message=msg,
-                is_order=True,
-                ai_response=answer,
-                processed_order=new_order
-            )
-            session.add(new_log)
+        except Exception as e:
+            # Commande conservée : le PDF reste disponible à la demande (GET /orders/processed/{id}/pdf)
+            new_order.status = "erreur"
             await session.commit()
+            raise HTTPException(status_code=500, detail=f"Erreur envoi commande : {e}")
 
-            return {"status": "commande enregistrée"}
-        except Exception as e:
-            await session.rollback()
-            raise HTTPException(status_code=500, detail=f"Erreur traitement commande : {e}")
+        new_order.pdf_path = pdf_path
+        new_order.status = "envoyé"
+        await session.commit()
+        return {"status": "commande enregistrée"}
 
 
     else:
         try:
             new_log = MessageLog(
                 client_id=client.id,
-                phone_number=phone,
-                message=msg,
-                is_order=False,
-                ai_response=answer,
+                sender_number=phone,
+                message_text=msg,
+                status="pas une commande" if routed is not None else "erreur GPT",
+                processed_content=answer,
+                **routing_fields,
             )
             session.add(new_log)
             await session.commit()
@@ -1,14 +1,17 @@
 # routers/orders.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Path
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query
+from sqlalchemy import select, insert, update, delete, literal
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
-from database import get_db
+from database import get_async_session
 from models.order import Order, OrderStatusEnum
 from models.client import Client
 from models.user import User
+from schemas import Page
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, apply_keyset, split_page
 
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
@@ -25,7 +28,7 @@ router = APIRouter()
 
 # --------------------------------------
 # Dépendance pour obtenir l'utilisateur courant via le JWT
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_session)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Impossible de valider les identifiants.",
@@ -38,7 +41,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise credentials_exception
     return user
@@ -69,88 +72,113 @@ class OrderOut(OrderBase):
 
 # --------------------------------------
 # ROUTES CRUD
+# Chaque route fait un seul aller-retour SQL : contrôle du propriétaire dans le WHERE
+# et RETURNING au lieu de commit + refresh.
 
 @router.post("/orders/", response_model=OrderOut, status_code=status.HTTP_201_CREATED, summary="Créer une commande")
-def create_order(
+async def create_order(
     order: OrderCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user)
 ):
     """
     Créer une commande liée à un client existant (doit appartenir à l'utilisateur connecté).
     """
-    client = db.query(Client).filter(Client.id == order.client_id, Client.owner_id == user.id).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client non trouvé ou non accessible")
-    db_order = Order(
-        content=order.content,
-        delivery_date=order.delivery_date,
-        status=order.status or OrderStatusEnum.en_attente,
-        client_id=order.client_id,
-        owner_id=user.id
+    # INSERT ... SELECT : la ligne n'est insérée que si le client appartient à l'utilisateur
+    owned_client = (
+        select(
+            literal(order.content),
+            literal(order.delivery_date, Order.delivery_date.type),
+            literal((order.status or OrderStatusEnum.en_attente).value),
+            Client.id,
+            literal(user.id),
+        )
+        .where(Client.id == order.client_id, Client.owner_id == user.id)
+    )
+    db_order = await db.scalar(
+        insert(Order)
+        .from_select(["content", "delivery_date", "status", "client_id", "owner_id"], owned_client)
+        .returning(Order)
     )
-    db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
+    if not db_order:
+        raise HTTPException(status_code=404, detail="Client non trouvé ou non accessible")
+    await db.commit()
     return db_order
 
-@router.get("/orders/", response_model=List[OrderOut], summary="Lister toutes les commandes utilisateur")
-def list_orders(
-    db: Session = Depends(get_db),
+@router.get("/orders/", response_model=Page[OrderOut], summary="Lister les commandes utilisateur (paginé)")
+async def list_orders(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Jeton next_cursor de la page précédente"),
+    db: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user)
 ):
     """
-    Lister toutes les commandes de l'utilisateur connecté.
+    Lister les commandes de l'utilisateur connecté, de la livraison la plus lointaine
+    à la plus ancienne, par pages de `limit` commandes (pagination par curseur).
     """
-    orders = db.query(Order).filter(Order.owner_id == user.id).order_by(Order.delivery_date.desc()).all()
-    return orders
+    try:
+        stmt = apply_keyset(select(Order).where(Order.owner_id == user.id), Order.delivery_date, Order.id, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    orders = await db.scalars(stmt)
+    items, next_cursor = split_page(orders.all(), limit, key=lambda o: (o.delivery_date, o.id))
+    return {"items": items, "next_cursor": next_cursor}
 
 @router.get("/orders/{order_id}", response_model=OrderOut, summary="Récupérer une commande par ID")
-def get_order(
+async def get_order(
     order_id: int = Path(..., gt=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user)
 ):
     """
     Récupérer une commande par son ID (seulement pour l'utilisateur propriétaire).
     """
-    db_order = db.query(Order).filter(Order.id == order_id, Order.owner_id == user.id).first()
+    db_order = await db.scalar(select(Order).where(Order.id == order_id, Order.owner_id == user.id))
     if not db_order:
         raise HTTPException(status_code=404, detail="Commande non trouvée")
     return db_order
 
 @router.put("/orders/{order_id}", response_model=OrderOut, summary="Mettre à jour une commande")
-def update_order(
+async def update_order(
     order_id: int = Path(..., gt=0),
     order_update: OrderUpdate = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user)
 ):
     """
     Modifier une commande (seul l'utilisateur propriétaire peut modifier).
     """
-    db_order = db.query(Order).filter(Order.id == order_id, Order.owner_id == user.id).first()
+    update_data = order_update.dict(exclude_unset=True) if order_update else {}
+    if "status" in update_data and update_data["status"] is not None:
+        update_data["status"] = update_data["status"].value
+    if update_data:
+        stmt = (
+            update(Order)
+            .where(Order.id == order_id, Order.owner_id == user.id)
+            .values(**update_data)
+            .returning(Order)
+        )
+    else:
+        stmt = select(Order).where(Order.id == order_id, Order.owner_id == user.id)
+    db_order = await db.scalar(stmt)
     if not db_order:
         raise HTTPException(status_code=404, detail="Commande non trouvée")
-    update_data = order_update.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_order, key, value)
-    db.commit()
-    db.refresh(db_order)
+    await db.commit()
     return db_order
 
 @router.delete("/orders/{order_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Supprimer une commande")
-def delete_order(
+async def delete_order(
     order_id: int = Path(..., gt=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user)
 ):
     """
     Supprimer une commande (seul l'utilisateur propriétaire peut supprimer).
     """
-    db_order = db.query(Order).filter(Order.id == order_id, Order.owner_id == user.id).first()
-    if not db_order:
+    deleted_id = await db.scalar(
+        delete(Order).where(Order.id == order_id, Order.owner_id == user.id).returning(Order.id)
+    )
+    if deleted_id is None:
         raise HTTPException(status_code=404, detail="Commande non trouvée")
-    db.delete(db_order)
-    db.commit()
-    return None
\ No newline at end of file
+    await db.commit()
+    return None
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, status
+import json
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List, Optional
+from typing import Optional
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -10,6 +14,10 @@ from models.processed_order import ProcessedOrder
 from models.client import Client
 from models.user import User
 from routers.auth import get_current_user
+from schemas import Page
+from services.pdf_service import OrderDocument, PDFServiceBusy, PDFServiceError, pdf_render_service
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, apply_keyset, split_page
+from utils.pdf_response import pdf_file_response
 
 router = APIRouter()
 
@@ -26,31 +34,79 @@ class ProcessedOrderOut(BaseModel):
 
 @router.get(
     "/orders/processed",
-    response_model=List[ProcessedOrderOut],
+    response_model=Page[ProcessedOrderOut],
     status_code=status.HTTP_200_OK,
     summary="Récupérer les commandes archivées de l'utilisateur connecté",
     tags=["Commandes archivées"]
 )
 async def get_processed_orders(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Jeton next_cursor de la page précédente"),
     db: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(ProcessedOrder).where(ProcessedOrder.owner_id == user.id).order_by(ProcessedOrder.created_at.desc())
+    # Un seul SELECT avec jointure sur le client : uniquement les colonnes projetées,
+    # sans hydrater d'entités ORM ni déclencher de chargement paresseux par ligne.
+    projection = (
+        select(
+            ProcessedOrder.id,
+            Client.name.label("client_name"),
+            ProcessedOrder.delivery_date,
+            ProcessedOrder.status,
+            ProcessedOrder.pdf_path,
+            ProcessedOrder.created_at,
+        )
+        .outerjoin(Client, Client.id == ProcessedOrder.client_id)
+        .where(ProcessedOrder.owner_id == user.id)
     )
-    orders = result.scalars().all()
-
-    response = []
-    for order in orders:
-        client_name = order.client.name if order.client else None
-        response.append(
-            ProcessedOrderOut(
-                id=order.id,
-                client_name=client_name,
-                delivery_date=order.delivery_date,
-                status=order.status,
-                pdf_path=order.pdf_path,
-                created_at=order.created_at
-            )
+    try:
+        stmt = apply_keyset(projection, ProcessedOrder.created_at, ProcessedOrder.id, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result = await db.execute(stmt)
+    rows, next_cursor = split_page(result.all(), limit, key=lambda row: (row.created_at, row.id))
+
+    return {"items": [row._asdict() for row in rows], "next_cursor": next_cursor}
+
+@router.get(
+    "/orders/processed/{order_id}/pdf",
+    response_class=FileResponse,
+    summary="Télécharger le bon de commande PDF d'une commande archivée",
+    tags=["Commandes archivées"]
+)
+async def get_processed_order_pdf(
+    order_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(get_current_user)
+):
+    row = (await db.execute(
+        select(ProcessedOrder, Client.name)
+        .outerjoin(Client, Client.id == ProcessedOrder.client_id)
+        .where(ProcessedOrder.id == order_id, ProcessedOrder.owner_id == user.id)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Commande introuvable")
+    order, client_name = row
+
+    # 1. Rendu paresseux : premier accès, ou fichier évincé du stockage depuis
+    path = order.pdf_path
+    if not path or not os.path.isfile(path):
+        document = OrderDocument(
+            client_name=client_name or "",
+            items=json.loads(order.items),
+            delivery_date=order.delivery_date.date().isoformat() if order.delivery_date else "",
+            order_id=order.id,
         )
-    return response
+        try:
+            path = await pdf_render_service.render(document)
+        except PDFServiceBusy as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+        except PDFServiceError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        if order.pdf_path != path:
+            order.pdf_path = path
+            await db.commit()
+
+    # 2. ETag / 304, Range : voir utils/pdf_response.py
+    return pdf_file_response(request, path, f"bon_commande_{order.id}.pdf")
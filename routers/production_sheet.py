@@ -0,0 +1,38 @@
+# routers/production_sheet.py
+
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_session
+from models.user import User
+from routers.auth import get_current_user
+from services.pdf_service import PDFServiceBusy, PDFServiceError, pdf_render_service
+from services.production_sheet import load_production_sheet
+from utils.pdf_response import pdf_file_response
+
+router = APIRouter()
+
+@router.get(
+    "/production-sheet",
+    response_class=FileResponse,
+    summary="Fiche de production PDF : toutes les commandes d'une date de livraison et les totaux par produit",
+    tags=["Production"]
+)
+async def get_production_sheet(
+    request: Request,
+    delivery_date: date = Query(..., description="Date de livraison (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_async_session),
+    user: User = Depends(get_current_user)
+):
+    sheet = await load_production_sheet(db, user.id, delivery_date)
+    # Rendu dans le pool de processus, réutilisé tant que les commandes du jour ne changent pas
+    try:
+        path = await pdf_render_service.render_production_sheet(sheet)
+    except PDFServiceBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except PDFServiceError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return pdf_file_response(request, path, f"fiche_production_{delivery_date.isoformat()}.pdf")
@@ -1,12 +1,13 @@
 # routers/webhook.py
 
-from fastapi import APIRouter, Request, HTTPException, status
-from pydantic import BaseModel, Field
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, Request, HTTPException, status
+from pydantic import AliasChoices, BaseModel, Field
+from typing import Dict, Any, Optional
 from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-# Placeholder pour l'import futur de process_whatsapp_message
-# from services.message_handler import process_whatsapp_message
+from database import get_async_session
+from services.webhook_dedup import dedup_key, enqueue_once
 
 router = APIRouter()
 
@@ -16,13 +17,23 @@ class WhatsAppWebhook(BaseModel):
     """
     from_: str = Field(..., alias='from', description="Numéro de l'expéditeur (ex: '+33612345678')")
     message: str = Field(..., description="Texte du message WhatsApp")
+    message_id: Optional[str] = Field(
+        None,
+        validation_alias=AliasChoices("id", "messageId", "message_id"),
+        description="Identifiant du message chez le provider (identique à chaque retry)",
+    )
+    timestamp: Optional[float] = Field(None, description="Horodatage d'envoi du message (secondes epoch)")
 
 @router.post("/webhook/whatsapp", summary="Webhook WhatsApp : message entrant")
-async def whatsapp_webhook(payload: WhatsAppWebhook):
+async def whatsapp_webhook(payload: WhatsAppWebhook, db: AsyncSession = Depends(get_async_session)):
     """
     Webhook appelé par UltraMsg ou Z-API à chaque message WhatsApp entrant.
-    Vérifie la présence des champs nécessaires, puis transmet le message 
-    à la logique de traitement (handlers externes).
+    Vérifie la présence des champs nécessaires, enregistre le message dans la file
+    de traitement (table webhook_jobs) et répond immédiatement : l'analyse GPT
+    et l'archivage sont faits par les workers (services/job_queue.py).
+
+    Idempotent : un retry du provider (même id de message, ou même expéditeur et
+    texte dans le même créneau) reçoit le job existant, sans nouveau traitement.
     """
     sender_number = payload.from_
     message_text = payload.message
@@ -34,14 +45,16 @@ async def whatsapp_webhook(payload: WhatsAppWebhook):
             detail="Le champ 'from' et 'message' sont obligatoires."
         )
 
-    # Appel de la fonction (à décommenter quand elle sera disponible)
-    # process_whatsapp_message(sender_number, message_text)
+    # Message persisté avant la réponse : il survit à un redémarrage du serveur
+    key = dedup_key(sender_number, message_text, payload.message_id, payload.timestamp)
+    job_id, created = await enqueue_once(db, sender_number, message_text, key)
 
     # Réponse adaptée, conforme aux attentes des providers webhook
     return JSONResponse(
         status_code=status.HTTP_200_OK,
         content={
-            "status": "received",
+            "status": "received" if created else "duplicate",
+            "job_id": job_id,
             "from": sender_number,
             "message": message_text
         }
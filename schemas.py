@@ -1,5 +1,6 @@
-from typing import Optional
-from pydantic import BaseModel, EmailStr, constr
+from datetime import date
+from typing import Generic, List, Optional, TypeVar, Union
+from pydantic import AliasChoices, BaseModel, ConfigDict, EmailStr, Field, PositiveFloat, PositiveInt, constr, model_validator
 
 # Schéma pour la création d'utilisateur (inscription)
 class UserCreate(BaseModel):
@@ -30,3 +31,38 @@ class UserOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+# Page de résultats paginée par curseur (keyset) : items + jeton de la page suivante
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+# Contrat de réponse GPT pour l'analyse d'une commande (utils/gpt_prompt.generate_prompt).
+# Les anciennes clés 'order_details' / 'product' sont acceptées, la sortie est toujours 'items' / 'name'.
+class ExtractedItem(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    name: constr(strip_whitespace=True, min_length=1) = Field(validation_alias=AliasChoices("name", "product"))
+    quantity: Union[PositiveInt, PositiveFloat]
+
+    @model_validator(mode="after")
+    def _integral_quantity(self):
+        # 12.0 -> 12 : les quantités sont des nombres d'articles
+        if isinstance(self.quantity, float) and self.quantity.is_integer():
+            self.quantity = int(self.quantity)
+        return self
+
+class OrderExtraction(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    is_order: bool
+    delivery_date: Optional[date] = None
+    items: List[ExtractedItem] = Field(default_factory=list, validation_alias=AliasChoices("items", "order_details"))
+
+    @model_validator(mode="after")
+    def _order_has_items(self):
+        if self.is_order and not self.items:
+            raise ValueError("commande sans articles")
+        return self
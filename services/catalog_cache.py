@@ -0,0 +1,203 @@
+# services/catalog_cache.py
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from dotenv import load_dotenv
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from models.client import Client
+from models.product import Product
+from services.client_directory import ClientRef
+from services.product_index import PROMPT_SHORTLIST_MIN_PRODUCTS, TrigramIndex
+from utils.gpt_prompt import generate_prompt
+
+# Configuration du cache depuis le .env
+load_dotenv()
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "1000"))
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "600"))  # secondes
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """Catalogue d'un client tel qu'utilisé pour construire les prompts GPT."""
+    client_id: int
+    client_name: str
+    products: Tuple[str, ...]
+    prompt: str          # sortie de generate_prompt, prête à l'emploi
+    catalog_hash: str    # empreinte du nom du client et de ses produits (clé du cache de réponses GPT)
+    expires_at: float
+    # Index de trigrammes des produits (présélection du prompt, résolution des product_id)
+    index: TrigramIndex = field(default_factory=TrigramIndex, compare=False, repr=False)
+
+    def prompt_for(self, message_text: str) -> Tuple[Tuple[str, ...], str]:
+        """
+        Produits et prompt système à utiliser pour ce message.
+        Pour un gros catalogue, seuls les produits présélectionnés par l'index de trigrammes
+        sont inclus ; si aucun ne ressort, on garde le catalogue complet.
+        """
+        if len(self.products) >= PROMPT_SHORTLIST_MIN_PRODUCTS:
+            shortlist = tuple(self.index.shortlist(message_text))
+            if shortlist:
+                return shortlist, generate_prompt(self.client_name, list(shortlist))
+        return self.products, self.prompt
+
+    def resolve_items(self, items: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Ajoute le product_id du catalogue à chaque article extrait (voir TrigramIndex.resolve_items)."""
+        return self.index.resolve_items(items)
+
+
+def catalog_fingerprint(client_name: str, products: Tuple[str, ...]) -> str:
+    """Empreinte stable des entrées du prompt système d'un client."""
+    raw = "\x1f".join((client_name, *products))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CatalogCache:
+    """
+    Cache en mémoire, par client, de la liste de produits et du prompt système pré-rendu.
+
+    - éviction LRU au-delà de `max_entries` clients,
+    - expiration après `ttl` secondes (filet de sécurité si plusieurs processus),
+    - mise à jour incrémentale quand un produit est ajouté, renommé ou supprimé,
+    - invalidation explicite quand le nom du client change ou qu'il est supprimé.
+    """
+
+    def __init__(self, max_entries: int = CATALOG_CACHE_SIZE, ttl: float = CATALOG_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, CatalogEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.updates = 0
+
+    async def get(self, session: AsyncSession, client: Union[Client, ClientRef]) -> CatalogEntry:
+        """
+        Retourne le catalogue du client, depuis le cache ou chargé en base (une requête).
+        Une entrée dont le nom de client ne correspond plus est considérée périmée.
+        """
+        entry = self._entries.get(client.id)
+        if entry is not None and entry.expires_at > time.monotonic() and entry.client_name == client.name:
+            self._entries.move_to_end(client.id)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        rows = (await session.execute(
+            select(Product.id, Product.name).where(Product.client_id == client.id).order_by(Product.id)
+        )).all()
+        entry = self._build(client.id, client.name, TrigramIndex(rows), time.monotonic() + self.ttl)
+        self._store(entry)
+        return entry
+
+    @staticmethod
+    def _build(client_id: int, client_name: str, index: TrigramIndex, expires_at: float) -> CatalogEntry:
+        products = index.product_names
+        return CatalogEntry(
+            client_id=client_id,
+            client_name=client_name,
+            products=products,
+            prompt=generate_prompt(client_name, list(products)),
+            catalog_hash=catalog_fingerprint(client_name, products),
+            expires_at=expires_at,
+            index=index,
+        )
+
+    def _store(self, entry: CatalogEntry) -> None:
+        self._entries[entry.client_id] = entry
+        self._entries.move_to_end(entry.client_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def apply_product_change(self, client_id: Optional[int], product_id: int, name: Optional[str]) -> None:
+        """
+        Répercute l'ajout / le renommage (name) ou la suppression (name=None) d'un produit
+        sur le catalogue en cache : l'index n'est mis à jour que pour ce produit.
+        """
+        entry = self._entries.get(client_id) if client_id is not None else None
+        if entry is None:
+            return
+        if name is None:
+            entry.index.remove(product_id)
+        else:
+            entry.index.add(product_id, name)
+        self._entries[client_id] = self._build(entry.client_id, entry.client_name, entry.index, entry.expires_at)
+        self.updates += 1
+
+    def invalidate(self, client_id: Optional[int]) -> None:
+        """Oublie le catalogue d'un client (produits ou nom modifiés, client supprimé)."""
+        if client_id is not None and self._entries.pop(client_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Compteurs exposés pour le suivi (taux de hit du cache)."""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "updates": self.updates,
+        }
+
+
+catalog_cache = CatalogCache()
+
+
+# ------------------- INVALIDATION -------------------
+# Les écritures ORM sur Product sont notées au flush et appliquées au cache au commit
+# (ignorées en cas de rollback). Les écritures sur Client invalident le cache.
+# Les UPDATE/DELETE en masse (routers/clients.py) appellent invalidate() explicitement.
+
+_PENDING_CHANGES = "catalog_cache_changes"
+
+
+def _queue_product_change(target: Product, client_id: Optional[int], name: Optional[str]) -> None:
+    session = object_session(target)
+    if session is None:
+        catalog_cache.invalidate(client_id)
+        return
+    session.info.setdefault(_PENDING_CHANGES, []).append((client_id, target.id, name))
+
+
+@event.listens_for(Product, "after_insert")
+@event.listens_for(Product, "after_update")
+def _product_saved(mapper, connection, target: Product) -> None:
+    # Produit déplacé vers un autre client : on le retire de l'ancien catalogue
+    for old_client_id in inspect(target).attrs.client_id.history.deleted or ():
+        _queue_product_change(target, old_client_id, None)
+    _queue_product_change(target, target.client_id, target.name)
+
+
+@event.listens_for(Product, "after_delete")
+def _product_deleted(mapper, connection, target: Product) -> None:
+    _queue_product_change(target, target.client_id, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_product_changes(session: Session) -> None:
+    for client_id, product_id, name in session.info.pop(_PENDING_CHANGES, []):
+        catalog_cache.apply_product_change(client_id, product_id, name)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_product_changes(session: Session) -> None:
+    session.info.pop(_PENDING_CHANGES, None)
+
+
+@event.listens_for(Client, "after_update")
+@event.listens_for(Client, "after_delete")
+def _invalidate_client(mapper, connection, target: Client) -> None:
+    catalog_cache.invalidate(target.id)
@@ -0,0 +1,146 @@
+# services/client_directory.py
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from models.client import Client
+from utils.phone import normalize_phone
+
+# Configuration de l'annuaire depuis le .env
+load_dotenv()
+CLIENT_DIRECTORY_TTL = float(os.getenv("CLIENT_DIRECTORY_TTL", "300"))  # secondes, rechargement complet
+
+
+@dataclass(frozen=True)
+class ClientRef:
+    """Ce que le traitement d'un message doit savoir du client expéditeur (mêmes attributs que Client)."""
+    id: int
+    owner_id: int
+    name: str
+
+
+class ClientDirectory:
+    """
+    Annuaire en mémoire : numéro E.164 -> client, pour identifier l'expéditeur d'un
+    message WhatsApp sans requête en base.
+
+    - chargé en une requête au premier appel (ou au démarrage via load()),
+    - tenu à jour à chaque création / modification / suppression de client,
+    - rechargé entièrement après `ttl` secondes (filet de sécurité si plusieurs processus).
+    Si plusieurs clients partagent un numéro, le plus ancien (plus petit id) l'emporte,
+    comme la requête qu'il remplace.
+    """
+
+    def __init__(self, ttl: float = CLIENT_DIRECTORY_TTL):
+        self.ttl = ttl
+        self._by_phone: Dict[str, Dict[int, ClientRef]] = {}
+        self._phone_of: Dict[int, str] = {}  # client_id -> numéro indexé
+        self._expires_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._expires_at > time.monotonic()
+
+    async def load(self, session: AsyncSession) -> None:
+        """(Re)charge tout l'annuaire : une requête sur les clients ayant un numéro."""
+        rows = (await session.execute(
+            select(Client.id, Client.owner_id, Client.name, Client.phone_normalized)
+            .where(Client.phone_normalized.is_not(None))
+        )).all()
+        self._by_phone.clear()
+        self._phone_of.clear()
+        for row in rows:
+            self.upsert(row.id, row.owner_id, row.name, row.phone_normalized)
+        self._expires_at = time.monotonic() + self.ttl
+        self.reloads += 1
+
+    async def resolve(self, session: AsyncSession, sender_number: str) -> Optional[ClientRef]:
+        """Client correspondant au numéro de l'expéditeur, ou None (sans requête si l'annuaire est chargé)."""
+        if not self.loaded:
+            await self.load(session)
+        clients = self._by_phone.get(normalize_phone(sender_number) or "")
+        if not clients:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return clients[min(clients)]
+
+    def upsert(self, client_id: int, owner_id: int, name: str, phone_normalized: Optional[str]) -> None:
+        """Ajoute ou met à jour un client (changement de numéro compris)."""
+        self.remove(client_id)
+        if phone_normalized:
+            self._by_phone.setdefault(phone_normalized, {})[client_id] = ClientRef(client_id, owner_id, name)
+            self._phone_of[client_id] = phone_normalized
+
+    def remove(self, client_id: int) -> None:
+        phone = self._phone_of.pop(client_id, None)
+        if phone is None:
+            return
+        clients = self._by_phone.get(phone, {})
+        clients.pop(client_id, None)
+        if not clients:
+            self._by_phone.pop(phone, None)
+
+    def clear(self) -> None:
+        self._by_phone.clear()
+        self._phone_of.clear()
+        self._expires_at = 0.0
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._phone_of), "hits": self.hits, "misses": self.misses, "reloads": self.reloads}
+
+
+client_directory = ClientDirectory()
+
+
+# ------------------- MISE À JOUR -------------------
+# Les écritures ORM sur Client sont notées au flush et appliquées au commit (ignorées en cas
+# de rollback). Les INSERT/UPDATE/DELETE en masse (routers/clients.py) appellent
+# upsert() / remove() explicitement.
+
+_PENDING_CHANGES = "client_directory_changes"
+_Change = Tuple[int, Optional[Tuple[int, str, Optional[str]]]]
+
+
+def _queue_change(target: Client, values: Optional[Tuple[int, str, Optional[str]]]) -> None:
+    session = object_session(target)
+    if session is None:
+        client_directory.clear()
+        return
+    pending: List[_Change] = session.info.setdefault(_PENDING_CHANGES, [])
+    pending.append((target.id, values))
+
+
+@event.listens_for(Client, "after_insert")
+@event.listens_for(Client, "after_update")
+def _client_saved(mapper, connection, target: Client) -> None:
+    _queue_change(target, (target.owner_id, target.name, target.phone_normalized))
+
+
+@event.listens_for(Client, "after_delete")
+def _client_deleted(mapper, connection, target: Client) -> None:
+    _queue_change(target, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_client_changes(session: Session) -> None:
+    for client_id, values in session.info.pop(_PENDING_CHANGES, []):
+        if values is None:
+            client_directory.remove(client_id)
+        else:
+            client_directory.upsert(client_id, *values)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_client_changes(session: Session) -> None:
+    session.info.pop(_PENDING_CHANGES, None)
@@ -1,19 +1,17 @@
 # services/email_sender.py
 
+import asyncio
 import os
-import smtplib
 from email.message import EmailMessage
 from dotenv import load_dotenv
 
-# Charger les variables d'environnement SMTP
+from services.mail_transport import mail_transport
+
+# Expéditeur depuis le .env (serveur et identifiants SMTP : voir services/mail_transport.py)
 load_dotenv()
-SMTP_SERVER = os.getenv("SMTP_SERVER")
-SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
-SMTP_USERNAME = os.getenv("SMTP_USERNAME")
-SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 FROM_EMAIL = os.getenv("FROM_EMAIL")
 
-def send_order_email(to_email: str, client_name: str, delivery_date: str, pdf_bytes: bytes):
+async def send_order_email(to_email: str, client_name: str, delivery_date: str, pdf_bytes: bytes):
     """
     Envoie par email un bon de commande PDF en pièce jointe à l'adresse spécifiée.
 
@@ -54,12 +52,9 @@ def send_order_email(to_email: str, client_name: str, delivery_date: str, pdf_by
         filename=filename
     )
 
-    # Envoyer le mail via SMTP (STARTTLS)
+    # Envoyer le mail via une connexion du pool SMTP (STARTTLS), sans bloquer la boucle
     try:
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.send_message(msg)
+        await mail_transport.send(msg)
     except Exception as e:
         # Logging pro à mettre ici selon la stack, pour l'instant on lève l'erreur
         raise RuntimeError(f"Erreur lors de l'envoi du mail : {e}")
@@ -68,9 +63,9 @@ def send_order_email(to_email: str, client_name: str, delivery_date: str, pdf_by
 if __name__ == "__main__":
     with open("example.pdf", "rb") as f:
         pdf_bytes = f.read()
-    send_order_email(
+    asyncio.run(send_order_email(
         to_email="boulangerie@example.com",
         client_name="Restaurant Le Soleil",
         delivery_date="2024-07-01",
         pdf_bytes=pdf_bytes
-    )
\ No newline at end of file
+    ))
\ No newline at end of file
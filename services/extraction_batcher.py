@@ -0,0 +1,159 @@
+# services/extraction_batcher.py
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+from services.llm_client import LLM_FAST_MODEL, get_llm_client
+from utils.gpt_prompt import generate_batch_prompt
+from utils.llm_json import LLMReplyError, extract_json_object, validate_order_payload
+
+logger = logging.getLogger(__name__)
+
+# Configuration du regroupement depuis le .env
+load_dotenv()
+GPT_BATCH_WINDOW_MS = float(os.getenv("GPT_BATCH_WINDOW_MS", "300"))
+GPT_BATCH_MAX_SIZE = int(os.getenv("GPT_BATCH_MAX_SIZE", "10"))
+
+
+@dataclass
+class _PendingExtraction:
+    """Message en attente d'analyse : de quoi construire l'appel unitaire ou sa ligne dans le lot."""
+    id: str
+    client_name: str
+    products: Sequence[str]
+    system_prompt: str
+    message_text: str
+    future: asyncio.Future = field(repr=False)
+
+
+class ExtractionBatcher:
+    """
+    Regroupe les analyses GPT des messages arrivés presque en même temps
+    (pic du matin) en une seule requête structurée :
+    - collecte pendant GPT_BATCH_WINDOW_MS, ou jusqu'à GPT_BATCH_MAX_SIZE messages,
+    - un seul appel avec un résultat par identifiant de message,
+    - chaque appelant récupère sa propre réponse JSON,
+    - si la réponse groupée est illisible ou incomplète, les messages concernés
+      repassent par un appel unitaire avec le prompt de leur client.
+    """
+
+    def __init__(self, window_ms: float = GPT_BATCH_WINDOW_MS, max_size: int = GPT_BATCH_MAX_SIZE,
+                 model: str = LLM_FAST_MODEL):
+        self.window = window_ms / 1000
+        self.max_size = max(1, max_size)
+        self.model = model
+        self._pending: List[_PendingExtraction] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self._next_id = 0
+
+    async def extract(self, client_name: str, products: Sequence[str], system_prompt: str, message_text: str) -> str:
+        """
+        Analyse un message et retourne la réponse JSON brute de GPT le concernant
+        (même format qu'un appel unitaire avec system_prompt).
+
+        :raises LLMError: si l'appel à l'API échoue
+        """
+        loop = asyncio.get_running_loop()
+        self._next_id += 1
+        pending = _PendingExtraction(
+            id=str(self._next_id),
+            client_name=client_name,
+            products=products,
+            system_prompt=system_prompt,
+            message_text=message_text,
+            future=loop.create_future(),
+        )
+        self._pending.append(pending)
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await pending.future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            # Référence conservée : une tâche sans référence peut être collectée en cours de route
+            task = asyncio.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[_PendingExtraction]) -> None:
+        leftovers = batch
+        if len(batch) > 1:
+            try:
+                results = await self._send_batch(batch)
+                leftovers = []
+                for pending in batch:
+                    result = results.get(pending.id)
+                    if result is None:
+                        leftovers.append(pending)
+                    else:
+                        self._resolve(pending, json.dumps(result, ensure_ascii=False))
+                if leftovers:
+                    logger.warning(f"{len(leftovers)} message(s) sans résultat dans le lot, repli en appels unitaires")
+            except Exception as e:
+                logger.warning(f"Réponse groupée inexploitable ({e}), repli en {len(batch)} appels unitaires")
+        await asyncio.gather(*(self._send_one(pending) for pending in leftovers))
+
+    async def _send_batch(self, batch: List[_PendingExtraction]) -> Dict[str, dict]:
+        """Un seul appel pour tout le lot ; retourne les résultats valides indexés par id de message."""
+        payload = [
+            {"id": p.id, "client": p.client_name, "products": list(p.products), "message": p.message_text}
+            for p in batch
+        ]
+        reply = await get_llm_client().chat(
+            model=self.model,
+            temperature=0.2,
+            messages=[
+                {"role": "system", "content": generate_batch_prompt()},
+                {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+            ],
+        )
+        results = extract_json_object(reply)["results"]
+        by_id = {}
+        for result in results:
+            if not isinstance(result, dict) or "id" not in result:
+                continue
+            try:
+                by_id[str(result["id"])] = validate_order_payload(result)
+            except LLMReplyError:
+                # Résultat non conforme : ce message repassera en appel unitaire
+                continue
+        return by_id
+
+    async def _send_one(self, pending: _PendingExtraction) -> None:
+        try:
+            reply = await get_llm_client().chat(
+                model=self.model,
+                temperature=0.2,
+                messages=[
+                    {"role": "system", "content": pending.system_prompt},
+                    {"role": "user", "content": pending.message_text},
+                ],
+            )
+        except Exception as e:
+            if not pending.future.done():
+                pending.future.set_exception(e)
+            return
+        self._resolve(pending, reply)
+
+    @staticmethod
+    def _resolve(pending: _PendingExtraction, reply: str) -> None:
+        # L'appelant a pu être annulé entre-temps (arrêt des workers)
+        if not pending.future.done():
+            pending.future.set_result(reply)
+
+
+extraction_batcher = ExtractionBatcher()
@@ -0,0 +1,100 @@
+# services/extraction_cache.py
+
+import hashlib
+import json
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.llm_cache_entry import LLMCacheEntry
+from services.order_parser import find_delivery_dates, normalize_text
+from utils.gpt_prompt import PROMPT_VERSION
+
+# Configuration du cache depuis le .env
+load_dotenv()
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_message(text: str) -> str:
+    """Forme canonique d'un message pour la clé de cache : casse, accents, ponctuation et espaces repliés."""
+    return _SPACES.sub(" ", _PUNCTUATION.sub(" ", normalize_text(text))).strip()
+
+
+def cache_key(message_text: str, catalog_hash: str) -> str:
+    """Clé de cache : version du prompt + empreinte du catalogue + message normalisé."""
+    raw = "\x1f".join((PROMPT_VERSION, catalog_hash, normalize_message(message_text)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _rebase_delivery_date(payload: Dict[str, Any], message_text: str, today: date) -> Optional[Dict[str, Any]]:
+    """
+    Recalcule la date de livraison par rapport à aujourd'hui plutôt que de rejouer celle
+    d'origine : 'demain' mis en cache hier doit désigner le lendemain d'aujourd'hui.
+    - date trouvée dans le texte (jj/mm, demain, mercredi...) : on la résout à nouveau,
+    - pas de date dans la réponse : rejouée telle quelle,
+    - date déduite par GPT de mots que l'analyse locale ne sait pas dater ("le 20 octobre",
+      "samedi en huit") ou indices contradictoires : None, l'entrée est traitée comme absente
+      (une date absolue ne doit pas être décalée, une date relative ne peut pas être rejouée).
+    """
+    payload = dict(payload)
+    if not payload.get("delivery_date"):
+        return payload
+    cues = find_delivery_dates(message_text, today)
+    if cues.resolved is None or cues.conflicting:
+        return None
+    payload["delivery_date"] = cues.resolved.isoformat()
+    return payload
+
+
+async def get_cached_extraction(session: AsyncSession, key: str, message_text: str, today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+    """
+    Retourne l'extraction mise en cache pour cette clé (dates recalculées), ou None
+    (absente, ou date impossible à recalculer : voir _rebase_delivery_date).
+    Met à jour le compteur de hits et la date de dernier usage (LRU).
+    """
+    entry = await session.get(LLMCacheEntry, key)
+    if entry is None:
+        return None
+    payload = _rebase_delivery_date(json.loads(entry.payload), message_text, today or date.today())
+    if payload is None:
+        return None
+    await session.execute(
+        update(LLMCacheEntry)
+        .where(LLMCacheEntry.key == key)
+        .values(hits=LLMCacheEntry.hits + 1, last_used_at=datetime.now(timezone.utc))
+    )
+    return payload
+
+
+async def store_extraction(session: AsyncSession, key: str, client_id: Optional[int], payload: Dict[str, Any]) -> None:
+    """
+    Enregistre une extraction GPT validée puis applique la limite de taille :
+    les entrées les moins récemment utilisées au-delà de LLM_CACHE_MAX_ENTRIES sont supprimées.
+    Pas de commit ici : l'appelant commite avec le reste du traitement.
+    """
+    now = datetime.now(timezone.utc)
+    await session.merge(LLMCacheEntry(
+        key=key,
+        client_id=client_id,
+        payload=json.dumps(payload, ensure_ascii=False),
+        answered_on=date.today(),
+        hits=0,
+        created_at=now,
+        last_used_at=now,
+    ))
+    await session.flush()
+    overflow = (
+        select(LLMCacheEntry.key)
+        .order_by(LLMCacheEntry.last_used_at.desc())
+        .offset(LLM_CACHE_MAX_ENTRIES)
+        .scalar_subquery()
+    )
+    await session.execute(delete(LLMCacheEntry).where(LLMCacheEntry.key.in_(overflow)))
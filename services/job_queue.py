@@ -0,0 +1,246 @@
+# services/job_queue.py
+
+import asyncio
+import logging
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal
+from models.webhook_job import WebhookJob
+from services.message_handler import process_whatsapp_messages, record_processing_failure
+from services.order_parser import is_closing_message
+
+logger = logging.getLogger(__name__)
+
+# Configuration de la file depuis le .env
+load_dotenv()
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "2"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "300"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+# Regroupement des messages envoyés en plusieurs fois par un même expéditeur
+COALESCE_WINDOW_SECONDS = float(os.getenv("COALESCE_WINDOW_SECONDS", "8"))
+COALESCE_MAX_WAIT_SECONDS = float(os.getenv("COALESCE_MAX_WAIT_SECONDS", "30"))
+
+# Un handler reçoit les jobs d'un même expéditeur, dans l'ordre d'arrivée
+JobHandler = Callable[[List[WebhookJob]], Awaitable[None]]
+# Appelé avec les jobs passés en 'failed' (tentatives épuisées) et la dernière erreur
+FailureHandler = Callable[[List[WebhookJob], str], Awaitable[None]]
+
+# Réveille les workers en attente dès qu'un job est ajouté
+_job_available = asyncio.Event()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite rend des datetimes naïfs (stockés en UTC)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _leasable(now: datetime):
+    """Jobs prêts à être pris : en attente et disponibles, ou en cours avec un bail expiré (worker planté)."""
+    return or_(
+        and_(WebhookJob.status == "pending", WebhookJob.available_at <= now),
+        and_(WebhookJob.status == "running", WebhookJob.leased_until < now),
+    )
+
+
+def _first_attempt():
+    """Messages encore jamais traités (fenêtre de regroupement) ; exclut les reprises en backoff."""
+    return and_(WebhookJob.status == "pending", WebhookJob.attempts == 0)
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff exponentiel avec jitter : base * 2^(n-1), ±50 %, plafonné."""
+    delay = min(JOB_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), JOB_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.5)
+
+
+# ------------------- FILE -------------------
+
+async def enqueue_message(session: AsyncSession, sender_number: str, message_text: str,
+                          dedup_key: Optional[str] = None) -> int:
+    """
+    Enregistre un message entrant dans la file et retourne l'id du job.
+    Le commit est fait ici : le message est durable avant la réponse au webhook.
+
+    Fenêtre glissante par expéditeur : le message et ceux du même expéditeur encore
+    en attente ne sont disponibles qu'après COALESCE_WINDOW_SECONDS sans nouveau message
+    (au plus COALESCE_MAX_WAIT_SECONDS après le premier), ou tout de suite si le message
+    clôt la conversation ("... merci"). Ils sont alors traités ensemble (lease_next_jobs).
+
+    :param dedup_key: clé d'idempotence (unique) ; IntegrityError si le message est déjà en file
+    """
+    now = _now()
+    waiting = and_(WebhookJob.sender_number == sender_number, _first_attempt())
+    if COALESCE_WINDOW_SECONDS <= 0 or is_closing_message(message_text):
+        available_at = now
+    else:
+        available_at = now + timedelta(seconds=COALESCE_WINDOW_SECONDS)
+        first_received = await session.scalar(select(func.min(WebhookJob.created_at)).where(waiting))
+        if first_received is not None:
+            available_at = min(available_at, _as_utc(first_received) + timedelta(seconds=COALESCE_MAX_WAIT_SECONDS))
+
+    # Les messages en attente du même expéditeur suivent la nouvelle échéance
+    await session.execute(update(WebhookJob).where(waiting).values(available_at=available_at))
+    job_id = await session.scalar(
+        insert(WebhookJob)
+        .values(
+            sender_number=sender_number,
+            message_text=message_text,
+            dedup_key=dedup_key,
+            status="pending",
+            attempts=0,
+            available_at=available_at,
+            created_at=now,
+        )
+        .returning(WebhookJob.id)
+    )
+    await session.commit()
+    _job_available.set()
+    return job_id
+
+
+async def lease_next_jobs(session: AsyncSession) -> List[WebhookJob]:
+    """
+    Prend en bail le plus ancien job disponible et tous les jobs en attente du même
+    expéditeur (messages envoyés en plusieurs fois), en un seul UPDATE ... RETURNING.
+    Les jobs en reprise n'y sont ajoutés qu'une fois leur backoff écoulé (_leasable).
+    Le WHERE est répété dans l'UPDATE : si deux workers visent les mêmes jobs,
+    un seul les obtient. Liste vide si rien n'est disponible.
+    """
+    now = _now()
+    candidate_sender = (
+        select(WebhookJob.sender_number).where(_leasable(now)).order_by(WebhookJob.id).limit(1).scalar_subquery()
+    )
+    result = await session.scalars(
+        update(WebhookJob)
+        .where(WebhookJob.sender_number == candidate_sender, or_(_first_attempt(), _leasable(now)))
+        .values(
+            status="running",
+            attempts=WebhookJob.attempts + 1,
+            leased_until=now + timedelta(seconds=JOB_LEASE_SECONDS),
+        )
+        .returning(WebhookJob)
+    )
+    jobs = sorted(result.all(), key=lambda job: job.id)
+    await session.commit()
+    return jobs
+
+
+async def complete_jobs(session: AsyncSession, job_ids: List[int]) -> None:
+    await session.execute(
+        update(WebhookJob).where(WebhookJob.id.in_(job_ids)).values(status="done", leased_until=None, last_error=None)
+    )
+    await session.commit()
+
+
+async def fail_job(session: AsyncSession, job: WebhookJob, error: str) -> str:
+    """
+    Replanifie le job avec backoff, ou le marque 'failed' après JOB_MAX_ATTEMPTS tentatives.
+
+    :return: nouveau statut du job ('pending' ou 'failed')
+    """
+    if job.attempts >= JOB_MAX_ATTEMPTS:
+        values = {"status": "failed", "leased_until": None, "last_error": error}
+    else:
+        values = {
+            "status": "pending",
+            "leased_until": None,
+            "last_error": error,
+            "available_at": _now() + timedelta(seconds=retry_delay(job.attempts)),
+        }
+    await session.execute(update(WebhookJob).where(WebhookJob.id == job.id).values(**values))
+    await session.commit()
+    return values["status"]
+
+
+# ------------------- WORKERS -------------------
+
+class JobWorkerPool:
+    """
+    Pool de workers asynchrones qui vident la file webhook_jobs.
+    Démarré au lancement de l'application, arrêté proprement à sa fermeture.
+    """
+
+    def __init__(self, handler: JobHandler, workers: int = WEBHOOK_WORKERS, session_factory=AsyncSessionLocal,
+                 on_failure: Optional[FailureHandler] = None):
+        self.handler = handler
+        self.on_failure = on_failure
+        self.workers = workers
+        self.session_factory = session_factory
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._tasks = [asyncio.create_task(self._run(i), name=f"webhook-worker-{i}") for i in range(self.workers)]
+        logger.info(f"{self.workers} workers de traitement des messages démarrés")
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        _job_available.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _wait_for_jobs(self) -> None:
+        _job_available.clear()
+        try:
+            await asyncio.wait_for(_job_available.wait(), timeout=JOB_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self, worker_id: int) -> None:
+        while not self._stopping.is_set():
+            try:
+                async with self.session_factory() as session:
+                    jobs = await lease_next_jobs(session)
+                if not jobs:
+                    await self._wait_for_jobs()
+                    continue
+                await self._process(jobs)
+            except Exception as e:
+                # Erreur de la file elle-même (base indisponible...) : on patiente avant de réessayer
+                logger.error(f"Worker {worker_id} : erreur de la file de jobs : {e}")
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+
+    async def _process(self, jobs: List[WebhookJob]) -> None:
+        try:
+            await self.handler(jobs)
+        except Exception as e:
+            ids = ", ".join(str(job.id) for job in jobs)
+            logger.warning(f"Job(s) {ids} en échec (tentative {jobs[0].attempts}) : {e}")
+            async with self.session_factory() as session:
+                failed = [job for job in jobs if await fail_job(session, job, str(e)) == "failed"]
+            if failed and self.on_failure:
+                try:
+                    await self.on_failure(failed, str(e))
+                except Exception as hook_err:
+                    logger.error(f"Job(s) {ids} : échec non enregistré : {hook_err}")
+            return
+        async with self.session_factory() as session:
+            await complete_jobs(session, [job.id for job in jobs])
+
+
+async def handle_whatsapp_jobs(jobs: List[WebhookJob]) -> None:
+    """
+    Handler par défaut : analyse des messages WhatsApp d'un expéditeur, ensemble (GPT + archivage).
+    Les erreurs d'API ou de base remontent : le job est replanifié avec backoff (fail_job).
+    """
+    await process_whatsapp_messages(jobs[0].sender_number, [job.message_text for job in jobs], raise_errors=True)
+
+
+async def record_whatsapp_failure(jobs: List[WebhookJob], error: str) -> None:
+    """Tentatives épuisées : un MessageLog 'erreur GPT' par message, pour le suivi du boulanger."""
+    await record_processing_failure(jobs[0].sender_number, [job.message_text for job in jobs], f"API error: {error}")
@@ -0,0 +1,145 @@
+# services/llm_client.py
+
+import asyncio
+import logging
+import os
+import random
+from typing import Dict, List, Optional
+
+import httpx
+import openai
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# Configuration du client LLM depuis le .env
+load_dotenv()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")  # surchargeable (stub local en test)
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_RETRY_BASE_SECONDS = float(os.getenv("OPENAI_RETRY_BASE_SECONDS", "0.5"))
+
+# Modèles : le rapide / économique d'abord, le plus fort en cas d'escalade (services/model_router.py)
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-3.5-turbo")
+LLM_STRONG_MODEL = os.getenv("LLM_STRONG_MODEL", "gpt-4")
+
+# Erreurs transitoires pour lesquelles on retente (429, 5xx, timeout, réseau)
+_RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+)
+
+
+class LLMError(Exception):
+    """Exception levée quand l'appel au LLM échoue définitivement."""
+    pass
+
+
+class LLMClient:
+    """
+    Client OpenAI asynchrone partagé par toute l'application :
+    - connexions HTTP réutilisées (keep-alive) via un httpx.AsyncClient unique,
+    - timeout par appel,
+    - retries avec backoff exponentiel et jitter sur 429 / 5xx / erreurs réseau,
+    - nombre de requêtes en vol plafonné par un sémaphore.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = OPENAI_API_KEY,
+        base_url: str = OPENAI_BASE_URL,
+        timeout: float = OPENAI_TIMEOUT,
+        max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+        max_retries: int = OPENAI_MAX_RETRIES,
+    ):
+        if not api_key:
+            raise LLMError("La clé OPENAI_API_KEY est requise dans .env")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            timeout=timeout,
+        )
+        # Les retries sont gérés ici (jitter + sémaphore libéré pendant l'attente), pas par le SDK
+        self._client = openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=timeout,
+            max_retries=0,
+            http_client=self._http,
+        )
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """
+        Envoie une requête chat completion et retourne le texte de la réponse.
+
+        :param messages: Messages au format OpenAI ({"role": ..., "content": ...})
+        :param model: Nom du modèle (ex: "gpt-3.5-turbo")
+        :param timeout: Timeout de cet appel en secondes (défaut : OPENAI_TIMEOUT)
+        :raises LLMError: si l'appel échoue après tous les retries
+        """
+        options = {"model": model, "messages": messages, "temperature": temperature}
+        if max_tokens is not None:
+            options["max_tokens"] = max_tokens
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    completion = await self._client.chat.completions.create(
+                        **options, timeout=timeout or self.timeout
+                    )
+                return (completion.choices[0].message.content or "").strip()
+            except _RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise LLMError(f"Appel {model} en échec après {attempt + 1} tentatives : {e}")
+                delay = self._retry_delay(attempt, e)
+                logger.warning(f"Appel {model} en échec ({e}), nouvelle tentative dans {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except openai.OpenAIError as e:
+                raise LLMError(f"Appel {model} refusé : {e}")
+
+    @staticmethod
+    def _retry_delay(attempt: int, error: Exception) -> float:
+        """Respecte Retry-After si le serveur l'indique, sinon backoff exponentiel avec jitter complet."""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return random.uniform(0, OPENAI_RETRY_BASE_SECONDS * (2 ** attempt))
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+_llm_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """Retourne le client LLM partagé (créé au premier appel)."""
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClient()
+    return _llm_client
+
+
+async def close_llm_client() -> None:
+    """Ferme les connexions HTTP du client partagé (arrêt de l'application)."""
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.aclose()
+        _llm_client = None
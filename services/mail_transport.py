@@ -0,0 +1,172 @@
+# services/mail_transport.py
+
+import asyncio
+import logging
+import os
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# Configuration SMTP depuis le .env
+load_dotenv()
+SMTP_SERVER = os.getenv("SMTP_SERVER")
+SMTP_PORT = int(os.getenv("SMTP_PORT") or "587")
+SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+# Au-delà, une connexion inactive est vérifiée (NOOP) avant d'être réutilisée
+SMTP_MAX_IDLE_SECONDS = float(os.getenv("SMTP_MAX_IDLE_SECONDS", "60"))
+
+# Erreurs après lesquelles la connexion est perdue : on en ouvre une nouvelle et on renvoie
+_DISCONNECTED_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+# Refus du serveur sur ce message : la connexion reste utilisable
+_MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+class MailTransportError(RuntimeError):
+    """Exception levée quand un email ne peut pas être envoyé."""
+    pass
+
+
+class SMTPTransport:
+    """
+    Transport SMTP partagé par toute l'application :
+    - petit pool de connexions gardées ouvertes, déjà passées en TLS (STARTTLS) et authentifiées :
+      la poignée de main n'est payée qu'une fois par connexion, pas à chaque email,
+    - connexion inactive depuis plus de max_idle vérifiée (NOOP) avant réutilisation,
+      reconnexion et nouvel essai si le serveur l'a fermée entre-temps,
+    - envoi dans un thread : `await send(msg)` ne bloque pas la boucle d'événements,
+      au plus pool_size envois simultanés.
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = SMTP_SERVER,
+        port: int = SMTP_PORT,
+        username: Optional[str] = SMTP_USERNAME,
+        password: Optional[str] = SMTP_PASSWORD,
+        starttls: bool = SMTP_STARTTLS,
+        pool_size: int = SMTP_POOL_SIZE,
+        max_idle: float = SMTP_MAX_IDLE_SECONDS,
+        timeout: float = SMTP_TIMEOUT,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.pool_size = pool_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.handshakes = 0  # connexions ouvertes depuis le démarrage (EHLO, STARTTLS, AUTH)
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+        self._slots = asyncio.Semaphore(pool_size)
+
+    # ------------------- CONNEXIONS (thread) -------------------
+
+    def _connect(self) -> smtplib.SMTP:
+        if not self.host:
+            raise MailTransportError("Veuillez définir toutes les variables SMTP dans le fichier .env")
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.ehlo()
+            if self.starttls:
+                server.starttls()  # sécuriser la connexion
+                server.ehlo()
+            if self.username:
+                server.login(self.username, self.password or "")
+        except Exception:
+            self._discard(server)
+            raise
+        with self._lock:
+            self.handshakes += 1
+        return server
+
+    @staticmethod
+    def _discard(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    @staticmethod
+    def _alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _checkout(self) -> smtplib.SMTP:
+        """Connexion la plus récemment utilisée si elle est encore valide, sinon une nouvelle."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, last_used = self._idle.pop()
+            if time.monotonic() - last_used < self.max_idle or self._alive(server):
+                return server
+            self._discard(server)
+        return self._connect()
+
+    def _checkin(self, server: smtplib.SMTP) -> None:
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append((server, time.monotonic()))
+                return
+        self._discard(server)
+
+    def _send_sync(self, msg: EmailMessage) -> None:
+        server = self._checkout()
+        try:
+            try:
+                server.send_message(msg)
+            except _DISCONNECTED_ERRORS:
+                # Connexion fermée par le serveur (inactivité, redémarrage) : une seule nouvelle tentative
+                logger.info("Connexion SMTP fermée par le serveur, reconnexion")
+                server.close()
+                server = self._connect()
+                server.send_message(msg)
+        except _MESSAGE_ERRORS:
+            self._checkin(server)
+            raise
+        except Exception:
+            self._discard(server)
+            raise
+        self._checkin(server)
+
+    # ------------------- API ASYNCHRONE -------------------
+
+    async def send(self, msg: EmailMessage) -> None:
+        """
+        Envoie l'email via une connexion du pool, sans bloquer la boucle.
+
+        :raises MailTransportError: si l'envoi échoue (SMTP ou réseau)
+        """
+        async with self._slots:
+            try:
+                await asyncio.to_thread(self._send_sync, msg)
+            except MailTransportError:
+                raise
+            except smtplib.SMTPException as e:
+                raise MailTransportError(f"Erreur SMTP lors de l'envoi : {e}")
+            except OSError as e:
+                raise MailTransportError(f"Serveur SMTP injoignable : {e}")
+
+    async def close(self) -> None:
+        """Ferme les connexions inactives (arrêt de l'application)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            await asyncio.to_thread(self._discard, server)
+
+
+mail_transport = SMTPTransport()
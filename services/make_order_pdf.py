@@ -1,21 +1,29 @@
-import os
-from typing import List, Dict
+from typing import BinaryIO, List, Dict, Optional, Union
+from xml.sax.saxutils import escape
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 
-def generate_order_pdf(client_name: str, items: List[Dict], delivery_date: str, order_id: int) -> str:
-    # Crée le dossier generated_pdfs s'il n'existe pas
-    output_dir = os.path.abspath("generated_pdfs")
-    os.makedirs(output_dir, exist_ok=True)
+# À incrémenter à chaque modification visible du document (clé du stockage des PDF)
+LAYOUT_VERSION = "2"
 
-    filename = f"commande_{order_id}.pdf"
-    filepath = os.path.join(output_dir, filename)
+def generate_order_pdf(client_name: str, items: List[Dict], delivery_date: str, order_id: Optional[int] = None) -> str:
+    """
+    Retourne le chemin du bon de commande PDF (moteur ReportLab), partagé par toutes les
+    commandes identiques : voir services/pdf_renderers.order_pdf_path.
 
+    order_id n'est plus imprimé (il rendrait chaque document unique) ; gardé pour les appelants.
+    """
+    from services.pdf_renderers import OrderDocument, get_renderer, order_pdf_path
+
+    return order_pdf_path(OrderDocument(client_name, items, delivery_date, order_id), get_renderer("reportlab"))
+
+def write_order_pdf(client_name: str, items: List[Dict], delivery_date: str, stream: Union[str, BinaryIO]) -> None:
+    """Mise en page ReportLab du bon de commande, écrite dans un fichier ou un flux binaire."""
     # Création document PDF
-    doc = SimpleDocTemplate(filepath, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
+    doc = SimpleDocTemplate(stream, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
 
     styles = getSampleStyleSheet()
     normal_style = styles["Normal"]
@@ -25,13 +33,13 @@ def generate_order_pdf(client_name: str, items: List[Dict], delivery_date: str,
     elements = []
 
     # Titre
-    elements.append(Paragraph(f"Commande N° {order_id}", heading_style))
+    elements.append(Paragraph("Bon de commande", heading_style))
     elements.append(Spacer(1, 12))
 
     # Infos client et date livraison
     info_style = ParagraphStyle(name="InfoStyle", parent=normal_style, fontSize=12, leading=15)
-    elements.append(Paragraph(f"<b>Client :</b> {client_name}", info_style))
-    elements.append(Paragraph(f"<b>Date de livraison :</b> {delivery_date}", info_style))
+    elements.append(Paragraph(f"<b>Client :</b> {escape(client_name)}", info_style))
+    elements.append(Paragraph(f"<b>Date de livraison :</b> {escape(delivery_date)}", info_style))
     elements.append(Spacer(1, 20))
 
     # Tableau des articles
@@ -58,6 +66,4 @@ def generate_order_pdf(client_name: str, items: List[Dict], delivery_date: str,
     elements.append(table)
 
     # Générer le pdf
-    doc.build(elements)
-
-    return filepath
\ No newline at end of file
+    doc.build(elements)
\ No newline at end of file
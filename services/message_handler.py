@@ -1,136 +1,225 @@
 # services/message_handler.py
 
-import os
-import openai
+import asyncio
 import json
-from sqlalchemy.orm import Session
-from database import SessionLocal
-from models.client import Client
-from models.product import Product
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal
 from models.processed_order import ProcessedOrder
 from models.message_log import MessageLog  # Import du modèle MessageLog
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Sequence
 from utils.gpt_prompt import generate_prompt
-from dotenv import load_dotenv
+from services.model_router import ExtractionError, RoutedExtraction, route_extraction
+from services.catalog_cache import CatalogEntry, catalog_cache
+from services.client_directory import ClientRef, client_directory
+from services.order_parser import PARSER_MIN_CONFIDENCE, mentions_usual_order, parse_order
+from services.product_index import TrigramIndex
+from services.extraction_cache import cache_key, get_cached_extraction, store_extraction
 
-# Charger la clé API OpenAI depuis le .env
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-openai.api_key = OPENAI_API_KEY
+# Statut du log d'une commande comprise sans date de livraison exploitable : pas d'archive
+# ProcessedOrder (delivery_date obligatoire), la date reste à demander au client
+MISSING_DATE_STATUS = "date manquante"
 
-def process_whatsapp_message(sender_number: str, message_text: str) -> Optional[Dict[str, Any]]:
+def parse_delivery_date(value: Optional[str]) -> Optional[datetime]:
+    """Convertit la date 'YYYY-MM-DD' renvoyée par GPT en datetime (colonne DateTime), None si absente ou invalide."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+async def _last_order_items(db: AsyncSession, client_id: int) -> Optional[List[Dict[str, Any]]]:
+    """Articles de la dernière commande archivée du client (pour « comme d'habitude »)."""
+    items_json = await db.scalar(
+        select(ProcessedOrder.items)
+        .where(ProcessedOrder.client_id == client_id)
+        .order_by(ProcessedOrder.created_at.desc(), ProcessedOrder.id.desc())
+        .limit(1)
+    )
+    try:
+        return json.loads(items_json) if items_json else None
+    except ValueError:
+        return None
+
+def _record_result(db: AsyncSession, sender_number: str, message_texts: Sequence[str], client: Optional[ClientRef],
+                   parsed: Dict[str, Any], handled_by: str, catalog: Optional[CatalogEntry] = None,
+                   routing: Optional[RoutedExtraction] = None) -> None:
+    """
+    Ajoute un MessageLog par message reçu et, si c'est une commande datée, l'archive ProcessedOrder
+    à laquelle tous ces messages sont liés (sans commit). Sans date exploitable : logs
+    MISSING_DATE_STATUS, sans archive.
+    Chaque article reçoit le product_id du catalogue du client, ou est marqué "unresolved".
+    `routing` (réponses GPT) : modèle retenu, latence et escalade, enregistrés dans le log.
+    """
+    order = None
+    status_val = "pas une commande"
+    if parsed.get("is_order"):
+        items = parsed.get("items") or []
+        parsed["items"] = catalog.resolve_items(items) if catalog else TrigramIndex().resolve_items(items)
+        delivery_date = parse_delivery_date(parsed.get("delivery_date"))
+
+        if delivery_date is None:
+            status_val = MISSING_DATE_STATUS
+        else:
+            # --- Archivage ProcessedOrder si commande ---
+            order = ProcessedOrder(
+                client_id=client.id if client else None,
+                owner_id=client.owner_id if client else None,
+                delivery_date=delivery_date,
+                items=json.dumps(parsed["items"], ensure_ascii=False),
+                pdf_path=None,  # rendu à la première consultation (GET /orders/processed/{id}/pdf)
+                status="envoyé"
+            )
+            db.add(order)
+            status_val = "commande détectée"
+
+    processed_content = json.dumps(parsed, ensure_ascii=False)
+
+    # Sauvegarde MessageLog
+    for message_text in message_texts:
+        db.add(MessageLog(
+            sender_number=sender_number,
+            message_text=message_text,
+            status=status_val,
+            client_id=client.id if client else None,
+            processed_content=processed_content,
+            handled_by=handled_by,
+            processed_order=order,
+            model=routing.model if routing else None,
+            latency_ms=routing.latency_ms if routing else None,
+            fast_latency_ms=routing.fast_latency_ms if routing else None,
+            strong_latency_ms=routing.strong_latency_ms if routing else None,
+            escalated=routing.escalated if routing else None,
+            escalation_reason="; ".join(routing.reasons) or None if routing else None,
+        ))
+
+def _record_error(db: AsyncSession, sender_number: str, message_texts: Sequence[str], client_id: Optional[int],
+                  details: str) -> None:
+    """Ajoute un MessageLog 'erreur GPT' par message reçu (sans commit)."""
+    for message_text in message_texts:
+        db.add(MessageLog(
+            sender_number=sender_number,
+            message_text=message_text,
+            status="erreur GPT",
+            client_id=client_id,
+            processed_content=details,
+            handled_by="gpt"
+        ))
+
+async def process_whatsapp_message(sender_number: str, message_text: str) -> Optional[Dict[str, Any]]:
+    """Analyse un message WhatsApp isolé (voir process_whatsapp_messages)."""
+    return await process_whatsapp_messages(sender_number, [message_text])
+
+async def record_processing_failure(sender_number: str, message_texts: Sequence[str], details: str) -> None:
+    """Enregistre l'échec définitif de l'analyse de ces messages (un MessageLog 'erreur GPT' chacun)."""
+    async with AsyncSessionLocal() as db:
+        client = await client_directory.resolve(db, sender_number)
+        _record_error(db, sender_number, message_texts, client.id if client else None, details)
+        await db.commit()
+
+async def process_whatsapp_messages(sender_number: str, message_texts: Sequence[str],
+                                    raise_errors: bool = False) -> Optional[Dict[str, Any]]:
     """
     Analyse un message WhatsApp envoyé par un client professionnel :
-    - Recherche le client par numéro de téléphone.
+    - Identifie le client par son numéro E.164 (annuaire en mémoire, sans requête).
     - Récupère la liste personnalisée de ses produits.
+    - Tente une analyse locale rapide (services/order_parser.py) et n'appelle GPT
+      que si elle n'est pas assez sûre d'elle.
+    - Réutilise une réponse GPT déjà obtenue pour le même message et le même
+      catalogue (services/extraction_cache.py).
     - Génère un prompt pour GPT adapté à ce client.
-    - Appelle l'API OpenAI pour structurer le message.
+    - Appelle l'API OpenAI pour structurer le message : modèle rapide d'abord, groupé
+      avec les messages arrivés au même moment (services/extraction_batcher.py), modèle
+      fort seulement si la réponse est invalide ou peu fiable (services/model_router.py).
     - Archive la commande dans la base via ProcessedOrder (si commande).
     - Enregistre un log de message dans MessageLog à chaque appel.
     - Retourne le JSON structuré attendu, ou None si client non trouvé.
 
+    Les messages envoyés coup sur coup par un même expéditeur ("Bonjour", "10 baguettes",
+    "pour demain merci", regroupés par la file de jobs) sont analysés ensemble comme
+    un seul texte ; chacun garde son MessageLog, lié à la commande résultante.
+
     :param sender_number: Numéro WhatsApp de l'expéditeur (+336xxxxxxxx)
-    :param message_text: Message WhatsApp reçu
+    :param message_texts: Message(s) WhatsApp reçu(s), dans l'ordre d'arrivée
+    :param raise_errors: erreur d'API ou d'écriture propagée sans log (file de jobs : nouvel essai
+                         avec backoff) ; sinon enregistrée en 'erreur GPT' et signalée dans le retour
     :return: dict structuré ou None si client non trouvé ou erreur API/parsing
     """
-    db: Session = SessionLocal()
-    try:
-        # 1. Recherche du client par numéro
-        client: Optional[Client] = db.query(Client).filter(Client.phone == sender_number).first()
+    message_text = "\n".join(message_texts)
+    async with AsyncSessionLocal() as db:
+        # 1. Recherche du client par numéro (annuaire en mémoire)
+        client = await client_directory.resolve(db, sender_number)
 
         # 2. Si client inexistant, on peut continuer (client_id = None)
         client_id = client.id if client else None
+        key = None
         
-        # 3. Récupération liste produits si client connu
-        product_list: List[str] = []
+        # 3-4. Liste produits et prompt système du client, depuis le cache de catalogue
         if client:
-            products_qs = db.query(Product).filter(Product.client_id == client.id).all()
-            product_list = [p.name for p in products_qs]
+            catalog = await catalog_cache.get(db, client)
+            # Gros catalogue : seuls les produits plausiblement cités vont dans le prompt
+            client_name = catalog.client_name
+            products, prompt = catalog.prompt_for(message_text)
 
-        # 4. Génération prompt système
-        prompt = generate_prompt(client.name if client else "client inconnu", product_list)
+            # Analyse locale des messages formulaires : pas d'appel GPT si elle est sûre d'elle
+            usual_items = await _last_order_items(db, client.id) if mentions_usual_order(message_text) else None
+            fast = parse_order(message_text, catalog.products, usual_items=usual_items)
+            if fast.confidence >= PARSER_MIN_CONFIDENCE:
+                _record_result(db, sender_number, message_texts, client, fast.payload, handled_by="parser", catalog=catalog)
+                await db.commit()
+                return fast.payload
 
-        # 5. Appel API OpenAI GPT
-        try:
-            completion = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                temperature=0.2,
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": message_text}
-                ]
-            )
-            gpt_reply = completion['choices'][0]['message']['content'].strip()
+            # Réponse GPT déjà en cache pour ce message et ce catalogue (dates recalculées)
+            key = cache_key(message_text, catalog.catalog_hash)
+            cached = await get_cached_extraction(db, key, message_text)
+            if cached is not None:
+                _record_result(db, sender_number, message_texts, client, cached, handled_by="cache", catalog=catalog)
+                await db.commit()
+                return cached
+        else:
+            catalog = None
+            client_name, products = "client inconnu", ()
+            prompt = generate_prompt(client_name, [])
 
-            # 6. Parsing réponse JSON
+        # 5. Appel API OpenAI GPT : modèle rapide (appels regroupés), escalade vers le modèle fort
+        #    si sa réponse est invalide ou peu fiable
+        try:
+            # 6. Parsing et validation de la réponse JSON (services/model_router.py)
             try:
-                parsed = json.loads(gpt_reply)
-                if not isinstance(parsed, dict) or "is_order" not in parsed:
-                    raise ValueError("Format de réponse attendu incorrect")
-
-                # Détermine status du message selon analyse GPT
-                status_val = "commande détectée" if parsed.get("is_order") else "pas une commande"
-
-                # Sauvegarde MessageLog
-                log_entry = MessageLog(
-                    sender_number=sender_number,
-                    message_text=message_text,
-                    status=status_val,
-                    client_id=client_id,
-                    processed_content=json.dumps(parsed, ensure_ascii=False)
-                )
-                db.add(log_entry)
-
-                # --- Archivage ProcessedOrder si commande ---
-                if parsed.get("is_order"):
-                    items_json = json.dumps(parsed.get("items", []), ensure_ascii=False)
-                    processed_order = ProcessedOrder(
-                        client_id=client_id,
-                        owner_id=client.owner_id if client else None,
-                        delivery_date=parsed.get("delivery_date"),
-                        items=items_json,
-                        pdf_path="N/A",
-                        status="envoyé"
-                    )
-                    db.add(processed_order)
-
-                db.commit()
+                routed = await route_extraction(client_name, products, prompt, message_text, catalog)
+                parsed = routed.parsed
+
+                _record_result(db, sender_number, message_texts, client, parsed, handled_by="gpt", catalog=catalog,
+                               routing=routed)
+                if key:
+                    await store_extraction(db, key, client_id, parsed)
+                await db.commit()
                 return parsed
 
-            except Exception as parse_err:
+            except ExtractionError as parse_err:
                 # Parsing JSON raté
-                log_entry = MessageLog(
-                    sender_number=sender_number,
-                    message_text=message_text,
-                    status="erreur GPT",
-                    client_id=client_id,
-                    processed_content=f"Parsing error: {str(parse_err)}; raw reply: {gpt_reply}"
-                )
-                db.add(log_entry)
-                db.commit()
+                _record_error(db, sender_number, message_texts, client_id,
+                              f"Parsing error: {str(parse_err)}; raw reply: {parse_err.raw_reply}")
+                await db.commit()
                 return {
                     "is_order": False,
                     "error": "Réponse inattendue de GPT (voir logs)."
                 }
         except Exception as api_err:
-            # Erreur appel API OpenAI
-            log_entry = MessageLog(
-                sender_number=sender_number,
-                message_text=message_text,
-                status="erreur GPT",
-                client_id=client_id,
-                processed_content=f"API error: {str(api_err)}"
-            )
-            db.add(log_entry)
-            db.commit()
+            # Erreur appel API OpenAI ou écriture en base : session remise à zéro avant le log d'erreur
+            await db.rollback()
+            if raise_errors:
+                raise
+            _record_error(db, sender_number, message_texts, client_id, f"API error: {str(api_err)}")
+            await db.commit()
             return {
                 "is_order": False,
                 "error": "Erreur d'appel à l'API OpenAI."
             }
-    finally:
-        db.close()
 
 # Exemple pour test local
 if __name__ == "__main__":
-    res = process_whatsapp_message("+33612345678", "Je voudrais 12 baguettes pour mercredi prochain")
+    res = asyncio.run(process_whatsapp_message("+33612345678", "Je voudrais 12 baguettes pour mercredi prochain"))
     print(res)
\ No newline at end of file
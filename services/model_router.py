@@ -0,0 +1,133 @@
+# services/model_router.py
+
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from services.catalog_cache import CatalogEntry
+from services.extraction_batcher import extraction_batcher
+from services.llm_client import LLM_FAST_MODEL, LLM_STRONG_MODEL, get_llm_client
+from utils.llm_json import LLMReplyError, parse_order_reply
+
+logger = logging.getLogger(__name__)
+
+# Configuration du routage depuis le .env
+load_dotenv()
+LLM_ESCALATION_MIN_CONFIDENCE = float(os.getenv("LLM_ESCALATION_MIN_CONFIDENCE", "1.0"))
+
+
+class ExtractionError(ValueError):
+    """Aucun modèle n'a renvoyé de réponse exploitable ; raw_reply garde la dernière réponse brute."""
+
+    def __init__(self, message: str, raw_reply: str):
+        super().__init__(message)
+        self.raw_reply = raw_reply
+
+
+@dataclass
+class ModelAttempt:
+    """Un appel de modèle : sa propre latence et si sa réponse était exploitable."""
+    model: str
+    latency_ms: int
+    usable: bool
+
+
+@dataclass
+class RoutedExtraction:
+    """Réponse retenue et traçabilité du routage (enregistrée dans MessageLog)."""
+    parsed: Dict[str, Any]
+    model: str
+    latency_ms: int  # total des appels, escalade comprise
+    escalated: bool = False
+    reasons: List[str] = field(default_factory=list)  # motifs du rejet de la réponse du modèle rapide
+    attempts: List[ModelAttempt] = field(default_factory=list)  # modèle rapide, puis modèle fort si escalade
+
+    @property
+    def fast_latency_ms(self) -> Optional[int]:
+        return self.attempts[0].latency_ms if self.attempts else None
+
+    @property
+    def strong_latency_ms(self) -> Optional[int]:
+        """Coût de l'escalade : latence de l'appel au modèle fort (None sans escalade)."""
+        return self.attempts[1].latency_ms if len(self.attempts) > 1 else None
+
+
+def validate_extraction(reply: str, catalog: Optional[CatalogEntry]) -> Tuple[Optional[Dict[str, Any]], float, List[str]]:
+    """
+    Vérifie une réponse GPT contre le contrat de generate_prompt (schemas.OrderExtraction :
+    JSON, is_order, articles nommés à quantité positive, date ISO) puis contre le catalogue du client.
+
+    :return: (réponse normalisée ou None si inexploitable, confiance 0-1, problèmes relevés)
+             La confiance est la part des articles qui correspondent à un produit du catalogue.
+    """
+    try:
+        parsed = parse_order_reply(reply)
+    except LLMReplyError as e:
+        return None, 0.0, [str(e)]
+    if not parsed["is_order"] or catalog is None:
+        return parsed, 1.0, []
+
+    items = parsed["items"]
+    unresolved = [item["name"] for item in items if catalog.index.resolve(item["name"]) is None]
+    if not unresolved:
+        return parsed, 1.0, []
+    return parsed, 1 - len(unresolved) / len(items), ["hors catalogue : " + ", ".join(unresolved)]
+
+
+async def route_extraction(client_name: str, products: Sequence[str], system_prompt: str, message_text: str,
+                           catalog: Optional[CatalogEntry]) -> RoutedExtraction:
+    """
+    Analyse un message avec le modèle rapide (LLM_FAST_MODEL, appels regroupés), puis
+    n'escalade vers LLM_STRONG_MODEL que si la réponse est invalide, incohérente
+    (quantité, date) ou de confiance insuffisante (articles hors catalogue).
+
+    :raises LLMError: si l'appel à l'API échoue
+    :raises ExtractionError: si aucune réponse n'est exploitable
+    """
+    start = time.perf_counter()
+    reply = await extraction_batcher.extract(client_name, products, system_prompt, message_text)
+    parsed, confidence, problems = validate_extraction(reply, catalog)
+    attempts = [_attempt(LLM_FAST_MODEL, start, parsed is not None)]
+    if parsed is not None and not problems and confidence >= LLM_ESCALATION_MIN_CONFIDENCE:
+        return RoutedExtraction(parsed, LLM_FAST_MODEL, _elapsed_ms(start), attempts=attempts)
+
+    logger.info(f"Escalade vers {LLM_STRONG_MODEL} : {'; '.join(problems) or f'confiance {confidence:.2f}'}")
+    strong_start = time.perf_counter()
+    try:
+        strong_reply = await get_llm_client().chat(
+            model=LLM_STRONG_MODEL,
+            temperature=0.2,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": message_text},
+            ],
+        )
+    except Exception as e:
+        # Modèle fort indisponible : on garde la réponse du modèle rapide si elle est exploitable
+        attempts.append(_attempt(LLM_STRONG_MODEL, strong_start, False))
+        if parsed is None:
+            raise
+        logger.warning(f"Escalade impossible ({e}), réponse de {LLM_FAST_MODEL} conservée")
+        return RoutedExtraction(parsed, LLM_FAST_MODEL, _elapsed_ms(start), True, problems, attempts)
+
+    strong_parsed, _, _ = validate_extraction(strong_reply, catalog)
+    attempts.append(_attempt(LLM_STRONG_MODEL, strong_start, strong_parsed is not None))
+    if strong_parsed is not None:
+        return RoutedExtraction(strong_parsed, LLM_STRONG_MODEL, _elapsed_ms(start), True, problems, attempts)
+    if parsed is not None:
+        return RoutedExtraction(parsed, LLM_FAST_MODEL, _elapsed_ms(start), True, problems, attempts)
+    raise ExtractionError("Format de réponse attendu incorrect", strong_reply)
+
+
+def _elapsed_ms(start: float) -> int:
+    return int((time.perf_counter() - start) * 1000)
+
+
+def _attempt(model: str, start: float, usable: bool) -> ModelAttempt:
+    attempt = ModelAttempt(model, _elapsed_ms(start), usable)
+    logger.info(f"Appel {model} : {attempt.latency_ms} ms, réponse {'exploitable' if usable else 'inexploitable'}")
+    return attempt
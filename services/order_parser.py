@@ -0,0 +1,278 @@
+# services/order_parser.py
+
+import os
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+# Seuil au-dessus duquel le résultat local est utilisé sans appel GPT
+PARSER_MIN_CONFIDENCE = float(os.getenv("PARSER_MIN_CONFIDENCE", "0.9"))
+
+WEEKDAYS = {
+    "lundi": 0, "mardi": 1, "mercredi": 2, "jeudi": 3,
+    "vendredi": 4, "samedi": 5, "dimanche": 6,
+}
+
+NUMBER_WORDS = {
+    "un": 1, "une": 1, "deux": 2, "trois": 3, "quatre": 4, "cinq": 5, "six": 6,
+    "sept": 7, "huit": 8, "neuf": 9, "dix": 10, "onze": 11, "douze": 12,
+    "treize": 13, "quatorze": 14, "quinze": 15, "seize": 16, "vingt": 20,
+    "trente": 30, "quarante": 40, "cinquante": 50, "soixante": 60, "cent": 100,
+}
+
+# Mots sans incidence sur la commande (politesse, tournures, dates déjà traitées)
+FILLER_WORDS = {
+    "bonjour", "bonsoir", "salut", "hello", "coucou", "merci", "beaucoup", "svp", "stp",
+    "s", "il", "vous", "te", "plait", "je", "j", "nous", "on", "voudrais", "voudrions",
+    "veux", "aimerais", "souhaite", "souhaiterais", "prendre", "commander", "commande",
+    "faut", "me", "m", "pour", "livraison", "livrer", "livre", "a", "au", "aux", "le", "la",
+    "les", "l", "de", "des", "du", "d", "bonne", "journee", "soiree", "cordialement",
+    "ok", "daccord", "accord", "bien", "c", "est", "serait", "possible", "avoir", "pouvez",
+    "peux", "en", "y", "ce", "cette", "semaine", "prochain", "prochaine", "matin", "midi",
+    "soir", "demain", "apres", "aujourd", "hui", "comme", "habitude", "hab", "pareil",
+    "que", "qu", "et", "please", "mettre", "mettez", "ajouter", "rajouter", "aussi",
+} | set(WEEKDAYS)
+
+GREETING_WORDS = {
+    "bonjour", "bonsoir", "salut", "hello", "coucou", "merci", "beaucoup", "ok", "daccord",
+    "accord", "bonne", "journee", "soiree", "cordialement", "bien", "recu", "parfait", "super", "top",
+}
+
+# Tournures qui modifient ou annulent une commande : on laisse GPT trancher
+RISKY_PATTERN = re.compile(
+    r"\b(annul\w*|modif\w*|chang\w*|remplac\w*|retir\w*|enlev\w*|plutot|lieu|sauf|moins|"
+    r"supprim\w*|erreur|oubli\w*|pas\s+de|plus\s+de|n\s*\w+\s+pas|ne\s+pas)\b|\?"
+)
+USUAL_PATTERN = re.compile(r"\bcomme\s+d\s*(habitude|hab)\b|\bcomme\s+(la\s+semaine\s+derniere|d\s*hab)\b|\bpareil\s+que\b")
+# Fin de conversation : formule de clôture, ou phrase terminée par un point
+CLOSING_PATTERN = re.compile(
+    r"(\bmerci\w*|\bbonne\s+(journee|soiree|fin\s+de\s+journee)|\bcordialement|\bc\s+est\s+tout|"
+    r"\bbisous?|\ba\s+(demain|bientot|plus))$"
+)
+OPENING_WORDS = {"bonjour", "bonsoir", "salut", "hello", "coucou"}
+# Date explicite jj/mm[/aaaa] : barres obliques seulement, "8.05" ou "8h45" sont des heures
+DATE_DMY_PATTERN = re.compile(r"\b(\d{1,2})\s*/\s*(\d{1,2})(?:\s*/\s*(\d{2,4}))?\b")
+SEPARATOR_PATTERN = re.compile(r"[,;+\n]|\bet\b|\.(?!\d)")
+QUANTITY_PATTERN = re.compile(
+    r"^(?:(?P<num>\d+)|(?P<word>" + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r")\b)"
+    r"(?:\s+(?P<dozen>douzaines?))?\s*(?:x\s*)?(?:de\s+|d\s+)?(?P<rest>.*)$"
+)
+
+
+@dataclass
+class ParseResult:
+    """Résultat de l'analyse locale : payload au format generate_prompt et niveau de confiance."""
+    payload: Dict[str, Any]
+    confidence: float
+    reasons: List[str] = field(default_factory=list)
+
+
+def normalize_text(text: str) -> str:
+    """Minuscules, sans accents, apostrophes et tirets remplacés par des espaces."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = re.sub(r"['’`\-]", " ", text)
+    return re.sub(r"[ \t]+", " ", text).strip()
+
+
+def singularize(word: str) -> str:
+    """Pluriel français simplifié : 'baguettes' -> 'baguette', 'gateaux' -> 'gateau'."""
+    if len(word) > 3 and word.endswith("aux"):
+        return word[:-1]
+    if len(word) > 2 and word[-1] in "sx":
+        return word[:-1]
+    return word
+
+
+def product_key(name: str) -> str:
+    """Clé de comparaison d'un nom de produit : normalisé, au singulier, sans articles."""
+    words = [singularize(w) for w in re.findall(r"[a-z0-9]+", normalize_text(name))]
+    return " ".join(w for w in words if w not in {"de", "d", "du", "des", "le", "la", "les", "l"})
+
+
+# ------------------- DATES -------------------
+
+@dataclass(frozen=True)
+class DateCues:
+    """Indices de date d'un message : date explicite (jj/mm[/aaaa]) et mot relatif (demain, mercredi...)."""
+    explicit: Optional[date] = None
+    relative: Optional[date] = None
+    weekday_cue: bool = False  # indice relatif = jour de la semaine
+
+    @property
+    def resolved(self) -> Optional[date]:
+        return self.explicit or self.relative
+
+    @property
+    def conflicting(self) -> bool:
+        """La date explicite et le mot relatif ne désignent pas le même jour ("demain 25/12")."""
+        if self.explicit is None or self.relative is None:
+            return False
+        if self.weekday_cue:
+            return self.explicit.weekday() != self.relative.weekday()
+        return self.explicit != self.relative
+
+
+def _explicit_date(normalized: str, today: date) -> Optional[date]:
+    match = DATE_DMY_PATTERN.search(normalized)
+    if not match:
+        return None
+    day, month, year = int(match.group(1)), int(match.group(2)), match.group(3)
+    try:
+        if year:
+            year = int(year) + (2000 if len(year) == 2 else 0)
+            return date(year, month, day)
+        candidate = date(today.year, month, day)
+        # Date déjà passée cette année : c'est l'année prochaine
+        return candidate if candidate >= today else date(today.year + 1, month, day)
+    except ValueError:
+        return None
+
+
+def find_delivery_dates(text: str, today: Optional[date] = None) -> DateCues:
+    """
+    Relève les indices de date de livraison d'un message : date explicite jj/mm[/aaaa]
+    (ignorée si elle n'existe pas), aujourd'hui, demain, après-demain, jour de la semaine
+    ("mercredi", "mercredi prochain").
+    """
+    today = today or date.today()
+    normalized = normalize_text(text)
+    explicit = _explicit_date(normalized, today)
+
+    if re.search(r"\bapres\s+demain\b", normalized):
+        return DateCues(explicit, today + timedelta(days=2))
+    if re.search(r"\bdemain\b", normalized):
+        return DateCues(explicit, today + timedelta(days=1))
+    if re.search(r"\baujourd\s*hui\b", normalized):
+        return DateCues(explicit, today)
+
+    for name, weekday in WEEKDAYS.items():
+        if re.search(rf"\b{name}\b", normalized):
+            # Prochaine occurrence strictement après aujourd'hui ("mercredi" = "mercredi prochain")
+            delta = (weekday - today.weekday()) % 7 or 7
+            return DateCues(explicit, today + timedelta(days=delta), weekday_cue=True)
+    return DateCues(explicit)
+
+
+def resolve_delivery_date(text: str, today: Optional[date] = None) -> Optional[date]:
+    """
+    Date de livraison d'un message : la date explicite si elle existe, sinon le mot relatif
+    (voir find_delivery_dates). Retourne None si aucune date n'est trouvée.
+    """
+    return find_delivery_dates(text, today).resolved
+
+
+# ------------------- ARTICLES -------------------
+
+def mentions_usual_order(text: str) -> bool:
+    """Le message fait-il référence à la commande habituelle ("comme d'habitude") ?"""
+    return bool(USUAL_PATTERN.search(normalize_text(text)))
+
+
+def is_closing_message(text: str) -> bool:
+    """
+    Le message termine-t-il la conversation ("pour demain merci", "c'est tout.") ?
+    Sert à traiter tout de suite des messages envoyés en plusieurs fois, sans attendre
+    la fin de la fenêtre de regroupement. Une simple salutation ("Bonjour !") n'en est pas une.
+    """
+    normalized = normalize_text(text)
+    stripped = re.sub(r"[^\w.!]+$", "", normalized)
+    if CLOSING_PATTERN.search(stripped.rstrip(".! ")):
+        return True
+    words = set(re.findall(r"[a-z0-9]+", normalized))
+    return stripped.endswith((".", "!")) and not words <= OPENING_WORDS
+
+
+def _parse_quantity(match: re.Match) -> int:
+    quantity = int(match.group("num")) if match.group("num") else NUMBER_WORDS[match.group("word")]
+    if match.group("dozen"):
+        quantity *= 12
+    return quantity
+
+
+def _is_filler(chunk: str) -> bool:
+    words = re.findall(r"[a-z0-9]+", chunk)
+    return all(w in FILLER_WORDS or w.isdigit() for w in words)
+
+
+def parse_order(
+    text: str,
+    catalog: Sequence[str],
+    today: Optional[date] = None,
+    usual_items: Optional[List[Dict[str, Any]]] = None,
+) -> ParseResult:
+    """
+    Analyse locale et déterministe d'un message de commande en français.
+
+    Reconnaît les motifs « quantité + produit » confrontés au catalogue du client,
+    les douzaines, « comme d'habitude » (avec `usual_items`, la dernière commande)
+    et les dates relatives ou explicites. Produit le même JSON que le contrat
+    de utils/gpt_prompt.generate_prompt. La confiance est basse dès qu'un segment
+    n'est pas compris : l'appelant doit alors se rabattre sur GPT.
+    """
+    normalized = normalize_text(text)
+    cues = find_delivery_dates(text, today)
+    delivery = cues.resolved
+    payload_date = delivery.isoformat() if delivery else None
+
+    if RISKY_PATTERN.search(normalized):
+        return ParseResult({"is_order": False}, 0.0, ["modification, négation ou question"])
+
+    words = set(re.findall(r"[a-z0-9]+", normalized))
+    if words and words <= GREETING_WORDS:
+        return ParseResult({"is_order": False}, 1.0, ["message de politesse"])
+
+    if mentions_usual_order(text):
+        if not usual_items:
+            return ParseResult({"is_order": False}, 0.0, ["commande habituelle inconnue"])
+        rest = USUAL_PATTERN.sub(" ", DATE_DMY_PATTERN.sub(" ", normalized))
+        if not _is_filler(rest):
+            return ParseResult({"is_order": False}, 0.0, ["commande habituelle avec ajouts"])
+        items = [{"name": item["name"], "quantity": item["quantity"]} for item in usual_items]
+        if cues.conflicting:
+            return ParseResult({"is_order": True, "delivery_date": payload_date, "items": items}, 0.5, ["dates contradictoires"])
+        return ParseResult({"is_order": True, "delivery_date": payload_date, "items": items}, 1.0)
+
+    catalog_by_key = {product_key(name): name for name in catalog}
+    items: Dict[str, int] = {}
+    reasons: List[str] = []
+    text_without_dates = DATE_DMY_PATTERN.sub(" ", normalized)
+
+    for chunk in SEPARATOR_PATTERN.split(text_without_dates):
+        chunk = chunk.strip()
+        if not chunk or _is_filler(chunk):
+            continue
+        # On saute les formules en tête de segment ("je voudrais", "bonjour", ...)
+        tokens = chunk.split()
+        while tokens and tokens[0] in FILLER_WORDS and tokens[0] not in NUMBER_WORDS:
+            tokens.pop(0)
+        match = QUANTITY_PATTERN.match(" ".join(tokens))
+        if not match:
+            reasons.append(f"segment non compris : '{chunk}'")
+            continue
+        # Fin de segment : on retire les mots de politesse et de date
+        rest_words = match.group("rest").split()
+        while rest_words and rest_words[-1] in FILLER_WORDS:
+            rest_words.pop()
+        name = catalog_by_key.get(product_key(" ".join(rest_words)))
+        if not name:
+            reasons.append(f"produit inconnu : '{match.group('rest')}'")
+            continue
+        items[name] = items.get(name, 0) + _parse_quantity(match)
+
+    if reasons or not items:
+        return ParseResult({"is_order": False}, 0.0, reasons or ["aucun article reconnu"])
+    payload = {
+        "is_order": True,
+        "delivery_date": payload_date,
+        "items": [{"name": name, "quantity": quantity} for name, quantity in items.items()],
+    }
+    if delivery is None:
+        # Articles compris mais date absente : GPT peut la déduire du contexte
+        return ParseResult(payload, 0.5, ["date de livraison absente"])
+    if cues.conflicting:
+        # "demain 25/12" : date explicite et mot relatif en désaccord, GPT tranche
+        return ParseResult(payload, 0.5, ["dates contradictoires"])
+    return ParseResult(payload, 1.0)
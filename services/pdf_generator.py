@@ -1,7 +1,15 @@
 # services/pdf_generator.py
 
-from typing import List, Dict, Any
+from typing import Any, BinaryIO, Dict, List, Union
 from weasyprint import HTML, CSS
+from weasyprint.text.fonts import FontConfiguration
+
+from services.pdf_templates import TEMPLATES_DIR, render_order_html, stylesheet_source
+
+# Créés une fois par processus : polices résolues et feuille de styles parsée
+# au chargement du module, pas à chaque bon de commande
+FONT_CONFIG = FontConfiguration()
+ORDER_CSS = CSS(string=stylesheet_source(), font_config=FONT_CONFIG)
 
 def generate_order_pdf(client_name: str, delivery_date: str, items: List[Dict[str, Any]]) -> bytes:
     """
@@ -15,86 +23,20 @@ def generate_order_pdf(client_name: str, delivery_date: str, items: List[Dict[st
     Returns:
         bytes: Le contenu du PDF sous forme de bytes, prêt à être envoyé par mail.
     """
-    # Génère le corps du tableau des produits
-    table_rows = "\n".join(
-        f"""
-        <tr>
-            <td style="padding: 8px; border-bottom: 1px solid #ddd;">{item['name']}</td>
-            <td style="padding: 8px; border-bottom: 1px solid #ddd; text-align:center;">{item['quantity']}</td>
-        </tr>
-        """ for item in items
-    )
-
-    # Prépare le HTML du bon de commande
-    html_content = f"""
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <style>
-            body {{
-                font-family: "Arial", sans-serif;
-                margin: 40px;
-            }}
-            h1 {{
-                text-align: center;
-                font-size: 2em;
-                color: #444;
-            }}
-            .section {{
-                margin-bottom: 24px;
-            }}
-            .label {{
-                color: #666;
-                font-size: 0.95em;
-            }}
-            .client-info {{
-                margin-bottom: 8px;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-top: 16px;
-            }}
-            th, td {{
-                font-size: 1em;
-            }}
-            th {{
-                background-color: #f4f4f4;
-                padding: 10px 8px;
-                text-align: left;
-                border-bottom: 2px solid #999;
-            }}
-        </style>
-    </head>
-    <body>
-        <h1>Bon de commande</h1>
-        <div class="section client-info">
-            <div><span class="label">Client :</span> <strong>{client_name}</strong></div>
-            <div><span class="label">Date de livraison :</span> <strong>{delivery_date}</strong></div>
-        </div>
-        <div class="section">
-            <table>
-                <thead>
-                    <tr>
-                        <th>Produit</th>
-                        <th>Quantité</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {table_rows}
-                </tbody>
-            </table>
-        </div>
-    </body>
-    </html>
-    """
-
     # Génére le PDF en mémoire
-    html = HTML(string=html_content)
-    pdf_bytes = html.write_pdf()
+    pdf_bytes = _order_html(client_name, delivery_date, items).write_pdf(stylesheets=[ORDER_CSS], font_config=FONT_CONFIG)
 
     return pdf_bytes
 
+def write_order_pdf(client_name: str, delivery_date: str, items: List[Dict[str, Any]], stream: Union[str, BinaryIO]) -> None:
+    """Même document que generate_order_pdf, écrit dans un fichier ou un flux binaire."""
+    _order_html(client_name, delivery_date, items).write_pdf(stream, stylesheets=[ORDER_CSS], font_config=FONT_CONFIG)
+
+def _order_html(client_name: str, delivery_date: str, items: List[Dict[str, Any]]) -> HTML:
+    # HTML issu du gabarit Jinja compilé (templates/pdf/bon_de_commande.html),
+    # mis en page avec la feuille de styles et les polices partagées
+    return HTML(string=render_order_html(client_name, delivery_date, items), base_url=TEMPLATES_DIR)
+
 # Exemple d'appel pour test
 if __name__ == "__main__":
     test_items = [
@@ -0,0 +1,138 @@
+# services/pdf_renderers.py
+
+import io
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from services import make_order_pdf
+from services.pdf_store import document_key, pdf_store
+from services.pdf_templates import TEMPLATE_VERSION
+
+# Moteur des bons de commande depuis le .env : "reportlab" (défaut) ou "weasyprint"
+load_dotenv()
+PDF_RENDERER = os.getenv("PDF_RENDERER", "reportlab")
+
+
+@dataclass(frozen=True)
+class OrderDocument:
+    """Données d'un bon de commande, envoyées telles quelles au worker (picklable)."""
+    client_name: str
+    items: List[Dict]
+    delivery_date: str
+    order_id: Optional[int] = None
+
+    @property
+    def lines(self) -> List[Dict]:
+        """Articles ramenés à {name, quantity} pour tous les moteurs (ancienne clé 'product' acceptée)."""
+        return [
+            {"name": item.get("name", item.get("product", "")), "quantity": item.get("quantity", 0)}
+            for item in self.items
+        ]
+
+
+class OrderRenderer(ABC):
+    """
+    Interface commune des moteurs de bon de commande :
+    - write(order, stream) écrit le PDF dans un flux binaire,
+    - render(order) retourne ses octets,
+    - warm() charge d'avance bibliothèques, styles et polices (workers du pool de rendu).
+    name et version entrent dans la clé du stockage partagé (services/pdf_store.py).
+    """
+    name = ""
+    version = ""
+
+    def warm(self) -> None:
+        pass
+
+    @abstractmethod
+    def write(self, order: OrderDocument, stream: BinaryIO) -> None:
+        ...
+
+    def render(self, order: OrderDocument) -> bytes:
+        buffer = io.BytesIO()
+        self.write(order, buffer)
+        return buffer.getvalue()
+
+
+class ReportLabRenderer(OrderRenderer):
+    """Mise en page ReportLab de services/make_order_pdf.py (sans dépendance système)."""
+    name = "reportlab"
+    version = make_order_pdf.LAYOUT_VERSION
+
+    def warm(self) -> None:
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.pdfbase import pdfmetrics
+
+        getSampleStyleSheet()
+        for font in ("Helvetica", "Helvetica-Bold"):
+            pdfmetrics.getFont(font)
+
+    def write(self, order: OrderDocument, stream: BinaryIO) -> None:
+        make_order_pdf.write_order_pdf(order.client_name, order.lines, order.delivery_date, stream)
+
+
+class WeasyPrintRenderer(OrderRenderer):
+    """
+    Gabarit HTML/CSS de services/pdf_generator.py. WeasyPrint (et Pango) n'est importé
+    qu'à la première utilisation : inutile de l'installer si ce moteur n'est pas choisi.
+    """
+    name = "weasyprint"
+    version = TEMPLATE_VERSION
+
+    def warm(self) -> None:
+        import services.pdf_generator  # noqa: F401  (feuille de styles et polices créées à l'import)
+
+    def write(self, order: OrderDocument, stream: BinaryIO) -> None:
+        from services.pdf_generator import write_order_pdf
+
+        write_order_pdf(order.client_name, order.delivery_date, order.lines, stream)
+
+
+RENDERERS: Dict[str, OrderRenderer] = {renderer.name: renderer for renderer in (ReportLabRenderer(), WeasyPrintRenderer())}
+
+
+def get_renderer(name: Optional[str] = None) -> OrderRenderer:
+    """Moteur demandé, ou celui de PDF_RENDERER. ValueError si le nom est inconnu."""
+    key = (name or PDF_RENDERER).strip().lower()
+    try:
+        return RENDERERS[key]
+    except KeyError:
+        raise ValueError(f"Moteur PDF inconnu : {key} (disponibles : {', '.join(RENDERERS)})")
+
+
+# ------------------- STOCKAGE PARTAGÉ -------------------
+
+def _order_key(order: OrderDocument, renderer: OrderRenderer) -> str:
+    return document_key(renderer.name, renderer.version, order.client_name, order.delivery_date, order.lines)
+
+
+def cached_order_pdf(order: OrderDocument, renderer: Optional[OrderRenderer] = None) -> Optional[str]:
+    """Chemin du bon de commande s'il a déjà été rendu, sans rien rendre (simple calcul d'empreinte)."""
+    return pdf_store.get(_order_key(order, renderer or get_renderer()))
+
+
+def order_pdf_path(order: OrderDocument, renderer: Optional[OrderRenderer] = None) -> str:
+    """
+    Chemin du bon de commande dans le stockage partagé, commun à toutes les commandes
+    identiques (même client, mêmes articles, même date, même moteur) : le rendu
+    n'a lieu que si le document n'y est pas déjà.
+    """
+    renderer = renderer or get_renderer()
+    key = _order_key(order, renderer)
+    cached = pdf_store.get(key)
+    if cached:
+        return cached
+
+    path = pdf_store.temp_path(key)
+    try:
+        with open(path, "wb") as stream:
+            renderer.write(order, stream)
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return pdf_store.commit(key, path)
@@ -0,0 +1,164 @@
+# services/pdf_service.py
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from dotenv import load_dotenv
+
+from services.pdf_renderers import OrderDocument, cached_order_pdf, get_renderer, order_pdf_path
+from services.pdf_store import pdf_store
+from services.production_sheet import ProductionSheet, production_sheet_pdf
+
+logger = logging.getLogger(__name__)
+
+# Configuration du rendu PDF depuis le .env
+load_dotenv()
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_MAX_PENDING = int(os.getenv("PDF_MAX_PENDING", "32"))            # rendus en cours + en attente
+PDF_QUEUE_TIMEOUT = float(os.getenv("PDF_QUEUE_TIMEOUT", "10"))      # attente max d'une place dans la file
+PDF_RENDER_TIMEOUT = float(os.getenv("PDF_RENDER_TIMEOUT", "30"))
+
+
+class PDFServiceError(Exception):
+    """Exception levée quand un PDF ne peut pas être rendu (timeout, worker planté)."""
+    pass
+
+
+class PDFServiceBusy(PDFServiceError):
+    """File de rendu pleine : trop de PDF en attente."""
+    pass
+
+
+# ------------------- WORKERS (processus) -------------------
+
+def _warm_worker() -> None:
+    """
+    Initialisation de chaque processus : bibliothèques importées, feuille de styles
+    et polices chargées une fois pour toutes, pas au premier bon de commande.
+    ReportLab toujours (fiche de production), plus le moteur choisi par PDF_RENDERER.
+    """
+    get_renderer("reportlab").warm()
+    get_renderer().warm()
+
+
+def _render(order: OrderDocument) -> str:
+    return order_pdf_path(order)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+# ------------------- SERVICE -------------------
+
+class PDFRenderService:
+    """
+    Rendu des bons de commande dans un pool de processus déjà chauds :
+    la boucle d'événements n'est jamais bloquée par ReportLab.
+    - file bornée (max_pending) : au-delà, on attend une place au plus PDF_QUEUE_TIMEOUT,
+    - timeout par rendu (le worker termine son rendu, mais l'appelant n'attend plus) :
+      la place dans la file n'est rendue qu'à la fin réelle du rendu, pas au timeout,
+    - pool recréé si un worker meurt (BrokenProcessPool).
+    """
+
+    def __init__(
+        self,
+        workers: int = PDF_WORKERS,
+        max_pending: int = PDF_MAX_PENDING,
+        queue_timeout: float = PDF_QUEUE_TIMEOUT,
+        render_timeout: float = PDF_RENDER_TIMEOUT,
+    ):
+        self.workers = workers
+        self.max_pending = max(max_pending, workers)
+        self.queue_timeout = queue_timeout
+        self.render_timeout = render_timeout
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # spawn : pas de fork d'un processus qui a déjà des threads (aiosqlite) et une boucle asyncio
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker,
+        )
+
+    async def start(self) -> None:
+        """Démarre les workers et attend qu'ils soient tous initialisés."""
+        if self._executor is not None:
+            return
+        get_renderer()  # PDF_RENDERER invalide : erreur au démarrage plutôt qu'au premier PDF
+        self._executor = self._create_executor()
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(self._executor, _ready) for _ in range(self.workers)))
+        logger.info(f"{len(set(pids))} workers de rendu PDF démarrés")
+
+    async def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def render(self, order: OrderDocument) -> str:
+        """
+        Rend le bon de commande et retourne le chemin du PDF (partagé entre commandes identiques).
+
+        :raises PDFServiceBusy: si la file reste pleine plus de queue_timeout secondes
+        :raises PDFServiceError: si le rendu dépasse render_timeout ou si le worker meurt
+        """
+        # Commande identique déjà rendue : simple calcul d'empreinte, sans passer par un worker
+        cached = cached_order_pdf(order)
+        if cached:
+            return cached
+        return await self._submit(_render, order, f"de la commande {order.order_id}")
+
+    async def render_production_sheet(self, sheet: ProductionSheet) -> str:
+        """Rend la fiche de production du jour (services/production_sheet.py) et retourne son chemin."""
+        cached = pdf_store.get(sheet.key)
+        if cached:
+            return cached
+        return await self._submit(production_sheet_pdf, sheet, f"de la fiche du {sheet.delivery_date}")
+
+    async def _submit(self, fn: Callable[[Any], str], document: Any, label: str) -> str:
+        if self._executor is None:
+            await self.start()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise PDFServiceBusy(f"File de rendu PDF pleine ({self.max_pending} en attente)")
+
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        job = None
+        try:
+            job = executor.submit(fn, document)
+            # Place libérée quand le worker a vraiment fini (ou le rendu annulé avant de démarrer) :
+            # après un timeout, le rendu abandonné occupe encore un worker et doit compter dans la file
+            job.add_done_callback(lambda _: self._release_slot(loop))
+            return await asyncio.wait_for(asyncio.wrap_future(job), timeout=self.render_timeout)
+        except asyncio.TimeoutError:
+            raise PDFServiceError(f"Rendu du PDF {label} trop long (> {self.render_timeout}s)")
+        except BrokenProcessPool as e:
+            # Worker tué (OOM, crash) : les rendus suivants repartent sur un pool neuf
+            logger.error(f"Pool de rendu PDF cassé, redémarrage : {e}")
+            if self._executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            raise PDFServiceError(f"Rendu du PDF {label} interrompu : {e}")
+        finally:
+            if job is None:  # rendu jamais soumis (pool cassé ou arrêté)
+                self._slots.release()
+
+    def _release_slot(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Appelé depuis le thread de l'executor : le sémaphore n'est touché que dans la boucle."""
+        try:
+            loop.call_soon_threadsafe(self._slots.release)
+        except RuntimeError:
+            pass  # boucle déjà fermée (arrêt de l'application)
+
+
+pdf_render_service = PDFRenderService()
@@ -0,0 +1,128 @@
+# services/pdf_store.py
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# Configuration du stockage des PDF depuis le .env
+load_dotenv()
+PDF_STORE_DIR = os.getenv("PDF_STORE_DIR", "generated_pdfs")
+PDF_STORE_MAX_BYTES = int(os.getenv("PDF_STORE_MAX_MB", "512")) * 1024 * 1024
+
+
+def content_key(payload: Any) -> str:
+    """Empreinte SHA-256 d'une structure JSON, sous forme canonique (clé du stockage)."""
+    canonical = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def document_key(renderer: str, version: str, client_name: str, delivery_date: str, items: List[Dict[str, Any]]) -> str:
+    """
+    Empreinte SHA-256 des données réellement imprimées sur le document : deux commandes
+    identiques (même client, mêmes articles dans le même ordre, même date) partagent le PDF.
+    Le moteur et la version du gabarit en font partie : un changement de mise en page
+    donne de nouvelles clés au lieu de resservir d'anciens fichiers.
+    """
+    return content_key({
+        "renderer": renderer,
+        "version": version,
+        "client": client_name,
+        "delivery_date": delivery_date,
+        "items": [[item.get("name", ""), item.get("quantity", 0)] for item in items],
+    })
+
+
+class PDFStore:
+    """
+    Stockage adressé par contenu des PDF générés : <root>/ab/cd/<clé>.pdf.
+    - écriture atomique (fichier temporaire puis os.replace), sûre entre processus,
+    - LRU sur la date de modification, rafraîchie à chaque lecture,
+    - taille totale plafonnée : les blobs les moins récemment utilisés sont supprimés.
+
+    La taille totale est suivie en mémoire (approximative avec plusieurs processus) ;
+    le recalcul exact ne se fait qu'au moment d'évincer.
+    """
+
+    def __init__(self, root: str = PDF_STORE_DIR, max_bytes: int = PDF_STORE_MAX_BYTES):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], f"{key}.pdf")
+
+    def get(self, key: str) -> Optional[str]:
+        """Chemin du blob s'il existe (et marqué comme récemment utilisé), sinon None."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def temp_path(self, key: str) -> str:
+        """Fichier temporaire dans le même répertoire que le blob final (os.replace atomique)."""
+        directory = os.path.dirname(self.path_for(key))
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f".{key}.{uuid.uuid4().hex}.tmp")
+
+    def commit(self, key: str, temp_path: str) -> str:
+        """Publie le fichier temporaire sous sa clé et applique le plafond de taille."""
+        path = self.path_for(key)
+        os.replace(temp_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict(keep=path)
+        return path
+
+    def _blobs(self) -> List[os.DirEntry]:
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for subshard in os.scandir(shard.path):
+                if subshard.is_dir():
+                    entries.extend(e for e in os.scandir(subshard.path) if e.name.endswith(".pdf"))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(entry.stat().st_size for entry in self._blobs())
+
+    def _evict(self, keep: str) -> None:
+        # Recalcul exact (autres processus), puis suppression des moins récemment utilisés
+        blobs = sorted((stat.st_mtime, stat.st_size, entry.path) for entry in self._blobs() for stat in [entry.stat()])
+        total = sum(size for _, size, _ in blobs)
+        removed = 0
+        for _, size, path in blobs:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        self._total_bytes = total
+        if removed:
+            logger.info(f"Stockage PDF : {removed} fichiers évincés ({total // 1024} Kio conservés)")
+
+
+pdf_store = PDFStore()
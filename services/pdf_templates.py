@@ -0,0 +1,38 @@
+# services/pdf_templates.py
+
+import os
+from typing import Any, Dict, List
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+# Gabarits des documents PDF (HTML Jinja + feuilles de styles), livrés avec l'application
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "pdf")
+ORDER_TEMPLATE = "bon_de_commande.html"
+ORDER_STYLESHEET = "bon_de_commande.css"
+
+# À incrémenter à chaque modification visible d'un gabarit
+TEMPLATE_VERSION = "1"
+
+# Environnement unique : chaque gabarit est compilé au premier rendu puis gardé en mémoire.
+# auto_reload=False : pas de stat() du fichier à chaque rendu (gabarits figés au déploiement).
+_environment = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+
+
+def render_order_html(client_name: str, delivery_date: str, items: List[Dict[str, Any]]) -> str:
+    """HTML du bon de commande ; nom du client et noms de produits échappés."""
+    return _environment.get_template(ORDER_TEMPLATE).render(
+        client_name=client_name,
+        delivery_date=delivery_date,
+        items=items,
+    )
+
+
+def stylesheet_source(name: str = ORDER_STYLESHEET) -> str:
+    with open(os.path.join(TEMPLATES_DIR, name), encoding="utf-8") as f:
+        return f.read()
@@ -0,0 +1,204 @@
+# services/product_index.py
+
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from dotenv import load_dotenv
+
+from services.order_parser import FILLER_WORDS, normalize_text, product_key, singularize
+
+# Configuration de la présélection et de la résolution depuis le .env
+load_dotenv()
+PROMPT_SHORTLIST_MIN_PRODUCTS = int(os.getenv("PROMPT_SHORTLIST_MIN_PRODUCTS", "30"))  # en dessous : catalogue complet
+PROMPT_SHORTLIST_SIZE = int(os.getenv("PROMPT_SHORTLIST_SIZE", "15"))
+PROMPT_SHORTLIST_MIN_SCORE = float(os.getenv("PROMPT_SHORTLIST_MIN_SCORE", "0.3"))
+PRODUCT_MATCH_MIN_SCORE = float(os.getenv("PRODUCT_MATCH_MIN_SCORE", "0.6"))
+PRODUCT_MATCH_MIN_MARGIN = float(os.getenv("PRODUCT_MATCH_MIN_MARGIN", "0.05"))  # écart minimal avec le 2e candidat
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def trigrams(word: str) -> FrozenSet[str]:
+    """Trigrammes de caractères d'un mot, bornes comprises (« pain » -> '  p', ' pa', 'pai', 'ain', 'in ')."""
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def significant_words(text: str) -> List[str]:
+    """Mots porteurs de sens d'un texte : normalisés, au singulier, sans mots de liaison ni nombres."""
+    return [
+        singularize(word)
+        for word in _WORD.findall(normalize_text(text))
+        if word not in FILLER_WORDS and not word.isdigit() and len(word) > 1
+    ]
+
+
+class TrigramIndex:
+    """
+    Index de trigrammes de caractères sur les produits d'un client (id -> nom).
+
+    - shortlist() : produits plausiblement cités par un message, pour alléger le prompt GPT ;
+    - resolve() : produit du catalogue correspondant à un nom d'article extrait
+      (« baguettes tradi » -> « Baguette tradition »), pour stocker son product_id.
+
+    Les noms sont comparés mot à mot (Jaccard sur les trigrammes), ce qui tolère
+    pluriels, accents et petites fautes de frappe. add() / remove() mettent l'index
+    à jour produit par produit, sans reconstruction complète.
+    """
+
+    def __init__(self, products: Sequence[Tuple[int, str]] = ()):
+        self.names: Dict[int, str] = {}                  # product_id -> nom
+        self._keys: Dict[str, int] = {}                  # product_key(nom) -> product_id (correspondance exacte)
+        self._product_words: Dict[int, List[int]] = {}   # product_id -> ses mots significatifs
+        self._words: Dict[int, FrozenSet[str]] = {}      # mot -> trigrammes
+        self._word_owner: Dict[int, int] = {}            # mot -> product_id
+        self._postings: Dict[str, Set[int]] = defaultdict(set)  # trigramme -> mots qui le contiennent
+        self._next_word = 0
+        for product_id, name in products:
+            self.add(product_id, name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def product_names(self) -> Tuple[str, ...]:
+        """Noms des produits dans l'ordre des ids (ordre du catalogue)."""
+        return tuple(self.names[product_id] for product_id in sorted(self.names))
+
+    # ------------------- MISE À JOUR -------------------
+
+    def add(self, product_id: int, name: str) -> None:
+        """Ajoute un produit, ou le réindexe s'il existe déjà (renommage)."""
+        self.remove(product_id)
+        self.names[product_id] = name
+        self._keys.setdefault(product_key(name), product_id)
+        word_ids = []
+        for word in set(significant_words(name)):
+            word_id = self._next_word
+            self._next_word += 1
+            grams = trigrams(word)
+            self._words[word_id] = grams
+            self._word_owner[word_id] = product_id
+            for gram in grams:
+                self._postings[gram].add(word_id)
+            word_ids.append(word_id)
+        self._product_words[product_id] = word_ids
+
+    def remove(self, product_id: int) -> None:
+        """Retire un produit de l'index (sans effet s'il n'y est pas)."""
+        name = self.names.pop(product_id, None)
+        if name is None:
+            return
+        key = product_key(name)
+        if self._keys.get(key) == product_id:
+            del self._keys[key]
+            # Un autre produit portant le même nom normalisé reprend la clé
+            for other_id in sorted(self.names):
+                if product_key(self.names[other_id]) == key:
+                    self._keys[key] = other_id
+                    break
+        for word_id in self._product_words.pop(product_id, []):
+            for gram in self._words.pop(word_id):
+                postings = self._postings[gram]
+                postings.discard(word_id)
+                if not postings:
+                    del self._postings[gram]
+            del self._word_owner[word_id]
+
+    # ------------------- RECHERCHE -------------------
+
+    def _similarities(self, words: Sequence[str]) -> Dict[Tuple[int, int], float]:
+        """Similarité (mot du texte, mot de produit) pour chaque paire ayant un trigramme en commun."""
+        similarities = {}
+        for position, word in enumerate(words):
+            grams = trigrams(word)
+            shared = Counter(word_id for gram in grams for word_id in self._postings.get(gram, ()))
+            for word_id, common in shared.items():
+                similarities[(position, word_id)] = common / (len(grams) + len(self._words[word_id]) - common)
+        return similarities
+
+    def scores(self, text: str) -> Dict[int, float]:
+        """
+        Score de présence de chaque produit dans un message : moyenne, sur les mots du produit,
+        de la meilleure similarité avec un mot du message.
+        """
+        best: Dict[int, float] = {}  # mot de produit -> meilleure similarité
+        for (_, word_id), similarity in self._similarities(list(set(significant_words(text)))).items():
+            if similarity > best.get(word_id, 0.0):
+                best[word_id] = similarity
+        totals: Dict[int, float] = defaultdict(float)
+        for word_id, similarity in best.items():
+            totals[self._word_owner[word_id]] += similarity
+        return {
+            product_id: total / len(self._product_words[product_id])
+            for product_id, total in totals.items()
+        }
+
+    def shortlist(self, text: str, k: int = PROMPT_SHORTLIST_SIZE, min_score: float = PROMPT_SHORTLIST_MIN_SCORE) -> List[str]:
+        """
+        Les k produits les plus plausiblement cités par le message, dans l'ordre du catalogue.
+        Liste vide si aucun produit n'atteint min_score.
+        """
+        ranked = sorted(
+            ((score, -product_id) for product_id, score in self.scores(text).items() if score >= min_score),
+            reverse=True,
+        )[:k]
+        return [self.names[product_id] for product_id in sorted(-neg_id for _, neg_id in ranked)]
+
+    def resolve(self, name: str, min_score: float = PRODUCT_MATCH_MIN_SCORE) -> Optional[Tuple[int, float]]:
+        """
+        Produit du catalogue correspondant à un nom d'article : (product_id, score) ou None.
+
+        Correspondance exacte sur le nom normalisé d'abord (cas courant, un accès dict),
+        sinon similarité symétrique : les mots de l'article comme ceux du produit doivent
+        trouver un équivalent, pour que « baguette tradi » préfère « Baguette tradition »
+        à « Baguette ». Un nom ambigu (« pain » face à plusieurs pains) reste non résolu.
+        """
+        product_id = self._keys.get(product_key(name))
+        if product_id is not None:
+            return product_id, 1.0
+
+        words = list(dict.fromkeys(significant_words(name)))
+        if not words:
+            return None
+        best_item: Dict[Tuple[int, int], float] = {}     # (mot de l'article, produit) -> meilleure similarité
+        best_product: Dict[int, float] = {}              # mot de produit -> meilleure similarité
+        for (position, word_id), similarity in self._similarities(words).items():
+            pair = (position, self._word_owner[word_id])
+            best_item[pair] = max(best_item.get(pair, 0.0), similarity)
+            best_product[word_id] = max(best_product.get(word_id, 0.0), similarity)
+
+        totals: Dict[int, float] = defaultdict(float)
+        for (_, product_id), similarity in best_item.items():
+            totals[product_id] += similarity
+        for word_id, similarity in best_product.items():
+            totals[self._word_owner[word_id]] += similarity
+
+        candidates = sorted(
+            ((total / (len(words) + len(self._product_words[product_id])), -product_id)
+             for product_id, total in totals.items()),
+            reverse=True,
+        )
+        if not candidates or candidates[0][0] < min_score:
+            return None
+        score, neg_id = candidates[0]
+        if len(candidates) > 1 and score - candidates[1][0] < PRODUCT_MATCH_MIN_MARGIN:
+            return None
+        return -neg_id, score
+
+    def resolve_items(self, items: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Associe chaque article extrait à son product_id.
+        Les articles sans correspondance gardent product_id=None et sont marqués "unresolved".
+        """
+        resolved = []
+        for item in items:
+            item = {k: v for k, v in dict(item).items() if k not in ("product_id", "unresolved")}
+            match = self.resolve(str(item.get("name") or ""))
+            item["product_id"] = match[0] if match else None
+            if match is None:
+                item["unresolved"] = True
+            resolved.append(item)
+        return resolved
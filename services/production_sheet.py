@@ -0,0 +1,246 @@
+# services/production_sheet.py
+
+import json
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from dotenv import load_dotenv
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import CondPageBreak, Flowable, Frame, PageBreak, Paragraph, Spacer, Table, TableStyle
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.client import Client
+from models.order import Order, OrderStatusEnum
+from models.processed_order import ProcessedOrder
+from services.order_parser import product_key
+from services.pdf_store import content_key, pdf_store
+
+# Configuration de la fiche de production depuis le .env
+load_dotenv()
+SHEET_FETCH_SIZE = int(os.getenv("SHEET_FETCH_SIZE", "200"))
+
+# À incrémenter à chaque modification visible de la fiche (clé du stockage des PDF)
+SHEET_VERSION = "1"
+
+MARGIN = 15 * mm
+SECTION_MIN_HEIGHT = 30 * mm  # titre de client + quelques lignes : sinon, page suivante
+
+
+@dataclass(frozen=True)
+class SheetOrder:
+    """
+    Une commande de la journée, sous forme compacte (envoyée au worker de rendu).
+    items_json : articles d'une commande archivée (décodés au moment du rendu) ;
+    note : texte libre d'une commande saisie à la main (Order.content).
+    """
+    order_id: int
+    client_name: str
+    items_json: Optional[str] = None
+    note: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ProductionSheet:
+    delivery_date: str
+    orders: Tuple[SheetOrder, ...]
+
+    @property
+    def key(self) -> str:
+        return content_key(["sheet", SHEET_VERSION, self.delivery_date,
+                            [[o.client_name, o.items_json, o.note] for o in self.orders]])
+
+
+# ------------------- LECTURE -------------------
+
+async def load_production_sheet(session: AsyncSession, owner_id: int, day: date) -> ProductionSheet:
+    """
+    Commandes du boulanger livrées ce jour-là, triées par client : commandes WhatsApp
+    archivées (ProcessedOrder) et commandes saisies à la main (Order, hors annulées).
+    Lecture en flux par paquets de SHEET_FETCH_SIZE, colonnes utiles uniquement.
+    """
+    start = datetime.combine(day, time.min)
+    end = start + timedelta(days=1)
+    orders: List[SheetOrder] = []
+
+    processed = (
+        select(ProcessedOrder.id, Client.name, ProcessedOrder.items)
+        .outerjoin(Client, Client.id == ProcessedOrder.client_id)
+        .where(ProcessedOrder.owner_id == owner_id,
+               ProcessedOrder.delivery_date >= start, ProcessedOrder.delivery_date < end)
+        .execution_options(yield_per=SHEET_FETCH_SIZE)
+    )
+    async for order_id, client_name, items_json in await session.stream(processed):
+        orders.append(SheetOrder(order_id, client_name or "Client supprimé", items_json=items_json))
+
+    manual = (
+        select(Order.id, Client.name, Order.content)
+        .join(Client, Client.id == Order.client_id)
+        .where(Order.owner_id == owner_id, Order.status != OrderStatusEnum.annule,
+               Order.delivery_date >= start, Order.delivery_date < end)
+        .execution_options(yield_per=SHEET_FETCH_SIZE)
+    )
+    async for order_id, client_name, content in await session.stream(manual):
+        orders.append(SheetOrder(order_id, client_name, note=content))
+
+    orders.sort(key=lambda o: (o.client_name.casefold(), o.order_id))
+    return ProductionSheet(day.isoformat(), tuple(orders))
+
+
+# ------------------- RENDU -------------------
+
+class _PageWriter:
+    """
+    Mise en page incrémentale sur un Canvas ReportLab : chaque bloc est posé dans le cadre
+    de la page courante puis oublié. Contrairement à SimpleDocTemplate.build(), on ne garde
+    jamais la liste de tous les éléments du document ; seules restent en mémoire les pages
+    déjà compressées, jusqu'à l'écriture finale.
+    """
+
+    def __init__(self, stream: BinaryIO, title: str):
+        self.canvas = Canvas(stream, pagesize=A4, pageCompression=1)
+        self.canvas.setTitle(title)
+        self.title = title
+        self.page = 0
+        self._new_page()
+
+    def _new_page(self) -> None:
+        if self.page:
+            self.canvas.showPage()
+        self.page += 1
+        width, height = A4
+        self.canvas.setFont("Helvetica", 8)
+        self.canvas.drawString(MARGIN, MARGIN / 2, f"{self.title} — page {self.page}")
+        self.frame = Frame(MARGIN, MARGIN, width - 2 * MARGIN, height - 2 * MARGIN, showBoundary=0)
+
+    def add(self, flowable: Flowable) -> None:
+        # Sauts de page compris comme par SimpleDocTemplate
+        if isinstance(flowable, CondPageBreak):
+            if self.frame._y - self.frame._y1p < flowable.height and not self.frame._atTop:
+                self._new_page()
+            return
+        if isinstance(flowable, PageBreak):
+            if not self.frame._atTop:
+                self._new_page()
+            return
+        pending = [flowable]
+        while pending:
+            current = pending.pop(0)
+            if self.frame.add(current, self.canvas):
+                continue
+            # Tableau trop long : la partie qui tient ici, le reste page suivante
+            parts = self.frame.split(current, self.canvas)
+            if parts and self.frame.add(parts[0], self.canvas):
+                pending[:0] = parts[1:]
+                self._new_page()
+                continue
+            if self.frame._atTop:
+                raise ValueError("Élément trop grand pour une page de la fiche de production")
+            self._new_page()
+            pending.insert(0, current)
+
+    def save(self) -> None:
+        self.canvas.save()
+
+
+def _items_table(rows: List[List[str]], header: List[str], col_widths: List[float]) -> Table:
+    table = Table([header] + rows, colWidths=col_widths, hAlign="LEFT", repeatRows=1)
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#ef9100")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("ALIGN", (1, 0), (-1, -1), "CENTER"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#fff5d5")]),
+    ]))
+    return table
+
+
+def _format_quantity(quantity) -> str:
+    return str(int(quantity)) if float(quantity).is_integer() else f"{quantity:g}"
+
+
+def sheet_title(sheet: ProductionSheet) -> str:
+    return f"Fiche de production — livraison du {sheet.delivery_date}"
+
+
+def sheet_flowables(sheet: ProductionSheet) -> Iterator[Flowable]:
+    """
+    Éléments de la fiche, produits un par un : une section par commande (client, articles),
+    puis une page de totaux par produit, cumulés au fil des sections.
+    """
+    styles = getSampleStyleSheet()
+    client_style = ParagraphStyle(name="SheetClient", parent=styles["Heading2"], spaceBefore=6, spaceAfter=4)
+    note_style = ParagraphStyle(name="SheetNote", parent=styles["Normal"], fontSize=10, leading=13)
+    yield Paragraph(escape(sheet_title(sheet)), styles["Title"])
+    yield Paragraph(f"{len(sheet.orders)} commandes", styles["Normal"])
+    yield Spacer(1, 8)
+
+    # Totaux : par produit du catalogue, sinon par nom normalisé (articles non reconnus)
+    totals: Dict[Tuple[str, object], List] = {}
+    manual_orders = 0
+
+    # 1. Une section par commande
+    for order in sheet.orders:
+        yield CondPageBreak(SECTION_MIN_HEIGHT)
+        yield Paragraph(f"{escape(order.client_name)} <font size=9 color='#666666'>— n° {order.order_id}</font>", client_style)
+        if order.items_json is None:
+            manual_orders += 1
+            yield Paragraph(escape(order.note or "").replace("\n", "<br/>"), note_style)
+            continue
+        rows = []
+        for item in json.loads(order.items_json):
+            name, quantity = item.get("name", ""), item.get("quantity", 0)
+            rows.append([name, _format_quantity(quantity)])
+            key = ("id", item["product_id"]) if item.get("product_id") else ("name", product_key(name))
+            entry = totals.setdefault(key, [name, 0, item.get("product_id") is None])
+            entry[1] += quantity
+        yield _items_table(rows, ["Produit", "Quantité"], [130 * mm, 40 * mm])
+
+    # 2. Page de totaux par produit
+    yield PageBreak()
+    yield Paragraph("Totaux par produit", styles["Title"])
+    rows = [
+        [name + (" (hors catalogue)" if unresolved else ""), _format_quantity(quantity)]
+        for name, quantity, unresolved in sorted(totals.values(), key=lambda entry: entry[0].casefold())
+    ]
+    if rows:
+        yield _items_table(rows, ["Produit", "Total"], [130 * mm, 40 * mm])
+    if manual_orders:
+        yield Spacer(1, 8)
+        yield Paragraph(
+            f"{manual_orders} commande(s) saisie(s) en texte libre, non comptée(s) ci-dessus : voir leur section.",
+            note_style,
+        )
+
+
+def write_production_sheet(sheet: ProductionSheet, stream: BinaryIO) -> None:
+    """Écrit la fiche au fil de l'eau : chaque élément est posé sur la page courante puis oublié."""
+    writer = _PageWriter(stream, sheet_title(sheet))
+    for flowable in sheet_flowables(sheet):
+        writer.add(flowable)
+    writer.save()
+
+
+def production_sheet_pdf(sheet: ProductionSheet) -> str:
+    """Chemin de la fiche dans le stockage partagé ; rendue seulement si ces commandes ont changé."""
+    key = sheet.key
+    cached = pdf_store.get(key)
+    if cached:
+        return cached
+    path = pdf_store.temp_path(key)
+    try:
+        with open(path, "wb") as stream:
+            write_production_sheet(sheet, stream)
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return pdf_store.commit(key, path)
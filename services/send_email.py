@@ -1,15 +1,16 @@
 import os
-import smtplib
 from email.message import EmailMessage
 from email.utils import make_msgid
-from email.mime.application import MIMEApplication
 from dotenv import load_dotenv
 
+from services.mail_transport import mail_transport
+
 load_dotenv()  # charge les variables d'environnement du fichier .env
 
-def send_order_email(to_email: str, pdf_path: str, client_name: str, delivery_date: str):
+async def send_order_email(to_email: str, pdf_path: str, client_name: str, delivery_date: str):
     """
-    Envoie un email avec un PDF en pièce jointe via SMTP.
+    Envoie un email avec un PDF en pièce jointe via le transport SMTP partagé
+    (services/mail_transport.py : connexions TLS authentifiées réutilisées, envoi sans bloquer la boucle).
 
     Args:
         to_email (str): Adresse email du destinataire
@@ -17,14 +18,10 @@ def send_order_email(to_email: str, pdf_path: str, client_name: str, delivery_da
         client_name (str): Nom du client (pour personnalisation titre + corps)
         delivery_date (str): Date de livraison format texte
     """
-    # Récupération variables SMTP dans l'environnement
-    SMTP_SERVER = os.getenv("SMTP_SERVER")
-    SMTP_PORT = os.getenv("SMTP_PORT")
-    SMTP_USERNAME = os.getenv("SMTP_USERNAME")
-    SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+    # Expéditeur depuis l'environnement (serveur et identifiants : voir mail_transport)
     SMTP_FROM = os.getenv("SMTP_FROM")
 
-    if not all([SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SMTP_FROM]):
+    if not (SMTP_FROM and mail_transport.host and mail_transport.username):
         raise RuntimeError("Veuillez définir toutes les variables SMTP dans le fichier .env")
 
     # Construction de l'email
@@ -46,23 +43,14 @@ def send_order_email(to_email: str, pdf_path: str, client_name: str, delivery_da
     try:
         with open(pdf_path, "rb") as f:
             pdf_data = f.read()
-        filename = os.path.basename(pdf_path)
-        part = MIMEApplication(pdf_data, _subtype="pdf")
-        part.add_header("Content-Disposition", f"attachment; filename={filename}")
-        msg.attach(part)
+        # Le fichier stocké porte une empreinte : nom lisible pour la pièce jointe
+        safe_client = "".join(c for c in client_name if c.isalnum() or c in (' ', '_')).replace(" ", "_")
+        filename = f"bon_commande_{safe_client}_{delivery_date}.pdf"
+        msg.add_attachment(pdf_data, maintype="application", subtype="pdf", filename=filename)
     except FileNotFoundError:
         raise RuntimeError(f"Fichier PDF introuvable: {pdf_path}")
     except Exception as e:
         raise RuntimeError(f"Erreur lors de la lecture du PDF: {e}")
 
-    # Envoi SMTP (TLS)
-    try:
-        port = int(SMTP_PORT)
-        with smtplib.SMTP(SMTP_SERVER, port) as server:
-            server.starttls()  # sécuriser la connexion
-            server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.send_message(msg)
-    except smtplib.SMTPException as e:
-        raise RuntimeError(f"Erreur SMTP lors de l'envoi : {e}")
-    except Exception as e:
-        raise RuntimeError(f"Erreur inattendue lors de l'envoi : {e}")
\ No newline at end of file
+    # Envoi SMTP (connexion du pool, TLS) ; MailTransportError hérite de RuntimeError
+    await mail_transport.send(msg)
\ No newline at end of file
@@ -0,0 +1,90 @@
+# services/webhook_dedup.py
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.webhook_job import WebhookJob
+from services.job_queue import enqueue_message
+
+# Configuration de la déduplication depuis le .env
+load_dotenv()
+WEBHOOK_DEDUP_CACHE_SIZE = int(os.getenv("WEBHOOK_DEDUP_CACHE_SIZE", "10000"))
+WEBHOOK_DEDUP_WINDOW_SECONDS = int(os.getenv("WEBHOOK_DEDUP_WINDOW_SECONDS", "300"))
+
+
+def dedup_key(sender_number: str, message_text: str, provider_message_id: Optional[str] = None,
+              timestamp: Optional[float] = None) -> str:
+    """
+    Clé d'idempotence d'une livraison webhook :
+    - l'id du message chez le provider s'il est fourni (identique à chaque retry),
+    - sinon une empreinte expéditeur + texte + créneau de WEBHOOK_DEDUP_WINDOW_SECONDS,
+      calculé sur l'horodatage du provider si présent, sinon l'heure de réception.
+    """
+    if provider_message_id:
+        return f"id:{provider_message_id}"
+    bucket = int((timestamp if timestamp is not None else time.time()) // WEBHOOK_DEDUP_WINDOW_SECONDS)
+    raw = "\x1f".join((sender_number, message_text, str(bucket)))
+    return "h:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RecentDeliveries:
+    """
+    LRU borné des dernières clés reçues (clé -> id du job) : un retry du provider
+    est reconnu sans requête en base. La contrainte unique de webhook_jobs.dedup_key
+    reste la référence (redémarrage, plusieurs processus, clé sortie du LRU).
+    """
+
+    def __init__(self, max_entries: int = WEBHOOK_DEDUP_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self.hits = 0
+        self.duplicates_in_db = 0
+
+    def get(self, key: str) -> Optional[int]:
+        job_id = self._entries.get(key)
+        if job_id is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return job_id
+
+    def put(self, key: str, job_id: int) -> None:
+        self._entries[key] = job_id
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+recent_deliveries = RecentDeliveries()
+
+
+async def enqueue_once(session: AsyncSession, sender_number: str, message_text: str, key: str) -> Tuple[int, bool]:
+    """
+    Met le message en file s'il n'a pas déjà été reçu.
+    Retourne (id du job, True) pour un nouveau message, (id du job existant, False) pour un doublon.
+    """
+    job_id = recent_deliveries.get(key)
+    if job_id is not None:
+        return job_id, False
+
+    try:
+        job_id = await enqueue_message(session, sender_number, message_text, dedup_key=key)
+        created = True
+    except IntegrityError:
+        # Doublon absent du LRU (redémarrage, autre processus) : la contrainte unique a tranché
+        await session.rollback()
+        job_id = await session.scalar(select(WebhookJob.id).where(WebhookJob.dedup_key == key))
+        recent_deliveries.duplicates_in_db += 1
+        created = False
+    recent_deliveries.put(key, job_id)
+    return job_id, created
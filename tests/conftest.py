@@ -0,0 +1,72 @@
+# tests/conftest.py
+"""
+Configuration commune des tests :
+- base SQLite temporaire recréée pour chaque test (NullPool : chaque test a sa propre boucle),
+- stockage PDF dans un dossier temporaire,
+- client HTTP ASGI authentifié en tant qu'un utilisateur donné (sans JWT).
+
+Les variables d'environnement sont posées avant tout import de l'application :
+database.py et les services lisent leur configuration à l'import.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+import httpx
+import pytest
+
+TMP_DIR = tempfile.mkdtemp(prefix="baguette_tests_")
+DB_PATH = os.path.join(TMP_DIR, "tests.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+os.environ["DB_POOL_DISABLED"] = "1"
+os.environ["PDF_STORE_DIR"] = os.path.join(TMP_DIR, "pdfs")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def _reset_database() -> None:
+    from database import Base, engine
+    from migrations import run_migrations
+    from services.catalog_cache import catalog_cache
+    from services.client_directory import client_directory
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
+    # Caches du processus : les ids de la base précédente ne doivent pas survivre
+    client_directory.clear()
+    catalog_cache.clear()
+
+
+@pytest.fixture
+def db():
+    """Base vide, schéma et migrations appliqués."""
+    asyncio.run(_reset_database())
+    yield
+
+
+@pytest.fixture
+def api(db):
+    """Fabrique de clients HTTP authentifiés : api(user_id) -> httpx.AsyncClient."""
+    from database import AsyncSessionLocal
+    from main import app
+    from models import User
+    from routers import auth, clients, orders
+
+    def factory(user_id: int) -> httpx.AsyncClient:
+        async def current_user():
+            async with AsyncSessionLocal() as session:
+                return await session.get(User, user_id)
+
+        for module in (auth, clients, orders):
+            app.dependency_overrides[module.get_current_user] = current_user
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    yield factory
+    app.dependency_overrides.clear()
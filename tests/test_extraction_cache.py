@@ -0,0 +1,51 @@
+# tests/test_extraction_cache.py
+
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import update
+
+from database import AsyncSessionLocal
+from models.llm_cache_entry import LLMCacheEntry
+from services.extraction_cache import cache_key, get_cached_extraction, store_extraction
+
+ANSWERED_ON = date(2026, 10, 10)
+TODAY = date(2026, 10, 18)
+
+
+def _replay(message: str, delivery_date):
+    """Extraction mise en cache le 10/10, relue le 18/10 pour le même message."""
+    async def scenario():
+        key = cache_key(message, "catalogue")
+        async with AsyncSessionLocal() as session:
+            await store_extraction(session, key, None, {"is_order": True, "delivery_date": delivery_date})
+            await session.execute(update(LLMCacheEntry).values(answered_on=ANSWERED_ON))
+            await session.commit()
+            return await get_cached_extraction(session, key, message, today=TODAY)
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("message, cached, expected", [
+    # Date relative : recalculée par rapport au jour de la relecture
+    ("10 baguettes pour demain", "2026-10-11", "2026-10-19"),
+    # Date explicite jj/mm : rejouée sans décalage
+    ("10 baguettes pour le 20/10", "2026-10-20", "2026-10-20"),
+])
+def test_dates_found_in_the_text_are_resolved_again(db, message, cached, expected):
+    assert _replay(message, cached)["delivery_date"] == expected
+
+
+@pytest.mark.parametrize("message", [
+    # Date absolue que seul GPT sait lire : ni décalée de 8 jours, ni rejouée à l'aveugle
+    "10 baguettes pour le 20 octobre",
+    # Indices contradictoires : GPT doit trancher à nouveau
+    "10 baguettes demain le 25/10",
+])
+def test_dates_that_cannot_be_re_derived_are_a_miss(db, message):
+    assert _replay(message, "2026-10-20") is None
+
+
+def test_entries_without_a_date_are_replayed_unchanged(db):
+    assert _replay("merci pour la livraison", None) == {"is_order": True, "delivery_date": None}
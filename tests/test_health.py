@@ -0,0 +1,20 @@
+# tests/test_health.py
+
+import asyncio
+
+from services.catalog_cache import catalog_cache
+
+
+def test_health_exposes_cache_counters(api):
+    async def scenario():
+        async with api(1) as client:
+            return await client.get("/health")
+
+    catalog_cache.hits = 7
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ok"
+    assert body["catalog_cache"]["hits"] == 7
+    assert {"size", "misses", "evictions"} <= set(body["catalog_cache"])
+    assert "hits" in body["client_directory"]
@@ -0,0 +1,89 @@
+# tests/test_job_queue.py
+
+import asyncio
+
+from sqlalchemy import insert, select
+
+from database import AsyncSessionLocal
+from models import Client, MessageLog, User, WebhookJob
+from services import job_queue, message_handler
+from services.job_queue import (
+    JobWorkerPool, enqueue_message, fail_job, handle_whatsapp_jobs, lease_next_jobs, record_whatsapp_failure,
+)
+
+SENDER = "+33612345678"
+
+
+def test_new_message_does_not_bypass_retry_backoff(db):
+    async def scenario():
+        async with AsyncSessionLocal() as session:
+            first_id = await enqueue_message(session, SENDER, "2 baguettes pour demain merci")
+            [job] = await lease_next_jobs(session)
+            assert job.id == first_id
+            await fail_job(session, job, "erreur GPT")
+
+            # Nouveau message du même expéditeur pendant le backoff du premier
+            second_id = await enqueue_message(session, SENDER, "Et 4 croissants, c'est tout.")
+            leased = await lease_next_jobs(session)
+            assert [job.id for job in leased] == [second_id]
+
+            retried = await session.get(WebhookJob, first_id)
+            await session.refresh(retried)
+            assert retried.status == "pending" and retried.attempts == 1
+
+    asyncio.run(scenario())
+
+
+async def _seed_client() -> None:
+    async with AsyncSessionLocal() as session:
+        owner_id = await session.scalar(insert(User).values(email="b@example.com", hashed_password="x").returning(User.id))
+        session.add(Client(name="Le Soleil", phone=SENDER, owner_id=owner_id))
+        await session.commit()
+
+
+def _failing_gpt(monkeypatch):
+    async def route_extraction(*args, **kwargs):
+        raise RuntimeError("API indisponible (500)")
+    monkeypatch.setattr(message_handler, "route_extraction", route_extraction)
+
+
+async def _run_once(pool: JobWorkerPool):
+    """Un passage de worker : bail des jobs disponibles, traitement, puis état des jobs et des logs."""
+    async with AsyncSessionLocal() as session:
+        jobs = await lease_next_jobs(session)
+    await pool._process(jobs)
+    async with AsyncSessionLocal() as session:
+        jobs = list(await session.scalars(select(WebhookJob).order_by(WebhookJob.id)))
+        statuses = list(await session.scalars(select(MessageLog.status)))
+    return [(job.status, job.attempts) for job in jobs], statuses
+
+
+def test_api_error_is_retried_with_backoff(db, monkeypatch):
+    _failing_gpt(monkeypatch)
+    pool = JobWorkerPool(handle_whatsapp_jobs, on_failure=record_whatsapp_failure)
+
+    async def scenario():
+        await _seed_client()
+        async with AsyncSessionLocal() as session:
+            await enqueue_message(session, SENDER, "Il me faudrait des viennoiseries pour la réunion, c'est tout.")
+        jobs, logs = await _run_once(pool)
+        assert jobs == [("pending", 1)]
+        assert logs == []  # pas de log d'erreur tant que le job peut être réessayé
+
+    asyncio.run(scenario())
+
+
+def test_error_log_is_written_when_the_job_fails_for_good(db, monkeypatch):
+    _failing_gpt(monkeypatch)
+    monkeypatch.setattr(job_queue, "JOB_MAX_ATTEMPTS", 1)
+    pool = JobWorkerPool(handle_whatsapp_jobs, on_failure=record_whatsapp_failure)
+
+    async def scenario():
+        await _seed_client()
+        async with AsyncSessionLocal() as session:
+            await enqueue_message(session, SENDER, "Il me faudrait des viennoiseries pour la réunion, c'est tout.")
+        jobs, logs = await _run_once(pool)
+        assert jobs == [("failed", 1)]
+        assert logs == ["erreur GPT"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,134 @@
+# tests/test_llm_client.py
+
+import asyncio
+import importlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services import llm_client
+
+MAX_CONCURRENCY = 3
+
+
+class StubOpenAI:
+    """
+    Serveur HTTP local imitant POST /v1/chat/completions : chaque réponse attend `delay`
+    secondes ; les premiers appels peuvent échouer avec les codes de `failures` (429, 500...).
+    Compte les requêtes reçues et le nombre maximal de requêtes en vol.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.failures = []
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status = stub._enter()
+                try:
+                    time.sleep(stub.delay)
+                finally:
+                    stub._leave()
+                payload = {"error": {"message": "stub", "type": "server_error"}} if status != 200 else {
+                    "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": body["model"],
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": f"réponse {body['model']}"}}],
+                }
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def _enter(self) -> int:
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return self.failures.pop(0) if self.failures else 200
+
+    def _leave(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def start(self) -> None:
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Stub démarré ; services/llm_client.py rechargé avec OPENAI_BASE_URL pointant dessus."""
+    server = StubOpenAI()
+    server.start()
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setenv("OPENAI_MAX_CONCURRENCY", str(MAX_CONCURRENCY))
+    monkeypatch.setenv("OPENAI_MAX_RETRIES", "2")
+    monkeypatch.setenv("OPENAI_RETRY_BASE_SECONDS", "0.01")
+    importlib.reload(llm_client)
+    yield server
+    server.stop()
+    monkeypatch.undo()
+    importlib.reload(llm_client)
+
+
+def _chat_all(count: int):
+    async def scenario():
+        client = llm_client.get_llm_client()
+        try:
+            return await asyncio.gather(*(
+                client.chat([{"role": "user", "content": f"message {i}"}], model="stub-model") for i in range(count)
+            ))
+        finally:
+            await llm_client.close_llm_client()
+
+    return asyncio.run(scenario())
+
+
+def test_concurrent_calls_overlap_up_to_the_semaphore_limit(stub):
+    stub.delay = 0.2
+    start = time.perf_counter()
+    replies = _chat_all(3 * MAX_CONCURRENCY)
+    elapsed = time.perf_counter() - start
+
+    assert replies == ["réponse stub-model"] * (3 * MAX_CONCURRENCY)
+    assert stub.max_in_flight == MAX_CONCURRENCY
+    # 3 vagues de 0,2 s en parallèle, et non 9 appels à la suite (1,8 s)
+    assert elapsed < 1.2
+
+
+def test_rate_limit_and_server_errors_are_retried(stub):
+    stub.failures = [429, 500]
+    assert _chat_all(1) == ["réponse stub-model"]
+    assert stub.requests == 3
+
+
+def test_gives_up_after_max_retries(stub):
+    stub.failures = [500, 500, 500]
+    with pytest.raises(llm_client.LLMError):
+        _chat_all(1)
+    assert stub.requests == 3
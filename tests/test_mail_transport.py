@@ -0,0 +1,67 @@
+# tests/test_mail_transport.py
+
+import asyncio
+
+import pytest
+
+from benchmarks.bench_smtp_transport import StandInSMTPServer, make_message
+from services.mail_transport import SMTPTransport
+
+POOL_SIZE = 3
+
+
+@pytest.fixture
+def smtp_server():
+    # Poignée de main lente : les premiers envois concurrents ouvrent chacun leur connexion
+    server = StandInSMTPServer(handshake_ms=50)
+    server.start()
+    yield server
+    server.stop()
+
+
+def _transport(server: StandInSMTPServer) -> SMTPTransport:
+    return SMTPTransport(host="127.0.0.1", port=server.port, username="test", password="secret",
+                         starttls=False, pool_size=POOL_SIZE, max_idle=60, timeout=5)
+
+
+def test_one_handshake_per_pooled_connection(smtp_server):
+    transport = _transport(smtp_server)
+    messages = [make_message(i, b"%PDF-1.4") for i in range(20)]
+
+    async def scenario():
+        await asyncio.gather(*(transport.send(msg) for msg in messages))
+        await transport.close()
+
+    asyncio.run(scenario())
+    assert transport.handshakes == POOL_SIZE
+    stats = smtp_server.snapshot()
+    assert stats["connexions"] == stats["auth"] == POOL_SIZE
+    assert stats["messages"] == 20
+
+
+def test_sequential_sends_reuse_one_connection(smtp_server):
+    transport = _transport(smtp_server)
+
+    async def scenario():
+        for i in range(5):
+            await transport.send(make_message(i, b"%PDF-1.4"))
+        await transport.close()
+
+    asyncio.run(scenario())
+    assert transport.handshakes == 1
+    assert smtp_server.snapshot()["messages"] == 5
+
+
+def test_reconnects_after_server_closes_idle_connections(smtp_server):
+    transport = _transport(smtp_server)
+
+    async def scenario():
+        await transport.send(make_message(0, b"%PDF-1.4"))
+        smtp_server.drop_all()
+        await asyncio.sleep(0.1)
+        await transport.send(make_message(1, b"%PDF-1.4"))
+        await transport.close()
+
+    asyncio.run(scenario())
+    assert transport.handshakes == 2
+    assert smtp_server.snapshot()["messages"] == 2
@@ -0,0 +1,99 @@
+# tests/test_message_handler.py
+
+import asyncio
+
+from sqlalchemy import func, insert, select
+
+from database import AsyncSessionLocal
+from models import Client, MessageLog, ProcessedOrder, Product, User
+from services import message_handler
+from services.model_router import RoutedExtraction
+
+SENDER = "+33612345678"
+MESSAGE = "Pour la semaine prochaine il me faudrait des baguettes, comme vous voulez"
+
+
+async def _seed() -> None:
+    async with AsyncSessionLocal() as session:
+        owner_id = await session.scalar(insert(User).values(email="b@example.com", hashed_password="x").returning(User.id))
+        session.add(Client(name="Le Soleil", phone=SENDER, owner_id=owner_id))
+        await session.flush()
+        client_id = await session.scalar(select(Client.id))
+        session.add(Product(name="Baguette", client_id=client_id))
+        await session.commit()
+
+
+async def _counts():
+    async with AsyncSessionLocal() as session:
+        orders = await session.scalar(select(func.count(ProcessedOrder.id)))
+        statuses = list(await session.scalars(select(MessageLog.status).order_by(MessageLog.id)))
+    return orders, statuses
+
+
+def _route_to(payload):
+    async def route_extraction(*args, **kwargs):
+        return RoutedExtraction(dict(payload), "fast-model", 12)
+    return route_extraction
+
+
+def test_order_without_delivery_date_is_logged_without_archive(db, monkeypatch):
+    monkeypatch.setattr(message_handler, "route_extraction", _route_to(
+        {"is_order": True, "delivery_date": None, "items": [{"name": "Baguette", "quantity": 10}]}
+    ))
+
+    async def scenario():
+        await _seed()
+        result = await message_handler.process_whatsapp_message(SENDER, MESSAGE)
+        assert result["is_order"] is True
+        assert await _counts() == (0, [message_handler.MISSING_DATE_STATUS])
+
+    asyncio.run(scenario())
+
+
+def test_direct_call_rolls_back_before_logging_the_error(db, monkeypatch):
+    """Appel direct (hors file de jobs) : l'erreur est enregistrée et signalée dans le retour."""
+    monkeypatch.setattr(message_handler, "route_extraction", _route_to(
+        {"is_order": True, "delivery_date": "2026-10-20", "items": [{"name": "Baguette", "quantity": 10}]}
+    ))
+
+    async def failing_store(session, key, client_id, parsed):
+        session.add(ProcessedOrder(items="[]", delivery_date=None))
+        await session.flush()  # IntegrityError : delivery_date obligatoire
+
+    monkeypatch.setattr(message_handler, "store_extraction", failing_store)
+
+    async def scenario():
+        await _seed()
+        result = await message_handler.process_whatsapp_message(SENDER, MESSAGE)
+        assert "error" in result
+        assert await _counts() == (0, ["erreur GPT"])
+
+    asyncio.run(scenario())
+
+
+def test_process_endpoint_order_without_delivery_date(api, monkeypatch):
+    from routers import messages
+
+    monkeypatch.setattr(messages, "route_extraction", _route_to(
+        {"is_order": True, "delivery_date": None, "items": [{"name": "Baguette", "quantity": 10}]}
+    ))
+
+    async def scenario():
+        await _seed()
+        async with api(1) as client:
+            response = await client.post("/messages/process", json={"phone_number": SENDER, "message": MESSAGE})
+        assert response.status_code == 200, response.text
+        assert response.json() == {"status": "date de livraison manquante"}
+        assert await _counts() == (0, [message_handler.MISSING_DATE_STATUS])
+
+    asyncio.run(scenario())
+
+
+def test_process_endpoint_unknown_sender_is_404(api):
+    async def scenario():
+        await _seed()
+        async with api(1) as client:
+            response = await client.post("/messages/process", json={"phone_number": "+33699999999", "message": MESSAGE})
+        assert response.status_code == 404, response.text
+
+    asyncio.run(scenario())
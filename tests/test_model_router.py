@@ -0,0 +1,43 @@
+# tests/test_model_router.py
+
+import asyncio
+import json
+
+from services import model_router
+
+VALID_REPLY = json.dumps({"is_order": True, "delivery_date": "2026-10-20", "items": [{"name": "Baguette", "quantity": 10}]})
+
+
+def _fake_models(monkeypatch, fast_reply: str, fast_seconds: float, strong_seconds: float):
+    async def extract(client_name, products, system_prompt, message_text):
+        await asyncio.sleep(fast_seconds)
+        return fast_reply
+
+    class StrongClient:
+        async def chat(self, **kwargs):
+            await asyncio.sleep(strong_seconds)
+            return VALID_REPLY
+
+    monkeypatch.setattr(model_router.extraction_batcher, "extract", extract)
+    monkeypatch.setattr(model_router, "get_llm_client", lambda: StrongClient())
+
+
+def test_latency_is_recorded_per_model_call(monkeypatch):
+    _fake_models(monkeypatch, "désolé, je ne sais pas", fast_seconds=0.05, strong_seconds=0.15)
+    routed = asyncio.run(model_router.route_extraction("Le Soleil", [], "prompt", "10 baguettes", None))
+
+    assert routed.escalated and routed.model == model_router.LLM_STRONG_MODEL
+    fast, strong = routed.attempts
+    assert (fast.model, fast.usable) == (model_router.LLM_FAST_MODEL, False)
+    assert (strong.model, strong.usable) == (model_router.LLM_STRONG_MODEL, True)
+    assert 50 <= routed.fast_latency_ms < 150 <= routed.strong_latency_ms
+    assert routed.latency_ms >= routed.fast_latency_ms + routed.strong_latency_ms
+
+
+def test_no_escalation_has_a_single_attempt(monkeypatch):
+    _fake_models(monkeypatch, VALID_REPLY, fast_seconds=0.0, strong_seconds=0.0)
+    routed = asyncio.run(model_router.route_extraction("Le Soleil", [], "prompt", "10 baguettes", None))
+
+    assert not routed.escalated
+    assert [attempt.model for attempt in routed.attempts] == [model_router.LLM_FAST_MODEL]
+    assert routed.strong_latency_ms is None
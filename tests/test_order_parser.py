@@ -0,0 +1,46 @@
+# tests/test_order_parser.py
+
+from datetime import date
+
+import pytest
+
+from services.order_parser import PARSER_MIN_CONFIDENCE, parse_order, resolve_delivery_date
+
+TODAY = date(2026, 10, 18)  # dimanche
+TOMORROW = date(2026, 10, 19)
+CATALOG = ["Baguette", "Croissant"]
+
+
+@pytest.mark.parametrize("message", [
+    "10 baguettes demain à 8.05",
+    "10 baguettes demain à 8.45",
+    "10 baguettes demain à 8h45",
+    "10 baguettes pour demain, livraison à 8.45",
+    "10 baguettes le 32/13 demain",
+])
+def test_times_and_invalid_dates_are_not_read_as_delivery_dates(message):
+    assert resolve_delivery_date(message, TODAY) == TOMORROW
+    result = parse_order(message, CATALOG, today=TODAY)
+    # Soit l'heure n'a pas été comprise (GPT), soit la date retenue est bien demain
+    assert result.confidence < PARSER_MIN_CONFIDENCE or result.payload["delivery_date"] == TOMORROW.isoformat()
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("10 baguettes pour le 20/10", date(2026, 10, 20)),
+    ("10 baguettes mardi 20/10", date(2026, 10, 20)),
+    ("10 baguettes pour le 02/01/27", date(2027, 1, 2)),
+])
+def test_explicit_dates(message, expected):
+    result = parse_order(message, CATALOG, today=TODAY)
+    assert result.payload["delivery_date"] == expected.isoformat()
+    assert result.confidence >= PARSER_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize("message", [
+    "10 baguettes demain 25/12",
+    "10 baguettes mercredi 20/10",
+])
+def test_conflicting_explicit_and_relative_dates_go_to_gpt(message):
+    result = parse_order(message, CATALOG, today=TODAY)
+    assert result.confidence < PARSER_MIN_CONFIDENCE
+    assert "dates contradictoires" in result.reasons
@@ -0,0 +1,73 @@
+# tests/test_pagination.py
+
+import asyncio
+import json
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from database import AsyncSessionLocal
+from models import Client, ProcessedOrder, User
+
+
+async def _seed(count: int) -> int:
+    """Un boulanger, `count` clients et `count` commandes archivées, insérés dans la même seconde."""
+    async with AsyncSessionLocal() as session:
+        owner_id = await session.scalar(insert(User).values(email="b@example.com", hashed_password="x").returning(User.id))
+        client_ids = [
+            await session.scalar(insert(Client).values(name=f"Client {i}", owner_id=owner_id).returning(Client.id))
+            for i in range(count)
+        ]
+        if client_ids:
+            await session.execute(insert(ProcessedOrder), [
+                {"client_id": client_id, "owner_id": owner_id, "status": "envoyé",
+                 "items": json.dumps([{"name": "Baguette", "quantity": 1}]), "delivery_date": datetime(2026, 10, 20)}
+                for client_id in client_ids
+            ])
+        await session.commit()
+    return owner_id
+
+
+async def _all_ids(client, url: str, limit: int, max_pages: int = 50):
+    ids, cursor = [], None
+    for _ in range(max_pages):
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(url, params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+    raise AssertionError(f"pagination sans fin : {ids[:20]}...")
+
+
+def test_keyset_pages_rows_created_in_the_same_second(api):
+    async def scenario():
+        owner_id = await _seed(7)
+        async with api(owner_id) as client:
+            for url in ("/clients/clients/", "/orders/orders/processed"):
+                ids = await _all_ids(client, url, limit=2)
+                assert len(ids) == 7 and len(set(ids)) == 7, (url, ids)
+                assert ids == sorted(ids, reverse=True), (url, ids)
+
+    asyncio.run(scenario())
+
+
+
+def test_keyset_pages_rows_written_by_server_default(api):
+    """Lignes antérieures au défaut Python : created_at écrit par SQLite, réécrit par la migration 8."""
+    async def scenario():
+        from database import engine
+        from migrations.versions import _v8_keyset_created_at_format
+
+        owner_id = await _seed(0)
+        async with engine.begin() as conn:
+            for i in range(5):
+                await conn.exec_driver_sql(f"INSERT INTO clients (name, owner_id) VALUES ('Ancien {i}', {owner_id})")
+            await conn.run_sync(_v8_keyset_created_at_format)
+        async with api(owner_id) as client:
+            ids = await _all_ids(client, "/clients/clients/", limit=2)
+        assert ids == [5, 4, 3, 2, 1]
+
+    asyncio.run(scenario())
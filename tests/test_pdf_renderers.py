@@ -0,0 +1,23 @@
+# tests/test_pdf_renderers.py
+
+import pytest
+
+from services.pdf_renderers import OrderDocument, OrderRenderer, get_renderer
+
+
+def test_backend_without_write_fails_at_instantiation():
+    class Incomplete(OrderRenderer):
+        name = "incomplet"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_reportlab_renderer_writes_a_pdf():
+    order = OrderDocument(client_name="Le Soleil", items=[{"product": "Baguette", "quantity": 10}], delivery_date="2026-10-20")
+    assert get_renderer("reportlab").render(order).startswith(b"%PDF")
+
+
+def test_unknown_renderer_is_rejected():
+    with pytest.raises(ValueError):
+        get_renderer("inconnu")
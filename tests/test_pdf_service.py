@@ -0,0 +1,35 @@
+# tests/test_pdf_service.py
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.pdf_service import PDFRenderService, PDFServiceBusy, PDFServiceError
+
+
+def test_timed_out_render_keeps_its_slot_until_the_worker_finishes():
+    release = threading.Event()
+
+    def slow(_):
+        release.wait(5)
+        return "lent.pdf"
+
+    async def scenario():
+        service = PDFRenderService(workers=1, max_pending=1, queue_timeout=0.2, render_timeout=0.1)
+        # Threads plutôt que processus : même contrat de futures, sans pickling des fonctions de test
+        service._executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            with pytest.raises(PDFServiceError):
+                await service._submit(slow, None, "lent")
+            # Le worker rend encore le PDF abandonné : la file est toujours pleine
+            with pytest.raises(PDFServiceBusy):
+                await service._submit(lambda _: "rapide.pdf", None, "rapide")
+            release.set()
+            return await service._submit(lambda _: "rapide.pdf", None, "rapide")
+        finally:
+            release.set()
+            service._executor.shutdown(wait=True)
+
+    assert asyncio.run(scenario()) == "rapide.pdf"
@@ -0,0 +1,64 @@
+# tests/test_processed_orders.py
+
+import asyncio
+import json
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import event, insert
+
+from database import AsyncSessionLocal, engine
+from models import Client, ProcessedOrder, User
+
+
+@contextmanager
+def count_selects():
+    """Requêtes SELECT exécutées sur le moteur, hors lecture de l'utilisateur authentifié (simulé)."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM users" not in statement:
+            statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def _seed(clients: int, orders_per_client: int) -> int:
+    async with AsyncSessionLocal() as session:
+        owner_id = await session.scalar(insert(User).values(email="b@example.com", hashed_password="x").returning(User.id))
+        for i in range(clients):
+            client_id = await session.scalar(insert(Client).values(name=f"Client {i}", owner_id=owner_id).returning(Client.id))
+            await session.execute(insert(ProcessedOrder), [
+                {"client_id": client_id, "owner_id": owner_id, "status": "envoyé",
+                 "items": json.dumps([{"name": "Baguette", "quantity": j + 1}]), "delivery_date": datetime(2026, 10, 20)}
+                for j in range(orders_per_client)
+            ])
+        await session.commit()
+    return owner_id
+
+
+def test_processed_orders_list_is_one_select_per_page(api):
+    async def scenario():
+        owner_id = await _seed(clients=6, orders_per_client=4)
+        async with api(owner_id) as client:
+            cursor, pages, seen = None, 0, []
+            while True:
+                with count_selects() as statements:
+                    response = await client.get("/orders/orders/processed", params={"limit": 5, **({"cursor": cursor} if cursor else {})})
+                assert response.status_code == 200, response.text
+                assert len(statements) == 1, statements
+                page = response.json()
+                assert all(item["client_name"].startswith("Client ") for item in page["items"])
+                seen.extend(item["id"] for item in page["items"])
+                pages += 1
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    break
+        assert pages == 5
+        assert sorted(seen) == list(range(1, 25))
+
+    asyncio.run(scenario())
@@ -2,6 +2,10 @@
 
 from typing import List
 
+# Version du prompt : à incrémenter à chaque modification du texte ou du format attendu
+# (invalide le cache des réponses GPT, voir services/extraction_cache.py)
+PROMPT_VERSION = "1"
+
 def generate_prompt(client_name: str, product_list: List[str]) -> str:
     """
     Génère un prompt système destiné à ChatGPT pour l'analyse précise des commandes WhatsApp
@@ -38,4 +42,40 @@ def generate_prompt(client_name: str, product_list: List[str]) -> str:
         "{ \"is_order\": false }\n"
         "Respecte ce format à la lettre sans ajouter aucun commentaire ni explication."
     )
-    return prompt
\ No newline at end of file
+    return prompt
+
+def generate_batch_prompt() -> str:
+    """
+    Génère le prompt système d'une requête groupée : plusieurs messages WhatsApp, éventuellement
+    de clients différents, analysés en un seul appel (voir services/extraction_batcher.py).
+
+    Le message utilisateur associé est un tableau JSON d'objets
+    {"id": ..., "client": ..., "products": [...], "message": ...}.
+
+    Returns:
+        str: Prompt système demandant un résultat par identifiant de message.
+    """
+    prompt = (
+        "Tu es un assistant expert dans la prise de commandes pour une boulangerie artisanale.\n"
+        "Tu reçois un tableau JSON de messages WhatsApp envoyés par des clients professionnels. "
+        "Chaque élément contient un identifiant \"id\", le nom du client \"client\", "
+        "la liste des produits de ce client \"products\" et le texte du message \"message\".\n"
+        "Analyse chaque message indépendamment, en ne retenant QUE les produits de la liste de son propre client. "
+        "Ignore tout produit ne figurant pas dans cette liste, même s'il en parle.\n"
+        "Pour chaque message, extrait de manière structurée :\n"
+        "- le ou les produits commandés avec la quantité demandée,\n"
+        "- la date de livraison souhaitée si elle est mentionnée (format 'YYYY-MM-DD'),\n"
+        "- un indicateur si le message correspond à une commande ou non.\n"
+        "Retourne systématiquement ta réponse uniquement sous ce format JSON, avec exactement "
+        "un résultat par identifiant reçu :\n"
+        "{\n"
+        "  \"results\": [\n"
+        "    {\"id\": \"...\", \"is_order\": true, \"delivery_date\": \"YYYY-MM-DD\", "
+        "\"items\": [{\"name\": \"...\", \"quantity\": ...}]},\n"
+        "    {\"id\": \"...\", \"is_order\": false}\n"
+        "  ]\n"
+        "}\n"
+        "delivery_date vaut null si la date n'est pas précisée.\n"
+        "Respecte ce format à la lettre sans ajouter aucun commentaire ni explication."
+    )
+    return prompt
@@ -0,0 +1,99 @@
+# utils/llm_json.py
+
+import json
+import re
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from schemas import OrderExtraction
+
+# Schéma compilé une seule fois au chargement du module (validation Pydantic en Rust)
+_ORDER_ADAPTER = TypeAdapter(OrderExtraction)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+
+class LLMReplyError(ValueError):
+    """La réponse du modèle ne contient pas d'objet JSON conforme au contrat attendu."""
+    pass
+
+
+def _json_objects(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    Positions (début, fin) des objets JSON de premier niveau du texte, en un seul parcours :
+    accolades comptées hors chaînes, échappements pris en compte. Le texte autour
+    (``` json, explications avant ou après) est ignoré.
+    """
+    depth = 0
+    start = -1
+    in_string = False
+    escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            # Guillemet hors objet (commentaire) : ne compte pas comme chaîne JSON
+            in_string = depth > 0
+        elif char == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif char == "}" and depth > 0:
+            depth -= 1
+            if depth == 0:
+                yield start, i + 1
+
+
+def _decode(candidate: str) -> Optional[Any]:
+    try:
+        return json.loads(candidate)
+    except ValueError:
+        pass
+    # Virgule finale avant } ou ] : erreur fréquente des modèles
+    repaired = _TRAILING_COMMA.sub(r"\1", candidate)
+    if repaired != candidate:
+        try:
+            return json.loads(repaired)
+        except ValueError:
+            pass
+    return None
+
+
+def extract_json_object(text: str) -> Dict[str, Any]:
+    """
+    Premier objet JSON décodable d'une réponse de modèle (blocs de code, texte avant/après tolérés).
+
+    :raises LLMReplyError: si la réponse ne contient aucun objet JSON valide
+    """
+    if not text:
+        raise LLMReplyError("réponse vide")
+    for start, end in _json_objects(text):
+        decoded = _decode(text[start:end])
+        if isinstance(decoded, dict):
+            return decoded
+    raise LLMReplyError("aucun objet JSON dans la réponse")
+
+
+def parse_order_reply(text: str) -> Dict[str, Any]:
+    """
+    Décode et valide une réponse d'analyse de commande contre OrderExtraction.
+    Retourne le JSON normalisé : {"is_order", "delivery_date" (ISO ou null), "items": [{"name", "quantity"}]}.
+
+    :raises LLMReplyError: si la réponse est illisible ou non conforme
+    """
+    return validate_order_payload(extract_json_object(text))
+
+
+def validate_order_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Valide un objet déjà décodé (ex: un résultat de lot) contre OrderExtraction."""
+    try:
+        order = _ORDER_ADAPTER.validate_python(payload)
+    except ValidationError as e:
+        errors = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'réponse'} : {err['msg']}" for err in e.errors())
+        raise LLMReplyError(f"réponse non conforme ({errors})")
+    return order.model_dump(mode="json")
@@ -0,0 +1,75 @@
+# utils/pagination.py
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, tuple_, literal
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """Curseur de pagination illisible ou falsifié."""
+    pass
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """
+    Encode la position (valeur de tri, id) de la dernière ligne d'une page
+    en un jeton opaque, sûr pour une URL.
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = {"dt": sort_value.isoformat()}
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[Any, int]:
+    """
+    Décode un jeton produit par encode_cursor.
+
+    :raises InvalidCursor: si le jeton n'a pas le format attendu
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["dt"])
+        if not isinstance(row_id, int):
+            raise TypeError("id de curseur invalide")
+        return sort_value, row_id
+    except Exception:
+        raise InvalidCursor("Curseur de pagination invalide")
+
+
+def apply_keyset(stmt: Select, sort_column, id_column, cursor: Optional[str], limit: int) -> Select:
+    """
+    Applique une pagination par clé (keyset) décroissante sur (sort_column, id_column).
+
+    Le filtre `(tri, id) < (valeur, id)` s'appuie sur l'index composite : le coût
+    dépend de la taille de la page et non de l'historique. On demande `limit + 1`
+    lignes pour savoir s'il existe une page suivante.
+    """
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(sort_column, id_column)
+            < tuple_(literal(sort_value, sort_column.type), literal(last_id, id_column.type))
+        )
+    return stmt.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def split_page(rows: Sequence[Any], limit: int, key: Callable[[Any], Tuple[Any, int]]) -> Tuple[List[Any], Optional[str]]:
+    """
+    Découpe le résultat de apply_keyset en (lignes de la page, next_cursor).
+
+    :param key: fonction retournant (valeur de tri, id) pour une ligne
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(*key(page[-1]))
@@ -0,0 +1,34 @@
+# utils/pdf_response.py
+
+import os
+from typing import Optional
+
+from fastapi import Request, Response, status
+from fastapi.responses import FileResponse
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def pdf_file_response(request: Request, path: str, filename: str) -> Response:
+    """
+    Réponse pour un PDF du stockage partagé (services/pdf_store.py) :
+    - le nom du fichier est l'empreinte de son contenu : ETag fort sans relire le PDF,
+      304 si le navigateur a déjà cette version (If-None-Match),
+    - sinon envoi par morceaux depuis le disque, Range / If-Range gérés par FileResponse.
+    """
+    etag = f'"{os.path.splitext(os.path.basename(path))[0]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=filename,
+        content_disposition_type="inline",
+        headers=headers,
+    )
@@ -0,0 +1,44 @@
+# utils/phone.py
+
+import os
+import re
+from typing import Optional
+
+from dotenv import load_dotenv
+
+# Indicatif pays appliqué aux numéros nationaux (0612345678 -> +33612345678)
+load_dotenv()
+DEFAULT_COUNTRY_CODE = os.getenv("DEFAULT_PHONE_COUNTRY_CODE", "33")
+
+_NON_DIGITS = re.compile(r"\D")
+_TRUNK_PREFIX = re.compile(r"\(\s*0\s*\)")
+
+
+def normalize_phone(raw: Optional[str]) -> Optional[str]:
+    """
+    Normalise un numéro de téléphone au format E.164 ('+' indicatif pays, puis le numéro),
+    pour la recherche par expéditeur WhatsApp.
+
+    - "+33 6 12 34 56 78", "+33 (0)6 12 34 56 78", "0033612345678" -> "+33612345678"
+    - "06.12.34.56.78" (numéro national) -> "+33612345678" (indicatif DEFAULT_PHONE_COUNTRY_CODE)
+    - "33612345678@c.us" (identifiant WhatsApp des providers) -> "+33612345678"
+
+    :param raw: Numéro tel que saisi ou reçu du webhook
+    :return: Numéro E.164, ou None si ce n'est pas un numéro valide (moins de 8 ou plus de 15 chiffres)
+    """
+    if not raw:
+        return None
+    raw = _TRUNK_PREFIX.sub("", raw.split("@", 1)[0]).strip()
+    digits = _NON_DIGITS.sub("", raw)
+    if raw.startswith("+"):
+        number = digits
+    elif digits.startswith("00"):
+        number = digits[2:]
+    elif digits.startswith("0"):
+        number = DEFAULT_COUNTRY_CODE + digits[1:]
+    else:
+        # Sans préfixe : déjà avec indicatif pays (format des webhooks WhatsApp)
+        number = digits
+    if not 8 <= len(number) <= 15 or number.startswith("0"):
+        return None
+    return f"+{number}"